@@ -0,0 +1,17 @@
+# bench.py
+"""
+Benchmark del pipeline MDVRP con instancias sintéticas:
+  python bench.py                          # 100 y 1000 nodos vs benchmarks/baseline.json
+  python bench.py --sizes 100 1000 10000
+  python bench.py --save-baseline          # reemplaza el baseline con esta corrida
+  python bench.py --set sa_engine=numba    # sobrescribe parámetros de OptimizationConfig
+Sale con código 1 si hay regresiones respecto al baseline.
+Equivale a `python -m mdvrp bench ...`.
+"""
+
+import sys
+
+from mdvrp.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["bench", *sys.argv[1:]]))
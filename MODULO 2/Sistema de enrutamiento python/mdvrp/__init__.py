@@ -1,21 +1,33 @@
 # mdvrp/__init__.py
-from .config import (
-    OptimizationConfig,
-    RouteComparison,
-    OptimizationResults,
-)
+"""
+Las clases públicas se importan al primer uso (PEP 562): `import mdvrp` no
+carga pandas, numba ni matplotlib hasta que el código realmente las necesita.
+"""
 
-from .data_loader import DataLoader
-from .route_builder import RouteBuilder
-from .optimizer import SimulatedAnnealingOptimizer
-from .results_table import ResultsTableGenerator
+import importlib
 
-__all__ = [
-    "OptimizationConfig",
-    "RouteComparison",
-    "OptimizationResults",
-    "DataLoader",
-    "RouteBuilder",
-    "SimulatedAnnealingOptimizer",
-    "ResultsTableGenerator",
-]
+_EXPORTS = {
+    "OptimizationConfig": ".config",
+    "RouteComparison": ".config",
+    "OptimizationResults": ".config",
+    "DataLoader": ".data_loader",
+    "RouteBuilder": ".route_builder",
+    "SimulatedAnnealingOptimizer": ".optimizer",
+    "ResultsTableGenerator": ".results_table",
+    "RouteRowWriter": ".results_table",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,137 @@
+# mdvrp/benchmark.py
+"""
+Benchmarks del pipeline MDVRP sobre instancias sintéticas.
+- Cronometra cada etapa: load_data (opcional, vía Excel), asignación,
+  clustering, rutas base (NN), SA, post-optimización y reporte
+- Registra el costo de la solución
+- Compara contra un baseline JSON y marca regresiones de tiempo o calidad
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+from dataclasses import replace
+
+from .config import OptimizationConfig
+from .data_loader import DataLoader
+from .instances import InstanceGenerator
+from .solver import MDVRPSolver
+from .results_table import ResultsTableGenerator
+
+# Configuración reducida para que 10k nodos termine en tiempo razonable
+BENCH_CONFIG = dict(iterations_base=300, iterations_per_store=30, multistart_perturbations=1)
+
+
+class BenchmarkRunner:
+    def __init__(self, sizes=(100, 1000), seed=0, metric="euclidean", config_overrides=None,
+                 with_excel=False, time_tolerance=0.25, cost_tolerance=0.005, min_time=0.25):
+        self.sizes = list(sizes)
+        self.seed = seed
+        self.metric = metric
+        self.config_overrides = {**BENCH_CONFIG, **(config_overrides or {})}
+        self.with_excel = with_excel
+        self.time_tolerance = time_tolerance
+        self.cost_tolerance = cost_tolerance
+        self.min_time = min_time  # etapas más cortas que esto no se comparan (ruido)
+
+    def run_instance(self, n_nodes):
+        cfg = replace(OptimizationConfig(), matrix_cache_dir=None, **self.config_overrides)
+        times = {}
+        quiet = io.StringIO()
+
+        t0 = time.perf_counter()
+        instance = InstanceGenerator.generate(n_nodes, seed=self.seed, metric=self.metric)
+        times["generate"] = time.perf_counter() - t0
+
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(quiet):
+            if self.with_excel:
+                data_file, dist_file, fuel_file = InstanceGenerator.write_excel(instance, tmp)
+                cfg = replace(cfg, data_file=data_file, distance_matrix_file=dist_file,
+                              fuel_matrix_file=fuel_file)
+                t0 = time.perf_counter()
+                instance = DataLoader(cfg).load_data()
+                times["load_data"] = time.perf_counter() - t0
+
+            df, df_depots, df_stores, D, C, has_predesigned = instance
+            solver = MDVRPSolver(cfg, df, df_depots, df_stores, D, C, has_predesigned)
+            results = solver.solve()
+            times.update(results.stage_times)
+
+            t0 = time.perf_counter()
+            ResultsTableGenerator.print_and_export(results, df, output_excel=os.path.join(tmp, "resumen.xlsx"))
+            times["reporting"] = time.perf_counter() - t0
+
+        times["total"] = sum(times.values())
+        return {
+            "n_nodes": n_nodes,
+            "n_depots": int(len(df_depots)),
+            "n_routes": int(results.summary["total_routes"]),
+            "total_opt_fuel": float(results.summary["total_opt_fuel"]),
+            "total_opt_distance": float(results.summary["total_opt_distance"]),
+            "times": times,
+        }
+
+    def run(self):
+        report = {
+            "meta": {
+                "seed": self.seed,
+                "metric": self.metric,
+                "config": self.config_overrides,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+            },
+            "instances": {},
+        }
+        for n in self.sizes:
+            print(f"  · Instancia {n} nodos...")
+            report["instances"][str(n)] = self.run_instance(n)
+        return report
+
+    def compare(self, report, baseline):
+        """Lista de regresiones (texto) contra el baseline."""
+        regressions = []
+        for key, cur in report["instances"].items():
+            base = baseline.get("instances", {}).get(key)
+            if base is None:
+                continue
+            if cur["total_opt_fuel"] > base["total_opt_fuel"] * (1.0 + self.cost_tolerance) + 1e-9:
+                regressions.append(f"{key} nodos: combustible {cur['total_opt_fuel']:.2f} "
+                                   f"vs baseline {base['total_opt_fuel']:.2f}")
+            for stage, t in cur["times"].items():
+                t_base = base["times"].get(stage)
+                if t_base is None or max(t, t_base) < self.min_time:
+                    continue
+                if t > t_base * (1.0 + self.time_tolerance):
+                    regressions.append(f"{key} nodos: etapa '{stage}' {t:.3f}s vs baseline {t_base:.3f}s")
+        return regressions
+
+    @staticmethod
+    def print_report(report, baseline=None):
+        print("\n" + "=" * 100)
+        print("BENCHMARK MDVRP")
+        print("=" * 100)
+        for key, cur in report["instances"].items():
+            base = (baseline or {}).get("instances", {}).get(key, {})
+            print(f"\n{key} nodos | {cur['n_depots']} CDs | {cur['n_routes']} rutas | "
+                  f"combustible {cur['total_opt_fuel']:.2f}"
+                  + (f" (baseline {base['total_opt_fuel']:.2f})" if base else ""))
+            print(f"{'ETAPA':<20}{'SEG':>12}{'BASELINE':>12}")
+            for stage, t in cur["times"].items():
+                t_base = base.get("times", {}).get(stage) if base else None
+                print(f"{stage:<20}{t:>12.3f}" + (f"{t_base:>12.3f}" if t_base is not None else f"{'-':>12}"))
+
+    @staticmethod
+    def load_json(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def save_json(report, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
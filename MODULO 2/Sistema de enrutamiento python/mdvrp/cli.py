@@ -0,0 +1,251 @@
+# mdvrp/cli.py
+"""
+Línea de comandos MDVRP (python -m mdvrp <subcomando>):
+  optimize   carga datos, optimiza y escribe el reporte (--visualize para graficar)
+  report     tabla + export desde un archivo de resultados (optimize --results)
+  visualize  gráficas desde un archivo de resultados
+  bench      benchmark con instancias sintéticas (ver bench.py)
+  serve      servicio residente (ver serve.py)
+  scenarios  malla de escenarios what-if con una sola carga de datos
+Cada subcomando importa solo lo que usa: optimize no carga matplotlib y,
+con sa_engine='python', tampoco numba. Así los lotes de muchas instancias
+chicas no pagan el arranque de las librerías de gráficas.
+"""
+
+import argparse
+import os
+import pickle
+from dataclasses import replace
+
+from .config import OptimizationConfig, parse_overrides
+
+
+def _config(args):
+    return replace(OptimizationConfig(), **parse_overrides(args.overrides))
+
+
+def _save_results(results, path):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    print(f"  ✓ Resultados guardados en {path}")
+
+
+def _load_results(path):
+    if not os.path.exists(path):
+        raise ValueError(f"⚠️ No existe el archivo de resultados: {path}")
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _print_closing(results, files):
+    # Cierre tipo auditoría
+    print("\n" + "="*70)
+    print("OPTIMIZACION COMPLETADA EXITOSAMENTE")
+    print("="*70)
+    print(f"\n RESULTADOS FINALES:")
+    print(f"  * Total de rutas generadas: {results.summary['total_routes']}")
+    print(f"  * Costo combustible base: ${results.summary['total_base_fuel']:.2f}")
+    print(f"  * Costo combustible optimizado: ${results.summary['total_opt_fuel']:.2f}")
+    print(f"  * Ahorro en combustible: ${results.summary['fuel_savings']:.2f} "
+          f"({results.summary['fuel_savings_pct']:.2f}%)")
+    print(f"  * Distancia base: {results.summary['total_base_distance']:.2f} km")
+    print(f"  * Distancia optimizada: {results.summary['total_opt_distance']:.2f} km")
+    print(f"  * Reduccion de distancia: {results.summary['distance_savings']:.2f} km "
+          f"({results.summary['distance_savings_pct']:.2f}%)")
+    print(f"\n ARCHIVOS GENERADOS:")
+    for label, path in files:
+        print(f"  * {label}: {path}")
+    print("\n Sistema listo para análisis de resultados")
+    print("="*70 + "\n")
+
+
+def cmd_optimize(args):
+    from .data_loader import DataLoader
+    from .instrumentation import InstrumentationExporter
+    from .results_table import ResultsTableGenerator, RouteRowWriter
+    from .solver import MDVRPSolver
+    from .warm_start import RunSnapshot
+
+    cfg = _config(args)
+    loader = DataLoader(cfg)
+    df, df_depots, df_stores, D, C, has_predesigned = loader.load_data()
+
+    # Arranque en caliente: solo se re-optimizan las rutas afectadas por los cambios
+    previous = RunSnapshot.load(cfg.warm_start_file) if cfg.warm_start_file else None
+
+    # En modo compacto (float32) se compara el resultado contra las matrices float64
+    reference = loader.reference_matrices(df) if cfg.compact else None
+    solver = MDVRPSolver(cfg, df, df_depots, df_stores, D, C, has_predesigned,
+                         reference_matrices=reference)
+    files = []
+    if args.no_report:
+        results = solver.solve(previous=previous)
+    else:
+        # Las rutas se escriben al reporte a medida que el solver las termina
+        with RouteRowWriter(cfg.output_report, cfg.report_format, cfg.report_chunk_rows) as writer:
+            results = solver.solve(previous=previous, sink=writer)
+        # Tabla + resumen (el archivo ya quedó escrito)
+        ResultsTableGenerator.print_and_export(results, df, quiet=cfg.report_quiet, writer=writer)
+        files.append(("Reporte de rutas", writer.path))
+        if writer.summary_path != writer.path:
+            files.append(("Resumen global", writer.summary_path))
+    if cfg.warm_start_file:
+        RunSnapshot.save(results, df, cfg.warm_start_file)
+    if args.results:
+        _save_results(results, args.results)
+        files.append(("Resultados", args.results))
+
+    if args.visualize:
+        from .visualizer import Visualizer
+        Visualizer.generate_visualizations(results, cfg.output_visualizations)
+        files.append(("Visualizaciones", cfg.output_visualizations))
+
+    # Instrumentación (tiempos por etapa/ruta, aceptación, trazas de SA)
+    if cfg.instrumentation_json:
+        InstrumentationExporter.export_json(results, cfg.instrumentation_json)
+    if cfg.instrumentation_csv_dir:
+        InstrumentationExporter.export_csv(results, cfg.instrumentation_csv_dir)
+
+    _print_closing(results, files)
+    return 0
+
+
+def cmd_report(args):
+    from .results_table import ResultsTableGenerator
+
+    cfg = _config(args)
+    results = _load_results(args.results)
+    ResultsTableGenerator.print_and_export(results, None, output_excel=args.output or cfg.output_report,
+                                           fmt=cfg.report_format, quiet=cfg.report_quiet,
+                                           chunk_rows=cfg.report_chunk_rows)
+    return 0
+
+
+def cmd_visualize(args):
+    from .visualizer import Visualizer
+
+    cfg = _config(args)
+    results = _load_results(args.results)
+    Visualizer.generate_visualizations(results, args.output or cfg.output_visualizations)
+    return 0
+
+
+def cmd_bench(args):
+    from .benchmark import BenchmarkRunner
+
+    runner = BenchmarkRunner(sizes=args.sizes, seed=args.seed, metric=args.metric,
+                             config_overrides=parse_overrides(args.overrides),
+                             with_excel=args.with_excel, time_tolerance=args.time_tolerance,
+                             cost_tolerance=args.cost_tolerance)
+    report = runner.run()
+
+    baseline = BenchmarkRunner.load_json(args.baseline) if os.path.exists(args.baseline) else None
+    BenchmarkRunner.print_report(report, baseline)
+    if args.output:
+        BenchmarkRunner.save_json(report, args.output)
+
+    if args.save_baseline:
+        BenchmarkRunner.save_json(report, args.baseline)
+        print(f"\nBaseline guardado en {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\n⚠️ Sin baseline ({args.baseline}); usa --save-baseline para crearlo")
+        return 0
+    regressions = runner.compare(report, baseline)
+    if regressions:
+        print("\n⚠️ REGRESIONES:")
+        for r in regressions:
+            print(f"  * {r}")
+        return 1
+    print("\n✓ Sin regresiones respecto al baseline")
+    return 0
+
+
+def cmd_serve(args):
+    from .service import serve
+
+    serve(_config(args), host=args.host, port=args.port, workers=args.workers, preload=args.dataset)
+    return 0
+
+
+def _parse_axes(items):
+    """["param=v1,v2,...", ...] -> {"param": [v1, v2, ...]} (valores como literales de Python)."""
+    axes = {}
+    for item in items or []:
+        key, _, raw = item.partition("=")
+        if not raw:
+            raise ValueError(f"⚠️ Eje de escenario sin valores: {item!r} (usar param=v1,v2,...)")
+        axes[key] = [parse_overrides([f"{key}={v}"])[key] for v in raw.split(",")]
+    return axes
+
+
+def cmd_scenarios(args):
+    from .data_loader import DataLoader
+    from .scenarios import ScenarioRunner
+
+    cfg = _config(args)
+    df, df_depots, df_stores, D, C, has_predesigned = DataLoader(cfg).load_data()
+    runner = ScenarioRunner(cfg, df, df_depots, df_stores, D, C, has_predesigned,
+                            workers=args.workers or cfg.workers)
+    table = runner.run(ScenarioRunner.grid(_parse_axes(args.axes)))
+    ScenarioRunner.print_table(table)
+    if args.output:
+        ScenarioRunner.export(table, args.output)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mdvrp", description="Sistema de enrutamiento MDVRP")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add(name, handler, help_text):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--set", dest="overrides", action="append", metavar="CLAVE=VALOR",
+                       help="sobrescribe un parámetro de OptimizationConfig")
+        p.set_defaults(handler=handler)
+        return p
+
+    p = add("optimize", cmd_optimize, "optimizar rutas y escribir el reporte")
+    p.add_argument("--results", help="guardar los resultados (para report / visualize)")
+    p.add_argument("--visualize", action="store_true", help="generar también las gráficas")
+    p.add_argument("--no-report", action="store_true", help="no escribir el reporte de rutas")
+
+    p = add("report", cmd_report, "tabla y export desde un archivo de resultados")
+    p.add_argument("results")
+    p.add_argument("--output", help="archivo de salida (por defecto cfg.output_report)")
+
+    p = add("visualize", cmd_visualize, "gráficas desde un archivo de resultados")
+    p.add_argument("results")
+    p.add_argument("--output", help="imagen de salida (por defecto cfg.output_visualizations)")
+
+    p = add("bench", cmd_bench, "benchmark con instancias sintéticas")
+    p.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--metric", choices=["euclidean", "perturbed"], default="euclidean")
+    p.add_argument("--with-excel", action="store_true", help="cronometrar load_data escribiendo Excel")
+    p.add_argument("--baseline", default=os.path.join("benchmarks", "baseline.json"))
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--output", help="guardar el reporte JSON de esta corrida")
+    p.add_argument("--time-tolerance", type=float, default=0.25)
+    p.add_argument("--cost-tolerance", type=float, default=0.005)
+
+    p = add("serve", cmd_serve, "servicio residente (API HTTP local)")
+    p.add_argument("--host")
+    p.add_argument("--port", type=int)
+    p.add_argument("--workers", type=int)
+    p.add_argument("--dataset", help="dataset_id a precargar con la configuración base")
+
+    p = add("scenarios", cmd_scenarios, "malla de escenarios what-if")
+    p.add_argument("--axis", dest="axes", action="append", metavar="PARAM=V1,V2,...",
+                   help="eje de la malla (p. ej. capacity_multiplier_p50=2.5,3.0 o fuel_price_scale=1.0,1.2)")
+    p.add_argument("--workers", type=int, help="procesos para las corridas (por defecto cfg.workers)")
+    p.add_argument("--output", default="escenarios.xlsx", help="tabla comparativa (.xlsx o .csv)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
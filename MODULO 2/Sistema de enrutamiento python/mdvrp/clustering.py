@@ -5,6 +5,8 @@ Asignación y clustering de tiendas a Centros de Distribución.
 
 import numpy as np
 
+from .geometry import GeometryCalculator
+
 
 class StoreAssigner:
     """
@@ -17,10 +19,11 @@ class StoreAssigner:
         store_indices = df_stores.index.tolist()
 
         assignments = {dep: [] for dep in depot_indices}
-        for store in store_indices:
-            distances = [distance_matrix[store, dep] for dep in depot_indices]
-            nearest_depot = depot_indices[int(np.argmin(distances))]
-            assignments[nearest_depot].append(store)
+        if not store_indices:
+            return assignments
+        nearest = np.argmin(distance_matrix[np.ix_(store_indices, depot_indices)], axis=1)
+        for store, k in zip(store_indices, nearest.tolist()):
+            assignments[depot_indices[k]].append(store)
 
         return assignments
 
@@ -54,3 +57,115 @@ class CapacityClusterer:
             clusters[depot] = depot_clusters
 
         return clusters
+
+
+class CapacityClusteringEngine:
+    """
+    Clustering por capacidad intercambiable (cfg.clustering_method):
+    - 'sequential': llena vehículos en el orden de las tiendas (comportamiento original)
+    - 'sweep': barrido angular alrededor del CD, iniciando en el mayor hueco angular
+    - 'kmeans': k-means capacitado (arranca del barrido, asigna con capacidad)
+    - 'binpack': first-fit decreasing por demanda (mínimo número de vehículos)
+    Todas regresan una lista de clusters (listas de índices de tienda).
+    Una tienda con demanda mayor a la capacidad queda sola en su cluster.
+    """
+
+    METHODS = ("sequential", "sweep", "kmeans", "binpack")
+
+    def __init__(self, df, method="sequential", kmeans_iterations=20):
+        if method not in self.METHODS:
+            raise ValueError(f"⚠️ clustering_method inválido: {method!r} "
+                             f"(opciones: {', '.join(self.METHODS)})")
+        self.df = df
+        self.method = method
+        self.kmeans_iterations = kmeans_iterations
+        self.demand = df["demanda"].to_numpy(dtype=float)
+        # Proyección equirectangular local (suficiente para agrupar)
+        lat = df["lat"].to_numpy(dtype=float)
+        lon = df["lon"].to_numpy(dtype=float)
+        self.xy = np.column_stack([lon * np.cos(np.radians(np.nanmean(lat))), lat])
+
+    def cluster(self, depot_idx, stores, capacity):
+        if not stores:
+            return []
+        stores = np.asarray(stores, dtype=int)
+        if self.method == "sequential":
+            return self._fill(stores, capacity)
+        if self.method == "sweep":
+            return self._fill(self._sweep_order(depot_idx, stores), capacity)
+        if self.method == "kmeans":
+            return self._capacitated_kmeans(depot_idx, stores, capacity)
+        return self._first_fit_decreasing(stores, capacity)
+
+    def _fill(self, ordered, capacity):
+        """Llenado secuencial por capacidad, en el orden dado."""
+        clusters, current, load = [], [], 0.0
+        for s, d in zip(ordered.tolist(), self.demand[ordered].tolist()):
+            if load + d <= capacity:
+                current.append(s); load += d
+            else:
+                if current:
+                    clusters.append(current)
+                current, load = [s], d
+        if current:
+            clusters.append(current)
+        return clusters
+
+    def _sweep_order(self, depot_idx, stores):
+        angles = GeometryCalculator.calculate_angles_from_depot(self.df, depot_idx, stores)
+        order = np.argsort(angles, kind="stable")
+        sorted_angles = angles[order]
+        if len(order) > 1:
+            # Empezar justo después del mayor hueco angular (no partir un grupo natural)
+            gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 2 * np.pi))
+            order = np.roll(order, -int((np.argmax(gaps) + 1) % len(order)))
+        return stores[order]
+
+    def _first_fit_decreasing(self, stores, capacity):
+        order = stores[np.argsort(-self.demand[stores], kind="stable")]
+        clusters, loads = [], []
+        for s, d in zip(order.tolist(), self.demand[order].tolist()):
+            fits = np.flatnonzero(np.asarray(loads) + d <= capacity) if loads else []
+            if len(fits):
+                k = int(fits[0])
+                clusters[k].append(s); loads[k] += d
+            else:
+                clusters.append([s]); loads.append(d)
+        return clusters
+
+    def _capacitated_kmeans(self, depot_idx, stores, capacity):
+        clusters = self._fill(self._sweep_order(depot_idx, stores), capacity)
+        pts = self.xy[stores]
+        dem = self.demand[stores]
+        # Asignar primero las tiendas de mayor demanda (las más difíciles de acomodar)
+        order = np.argsort(-dem, kind="stable")
+
+        pos = {s: i for i, s in enumerate(stores.tolist())}
+        labels = np.empty(len(stores), dtype=int)
+        for k, cl in enumerate(clusters):
+            labels[[pos[s] for s in cl]] = k
+
+        for _ in range(self.kmeans_iterations):
+            k_count = labels.max() + 1
+            centroids = np.vstack([pts[labels == k].mean(axis=0) for k in range(k_count)])
+            dist = np.linalg.norm(pts[:, None, :] - centroids[None, :, :], axis=2)
+            prefs = np.argsort(dist, axis=1, kind="stable")
+            loads = np.zeros(k_count)
+            new_labels = np.full(len(stores), -1)
+            for i in order:
+                for k in prefs[i]:
+                    if loads[k] + dem[i] <= capacity:
+                        new_labels[i] = k; loads[k] += dem[i]
+                        break
+                if new_labels[i] < 0:
+                    # No cabe en ningún vehículo: abrir uno nuevo
+                    new_labels[i] = len(loads)
+                    loads = np.append(loads, dem[i])
+                    prefs = np.column_stack([prefs, np.full(len(stores), len(loads) - 1)])
+            # Compactar etiquetas (clusters vacíos desaparecen)
+            _, new_labels = np.unique(new_labels, return_inverse=True)
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+
+        return [stores[labels == k].tolist() for k in range(labels.max() + 1)]
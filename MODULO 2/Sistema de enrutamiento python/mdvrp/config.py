@@ -5,10 +5,30 @@ Incluye parámetros de SA, columnas opcionales para rutas pre-diseñadas
 y estructuras para reportar comparación Prediseñada vs SA vs Elegida.
 """
 
+import ast
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 
 
+# Definen el dataset (o abren pools anidados): no se cambian por trabajo ni por escenario
+DATASET_FIELDS = ("data_file", "distance_matrix_file", "fuel_matrix_file", "matrix_cache_dir",
+                  "matrix_backend", "haversine_road_factor", "fuel_cost_per_km", "matrix_row_cache",
+                  "compact", "workers", "warm_start_file", "instrumentation_json",
+                  "instrumentation_csv_dir")
+
+
+def parse_overrides(items):
+    """["clave=valor", ...] -> dict para OptimizationConfig (valor como literal de Python si se puede)."""
+    overrides = {}
+    for item in items or []:
+        key, _, raw = item.partition("=")
+        try:
+            overrides[key] = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            overrides[key] = raw
+    return overrides
+
+
 @dataclass
 class OptimizationConfig:
     # Archivos
@@ -16,16 +36,41 @@ class OptimizationConfig:
     distance_matrix_file: str = "matriz_distancias.xlsx"
     fuel_matrix_file: str = "matriz_costos_combustible.xlsx"
     output_visualizations: str = "visualizaciones_mdvrp.png"
+    matrix_cache_dir: Optional[str] = ".mdvrp_cache"  # caché .npy de matrices (None = desactivada)
+    matrix_backend: str = "memmap"         # 'dense', 'memmap' (caché .npy) o 'haversine' (bajo demanda)
+    haversine_road_factor: float = 1.3     # factor de circuito carretero sobre gran círculo
+    fuel_cost_per_km: float = 0.15         # modelo de combustible del backend 'haversine' (C = factor x D)
+    matrix_row_cache: int = 256            # filas calculadas en caché LRU (backend 'haversine')
+    compact: bool = False                  # float32 en matrices + índices int16/int32 (reporta deriva vs float64)
+
+    # Reporte (ver results_table.RouteRowWriter)
+    output_report: str = "resumen_global.xlsx"  # rutas + resumen: '.xlsx', '.csv' o '.parquet'
+    report_format: Optional[str] = None    # None = según la extensión de output_report
+    report_quiet: bool = False             # sin tabla por ruta en consola (solo resumen global)
+    report_chunk_rows: int = 10_000        # filas por bloque al escribir CSV / Parquet
+    report_store_names: bool = True        # False = RouteComparison.stores vacío (flotas grandes)
 
     # Columnas (opcionales) para rutas pre-diseñadas
     col_route_name: str = "Ruta_Predisenada"
     col_route_order: str = "Orden_Ruta"
 
+    # Columnas (opcionales) de ventana de tiempo por tienda: hora del día (7.5 o "07:30"); vacío = sin límite
+    col_window_start: str = "Ventana_Inicio"
+    col_window_end: str = "Ventana_Fin"
+
     # Parámetros operativos / vehículo
     average_speed_kmh: float = 35.0
     service_time_minutes: float = 10.0
+    shift_start_hour: float = 6.0          # salida del CD (hora del día; ver time_windows.py)
+    max_shift_hours: Optional[float] = None  # duración máxima de la jornada (None = sin límite)
     capacity_multiplier_p50: float = 3.0
     capacity_multiplier_p80: float = 2.2
+    clustering_method: str = "sequential"  # 'sequential', 'sweep', 'kmeans' o 'binpack'
+
+    # Flota heterogénea y multi-viaje (ver fleet.py); None = un tipo con la capacidad por percentiles
+    fleet: Optional[List[Dict[str, Any]]] = None  # [{"name": "Torton", "capacity": 120, "fuel_factor": 1.3, "count": 4}, ...]
+    max_trips_per_vehicle: int = 1         # viajes por vehículo en la jornada (1 con ventanas de tiempo)
+    reload_minutes: float = 30.0           # recarga en el CD entre viajes
 
     # SA (Simulated Annealing)
     seed: int = 123
@@ -34,13 +79,67 @@ class OptimizationConfig:
     min_temp: float = 1e-6
     iterations_base: int = 2000
     iterations_per_store: int = 150
-    track_iterations: bool = True
-    tracking_interval: int = 50
+    track_iterations: bool = True   # tiempos por etapa + aceptación por operador + trazas de SA
+    tracking_interval: int = 50     # muestreo de la traza de mejor combustible (iteraciones)
+    instrumentation_json: Optional[str] = None     # p. ej. "instrumentacion.json"
+    instrumentation_csv_dir: Optional[str] = None  # p. ej. "instrumentacion/"
+    sa_engine: str = "python"       # 'python' (referencia), 'numba' (ciclo compilado) o 'population' (cadenas en lote)
+    sa_batch_size: int = 65536      # aleatorios pre-generados por lote (motor 'numba')
+    population_size: int = 64               # cadenas por ruta (motor 'population')
+    population_sync_interval: int = 200     # pasos entre reemplazos de las peores cadenas por el mejor (0 = nunca)
+    population_replace_fraction: float = 0.25  # fracción de cadenas reemplazadas en cada sincronización
+    route_cache_size: int = 0        # entradas LRU del caché de evaluación de rutas (0 = desactivado; conviene con matrix_backend='haversine')
+
+    # Solución exacta de rutas chicas en lugar del SA (ver exact.py; no aplica con ventanas de tiempo)
+    exact_max_stores: int = 12        # hasta N tiendas: DP de Held–Karp completo (0 = desactivado)
+    exact_bnb_max_stores: int = 15    # hasta N tiendas: DP con poda y tope de subconjuntos; si no alcanza, SA
+    exact_max_states: int = 4000      # subconjuntos por capa antes de volver al SA (modo con poda)
+
+    # SA con presupuesto de tiempo / iteraciones adaptativas
+    time_budget_s: Optional[float] = None       # segundos de pared para todo el SA (None = iteraciones fijas)
+    budget_iteration_factor: int = 20           # tope por arranque en modo presupuesto (x iteraciones normales)
+    stagnation_iterations: Optional[int] = None  # corta el arranque sin mejorar su mejor en X iteraciones
+    stagnation_seconds: Optional[float] = None   # ... o sin mejorar en X segundos
 
     # Metaheurística robustecida
     multistart_perturbations: int = 5  # intentos adicionales perturbando la ruta inicial
     accept_tie_on_distance: bool = True  # desempate por menor distancia cuando costos iguales
 
+    # Post-optimización determinista (2-opt + Or-opt) sobre ruta base y ruta SA
+    post_optimize: bool = True
+    or_opt_max_len: int = 3
+
+    # Búsqueda entre rutas (relocate / swap / CROSS-exchange) tras el SA
+    inter_route: bool = False
+    inter_route_cross_depot: bool = False  # permitir mover tiendas entre CDs
+    inter_route_max_segment: int = 2       # tiendas por segmento en CROSS-exchange
+    inter_route_max_passes: int = 50
+
+    # Movimientos guiados por vecinos (k más cercanos); 0 = desactivado
+    neighbor_k: int = 0
+    neighbor_metric: str = "fuel"        # 'fuel' o 'distance'
+    neighbor_move_prob: float = 0.8      # fracción de propuestas guiadas (resto al azar)
+
+    # Arranque en caliente: reutiliza la corrida previa y solo re-optimiza rutas afectadas
+    warm_start_file: Optional[str] = None       # p. ej. "ultima_corrida.json" (None = desactivado)
+    warm_start_iteration_factor: float = 0.2    # fracción de iteraciones del SA corto
+
+    # Paralelismo: procesos para optimizar rutas independientes (1 = secuencial)
+    workers: int = 1
+
+    # Modo servicio (serve.py): API HTTP local con datasets residentes
+    service_host: str = "127.0.0.1"
+    service_port: int = 8765
+    service_workers: int = 2          # procesos para trabajos (plan completo o ruta)
+    service_max_jobs: int = 1000      # trabajos terminados consultables en GET /jobs/<id>
+
+    # Multistart concurrente: 'sequential' (referencia), 'lockstep' (arranques
+    # intercalados por tramos) o 'process' (tramos en pool de procesos)
+    multistart_mode: str = "sequential"
+    multistart_workers: int = 1
+    multistart_checkpoints: int = 4        # checkpoints para cancelar arranques dominados
+    multistart_cancel_gap: Optional[float] = 0.05  # cancela si su mejor fuel > líder*(1+gap); None = nunca
+
 
 @dataclass
 class RouteComparison:
@@ -51,7 +150,7 @@ class RouteComparison:
     num_stores: int
 
     # Prediseñada (si aplica; si no, se usa NN como 'base')
-    base_kind: str  # 'Predisenada' o 'NN'
+    base_kind: str  # 'Predisenada' o 'NN'; en caliente 'Previa' (reutilizada) o 'Reparada'
     base_distance: float
     base_fuel_cost: float
 
@@ -62,7 +161,7 @@ class RouteComparison:
     sa_improvement_dist_pct: float
 
     # Elegida (la mejor de ambas)
-    chosen_kind: str  # 'Predisenada' o 'SA'
+    chosen_kind: str  # 'Predisenada', 'NN', 'LS' (base + descenso local), 'SA', 'Exacta' o 'IR' (entre rutas)
     chosen_distance: float
     chosen_fuel_cost: float
 
@@ -71,9 +170,32 @@ class RouteComparison:
     sa_sequence_idx: List[int]
     chosen_sequence_idx: List[int]
 
+    # Mejora del descenso local (2-opt + Or-opt), si cfg.post_optimize
+    ls_base_fuel_gain: float = 0.0
+    ls_base_dist_gain: float = 0.0
+    ls_sa_fuel_gain: float = 0.0
+    ls_sa_dist_gain: float = 0.0
+
+    # Horario de la ruta elegida: duración de la jornada (con esperas si hay
+    # ventanas de tiempo) y horas de retraso (0 = factible)
+    route_hours: float = 0.0
+    late_hours: float = 0.0
+
+    # Flota (cfg.fleet): tipo, factor de combustible aplicado a los costos,
+    # vehículo y número de viaje de ese vehículo (vacíos sin flota)
+    vehicle_type: str = ""
+    fuel_factor: float = 1.0
+    vehicle_id: str = ""
+    trip: int = 0
+
 
 @dataclass
 class OptimizationResults:
     """Resultados globales del sistema MDVRP."""
     routes: List[RouteComparison] = field(default_factory=list)
     summary: Dict[str, Any] = field(default_factory=dict)
+    stage_times: Dict[str, float] = field(default_factory=dict)  # segundos de pared por etapa
+    stage_cpu_times: Dict[str, float] = field(default_factory=dict)  # segundos de CPU por etapa
+    route_stats: List[Dict[str, Any]] = field(default_factory=list)  # SA por ruta (ver instrumentation.py)
+    cache_stats: Dict[str, Any] = field(default_factory=dict)  # RouteCostCache del proceso principal
+    precision_drift: Dict[str, Any] = field(default_factory=dict)  # modo compacto vs float64
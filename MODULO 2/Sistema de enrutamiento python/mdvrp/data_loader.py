@@ -4,12 +4,24 @@ Carga y validación de datos. Lee:
 - distribucion.xlsx (ubicaciones y, opcionalmente, rutas prediseñadas)
 - matriz_distancias.xlsx (N x N)
 - matriz_costos_combustible.xlsx (N x N)
-Permite rutas prediseñadas si existen columnas Ruta_Predisenada / Orden_Ruta.
+Permite rutas prediseñadas si existen columnas Ruta_Predisenada / Orden_Ruta,
+y ventanas de tiempo por tienda con Ventana_Inicio / Ventana_Fin.
+Las matrices ya limpias se guardan en caché binaria (.npy) indexada por el hash
+del libro de Excel; las siguientes corridas las abren con mmap sin copiarlas.
+Con cfg.matrix_backend='haversine' no se leen matrices: D y C se calculan bajo
+demanda desde lat/lon (ver matrices.py).
 """
 
+import hashlib
+import os
+import re
+
 import pandas as pd
 import numpy as np
 
+from .matrices import MATRIX_BACKENDS, HaversineMatrix, ScaledMatrix
+from .time_windows import DUE_COLUMN, READY_COLUMN, parse_hours
+
 
 class DataLoader:
     def __init__(self, config):
@@ -54,30 +66,121 @@ class DataLoader:
             if self.config.col_route_order in df.columns:
                 df[self.config.col_route_order] = pd.to_numeric(df[self.config.col_route_order], errors="coerce")
 
-        # === 2) MATRICES ===
-        # Saltar encabezado tipo "Nodo_1 ... Nodo_N"
-        dist_df = pd.read_excel(self.config.distance_matrix_file, header=None, skiprows=1)
-        fuel_df = pd.read_excel(self.config.fuel_matrix_file, header=None, skiprows=1)
+        # Ventanas de tiempo (opcionales): horas del día, NaN = sin ventana
+        for col, target in ((self.config.col_window_start, READY_COLUMN), (self.config.col_window_end, DUE_COLUMN)):
+            if col in df.columns:
+                df[target] = np.where(is_store, parse_hours(df[col]), np.nan)
 
-        # Forzar numérico y limpiar bordes
-        dist_df = dist_df.apply(pd.to_numeric, errors="coerce").dropna(axis=1, how="all").dropna(how="all")
-        fuel_df = fuel_df.apply(pd.to_numeric, errors="coerce").dropna(axis=1, how="all").dropna(how="all")
-
-        n1, n2 = dist_df.shape
+        # === 2) MATRICES ===
+        backend = self.config.matrix_backend
+        if backend not in MATRIX_BACKENDS:
+            raise ValueError(f"⚠️ matrix_backend inválido: {backend!r} (opciones: {', '.join(MATRIX_BACKENDS)})")
+        dtype = np.float32 if self.config.compact else np.float64
+        if backend == "haversine":
+            distance_matrix = HaversineMatrix(df["lat"], df["lon"], self.config.haversine_road_factor,
+                                              self.config.matrix_row_cache, dtype=dtype)
+            fuel_matrix = ScaledMatrix(distance_matrix, self.config.fuel_cost_per_km)
+        else:
+            distance_matrix = self._load_matrix(self.config.distance_matrix_file, dtype)
+            fuel_matrix = self._load_matrix(self.config.fuel_matrix_file, dtype)
+
+        n1, n2 = distance_matrix.shape
         if n1 != n2:
             raise ValueError(f"⚠️ La matriz de distancias no es cuadrada ({n1}x{n2}).")
-        if dist_df.shape != fuel_df.shape:
+        if distance_matrix.shape != fuel_matrix.shape:
             raise ValueError("⚠️ Distancias y costos de combustible tienen tamaños diferentes.")
-
-        distance_matrix = dist_df.values.astype(float)
-        fuel_matrix = fuel_df.values.astype(float)
-
-        # Diagonales a 0
-        np.fill_diagonal(distance_matrix, 0.0)
-        np.fill_diagonal(fuel_matrix, 0.0)
+        if n1 != len(df):
+            raise ValueError(f"⚠️ La matriz tiene {n1} nodos y distribucion.xlsx {len(df)} filas.")
 
         print(f"  ✓ Depósitos: {len(df_depots)}")
         print(f"  ✓ Tiendas: {len(df_stores)}")
-        print(f"  ✓ Matriz {n1}x{n2}")
+        print(f"  ✓ Matriz {n1}x{n2} ({backend}, {np.dtype(distance_matrix.dtype).name})")
 
         return df, df_depots, df_stores, distance_matrix, fuel_matrix, has_predesigned
+
+    @staticmethod
+    def _file_digest(path, chunk_size=1 << 20):
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    @staticmethod
+    def _read_matrix_excel(path):
+        # Saltar encabezado tipo "Nodo_1 ... Nodo_N"
+        mat_df = pd.read_excel(path, header=None, skiprows=1)
+        # Forzar numérico y limpiar bordes
+        mat_df = mat_df.apply(pd.to_numeric, errors="coerce").dropna(axis=1, how="all").dropna(how="all")
+        matrix = mat_df.values.astype(float)
+        # Diagonal a 0 (solo si es cuadrada; la validación se hace después)
+        if matrix.shape[0] == matrix.shape[1]:
+            np.fill_diagonal(matrix, 0.0)
+        return matrix
+
+    def _load_matrix(self, path, dtype=np.float64, mmap=None):
+        """
+        Lee una matriz N x N. Si cfg.matrix_cache_dir está definido, usa/crea
+        <cache>/<nombre>-<sha256>.npy; un cambio en el Excel cambia el hash
+        y por lo tanto invalida la caché anterior. Con dtype float32 se deriva
+        <...>-float32.npy de la caché float64 (se conservan ambas).
+        """
+        dtype = np.dtype(dtype)
+        if mmap is None:
+            mmap = self.config.matrix_backend == "memmap"
+        cache_dir = self.config.matrix_cache_dir
+        if not cache_dir:
+            if mmap:
+                print("  ⚠️ matrix_backend='memmap' requiere matrix_cache_dir: se carga en memoria")
+            return self._read_matrix_excel(path).astype(dtype, copy=False)
+
+        stem = os.path.splitext(os.path.basename(path))[0]
+        base = os.path.join(cache_dir, f"{stem}-{self._file_digest(path)[:16]}")
+        cache_path = base + ".npy"
+        if os.path.exists(cache_path):
+            print(f"  ✓ {stem}: caché binaria ({cache_path})")
+        else:
+            matrix = self._read_matrix_excel(path)
+            os.makedirs(cache_dir, exist_ok=True)
+            # Quitar versiones anteriores de la misma matriz (solo <stem>-<hash>[-<dtype>].npy,
+            # no las de otro libro cuyo nombre empiece igual, p. ej. "<stem>-2024.npy")
+            pattern = re.compile(rf"{re.escape(stem)}-[0-9a-f]{{16}}(-\w+)?\.npy")
+            for name in os.listdir(cache_dir):
+                old = os.path.join(cache_dir, name)
+                if pattern.fullmatch(name) and not old.startswith(base):
+                    os.remove(old)
+            self._save_atomic(cache_path, matrix)
+            print(f"  ✓ {stem}: caché binaria creada ({cache_path})")
+
+        if dtype != np.float64:
+            variant = f"{base}-{dtype.name}.npy"
+            if not os.path.exists(variant):
+                self._save_atomic(variant, np.load(cache_path, mmap_mode="r").astype(dtype))
+            cache_path = variant
+        return self._open_cached(cache_path, mmap)
+
+    @staticmethod
+    def _save_atomic(cache_path, matrix):
+        tmp_path = cache_path + ".tmp.npy"
+        np.save(tmp_path, matrix)
+        os.replace(tmp_path, cache_path)
+
+    def reference_matrices(self, df):
+        """
+        D y C en float64 para medir la deriva del modo compacto (cfg.compact).
+        Con caché se abren con mmap, así que no duplican la memoria.
+        """
+        if self.config.matrix_backend == "haversine":
+            D = HaversineMatrix(df["lat"], df["lon"], self.config.haversine_road_factor,
+                                self.config.matrix_row_cache)
+            return D, ScaledMatrix(D, self.config.fuel_cost_per_km)
+        return (self._load_matrix(self.config.distance_matrix_file, mmap=True),
+                self._load_matrix(self.config.fuel_matrix_file, mmap=True))
+
+    @staticmethod
+    def _open_cached(cache_path, mmap=True):
+        if not mmap:
+            return np.load(cache_path)  # 'dense': copia completa en memoria
+        # Vista ndarray simple sobre el mmap (sin copia): indexar np.memmap
+        # escalar por escalar es ~4x más lento en el ciclo de SA
+        return np.load(cache_path, mmap_mode="r").view(np.ndarray)
@@ -0,0 +1,180 @@
+# mdvrp/descent.py
+"""
+Descenso local determinista (post-optimizador):
+- 2-opt completo + Or-opt (segmentos de 1..or_opt_max_len tiendas)
+- Primera mejora, con bits "don't look" por tienda y evaluación delta
+- Mismo criterio que SA: combustible primero, desempate por distancia
+Garantiza que la ruta entregada sea un óptimo local para ambos vecindarios
+(restringidos a los k vecinos si se pasa un NeighborIndex).
+Con ventanas de tiempo solo se aplican movimientos factibles (revisión O(1)
+por tramos); si la ruta ya es infactible, los que no aumentan su retraso.
+"""
+
+from collections import deque
+from typing import List
+
+import numpy as np
+
+from .local_search import LocalSearchOperators
+from .matrices import cost_tolerance
+from .time_windows import EPS as TW_EPS, move_pieces, or_opt_pieces
+
+EPS = 1e-12  # relativo al costo de la ruta (ver improve y matrices.cost_tolerance)
+
+
+class LocalDescent:
+    def __init__(self, distance_matrix, fuel_matrix, config, neighbors=None, symmetric=True, cache=None,
+                 time_windows=None):
+        self.D = distance_matrix
+        self.C = fuel_matrix
+        self.cfg = config
+        self.neighbors = neighbors  # NeighborIndex opcional: limita los candidatos
+        self.symmetric = symmetric
+        self.cache = cache  # RouteCostCache compartido (opcional)
+        self.time_windows = time_windows  # TimeWindows (opcional)
+        self._tol_dist = self._tol_fuel = EPS
+        # Ventanas de tiempo: límite de distancia o RouteSchedule de la ruta actual
+        self._limit = self._sched = None
+        self._dist = self._late = self._new_late = 0.0
+
+    def _better(self, d_dist, d_fuel):
+        if d_fuel < -self._tol_fuel:
+            return True
+        return (self.cfg.accept_tie_on_distance and abs(d_fuel) < self._tol_fuel
+                and d_dist < -self._tol_dist)
+
+    def _time_feasible(self, d_dist, make_pieces, *move):
+        """¿Respeta las ventanas de tiempo el movimiento? make_pieces(schedule, *move) da sus tramos."""
+        tw = self.time_windows
+        if tw is None:
+            return True
+        if self._sched is None:
+            self._new_late = max(0.0, (self._dist + d_dist - self._limit) / tw.speed)
+            return self._new_late <= self._late + TW_EPS
+        pieces = make_pieces(self._sched, *move)
+        if self._late > 0:
+            self._new_late = tw.lateness(tw.join(pieces), self.D)
+            return self._new_late <= self._late + TW_EPS
+        self._new_late = 0.0
+        return tw.feasible(pieces, self.D)
+
+    @staticmethod
+    def _or_opt_delta(route, i, j, k, M):
+        """Mover el segmento route[i..j] entre route[k] y route[k+1] (k fuera de [i-1, j])."""
+        a, b = route[i - 1], route[j + 1]
+        s0, s1 = route[i], route[j]
+        u, v = route[k], route[k + 1]
+        return (M[a, b] - M[a, s0] - M[s1, b]) + (M[u, s0] + M[s1, v] - M[u, v])
+
+    @staticmethod
+    def _apply_or_opt(route, i, j, k):
+        seg = route[i:j + 1]
+        del route[i:j + 1]
+        at = k + 1 if k < i else k + 1 - len(seg)
+        route[at:at] = seg
+
+    def _candidate_positions(self, route, pos, x, n_inner):
+        if self.neighbors is None:
+            return range(1, n_inner + 1)
+        return [pos[int(y)] for y in self.neighbors.of(x) if int(y) in pos]
+
+    def _try_node(self, route, pos, p):
+        """Busca la primera mejora que involucra la posición p. Regresa las posiciones tocadas o None."""
+        n_inner = len(route) - 2
+        x = route[p]
+        cands = self._candidate_positions(route, pos, x, n_inner)
+
+        # 2-opt: segmentos que empiezan o terminan en p
+        for q in cands:
+            if q == p:
+                continue
+            move = ("2opt", min(p, q), max(p, q))
+            d_fuel = LocalSearchOperators.move_delta(route, move, self.C, self.symmetric)
+            if d_fuel > self._tol_fuel:
+                continue
+            d_dist = LocalSearchOperators.move_delta(route, move, self.D, self.symmetric)
+            if self._better(d_dist, d_fuel) and self._time_feasible(d_dist, move_pieces, move):
+                LocalSearchOperators.apply_move(route, move)
+                return "2opt", move[1] - 1, move[2] + 1, d_dist, d_fuel
+
+        # Or-opt: segmentos route[p..p+L-1]
+        for length in range(1, self.cfg.or_opt_max_len + 1):
+            j = p + length - 1
+            if j > n_inner or length >= n_inner:
+                break
+            if self.neighbors is None:
+                slots = range(0, n_inner + 1)
+            else:
+                slots = {s for q in cands for s in (q - 1, q)}
+            for k in slots:
+                if p - 1 <= k <= j:
+                    continue
+                d_fuel = self._or_opt_delta(route, p, j, k, self.C)
+                if d_fuel > self._tol_fuel:
+                    continue
+                d_dist = self._or_opt_delta(route, p, j, k, self.D)
+                if self._better(d_dist, d_fuel) and self._time_feasible(d_dist, or_opt_pieces, p, j, k):
+                    self._apply_or_opt(route, p, j, k)
+                    lo, hi = min(p - 1, k), max(j + 1, k + 1)
+                    return "oropt", lo, hi, d_dist, d_fuel
+        return None
+
+    def improve(self, route: List[int]):
+        """
+        Aplica el descenso hasta óptimo local.
+        Regresa (ruta, dist, fuel, stats) con stats = {'moves_2opt', 'moves_oropt'}.
+        """
+        route = list(route)
+        stats = {"moves_2opt": 0, "moves_oropt": 0}
+        # Tolerancia proporcional al costo (y al dtype): con valores grandes el redondeo
+        # de un delta supera 1e-12 y un movimiento y su inverso "mejorarían" ambos
+        dist0 = sum(self.D[route[i], route[i + 1]] for i in range(len(route) - 1))
+        fuel0 = sum(self.C[route[i], route[i + 1]] for i in range(len(route) - 1))
+        self._tol_dist = cost_tolerance(self.D, dist0)
+        self._tol_fuel = cost_tolerance(self.C, fuel0)
+        n_inner = len(route) - 2
+        tw = self.time_windows
+        if tw is not None:
+            self._limit = tw.distance_limit(route)
+            self._sched = tw.schedule(route, self.D) if self._limit is None else None
+            self._dist = float(dist0)
+            self._late = tw.lateness(route, self.D)
+        if n_inner >= 2:
+            pos = {route[i]: i for i in range(1, n_inner + 1)}
+            queue = deque(route[1:-1])
+            queued = set(queue)
+            moved_since_sweep = False
+            while queue:
+                x = queue.popleft()
+                queued.discard(x)
+                found = self._try_node(route, pos, pos[x])
+                if found is None:
+                    # bit "don't look" encendido; al vaciarse la cola, un barrido
+                    # completo confirma el óptimo local (los bits son heurísticos)
+                    if not queue and moved_since_sweep:
+                        moved_since_sweep = False
+                        queue.extend(route[1:-1])
+                        queued.update(queue)
+                    continue
+                moved_since_sweep = True
+                kind, lo, hi, d_dist, _ = found
+                if tw is not None:
+                    if self._sched is not None:
+                        self._sched = tw.schedule(route, self.D)
+                    self._dist += d_dist
+                    self._late = self._new_late
+                stats["moves_2opt" if kind == "2opt" else "moves_oropt"] += 1
+                # Reindexar y reactivar las tiendas en el tramo afectado
+                for i in range(max(1, lo), min(n_inner, hi) + 1):
+                    pos[route[i]] = i
+                    if route[i] not in queued:
+                        queue.append(route[i])
+                        queued.add(route[i])
+
+        if self.cache is not None:
+            dist, fuel = self.cache.cost(route)
+        else:
+            # Acumular en float64 aunque las matrices sean float32 (cfg.compact)
+            dist = sum((self.D[route[i], route[i + 1]] for i in range(len(route) - 1)), np.float64(0.0))
+            fuel = sum((self.C[route[i], route[i + 1]] for i in range(len(route) - 1)), np.float64(0.0))
+        return route, float(dist), float(fuel), stats
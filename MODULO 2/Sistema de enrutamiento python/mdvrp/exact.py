@@ -0,0 +1,114 @@
+# mdvrp/exact.py
+"""
+Solución exacta de rutas chicas (orden óptimo de las mismas tiendas):
+- Programación dinámica de Held–Karp sobre subconjuntos (bitmask), capa por
+  capa de tamaño. Cada capa es una matriz (subconjunto x última tienda) con
+  el mejor combustible del camino que sale del CD y visita ese subconjunto;
+  la siguiente capa se calcula en lote tomando, para cada (subconjunto,
+  última), el mejor predecesor de la capa anterior.
+- Orden lexicográfico (combustible, distancia), el mismo criterio del SA con
+  accept_tie_on_distance; al sumar arcos el orden se conserva, así que el DP
+  da el óptimo.
+- Poda tipo branch-and-bound: un estado se descarta si su combustible más una
+  cota inferior de lo que falta (como route_lower_bound: la última tienda y
+  cada pendiente salen por su arco más barato) supera el de la ruta recibida;
+  solo se expanden los subconjuntos con algún estado vivo.
+- Con state_limit, si una capa rebasa ese número de subconjuntos se abandona
+  (None) y la ruta se queda con el SA.
+"""
+
+import numpy as np
+
+MAX_STORES = 24  # índice denso de subconjuntos: 2^24 enteros (64 MB)
+
+
+class ExactRouteSolver:
+    def __init__(self, distance_matrix, fuel_matrix):
+        self.D = distance_matrix
+        self.C = fuel_matrix
+        self.last_states = 0  # subconjuntos evaluados en la última llamada (todas las capas)
+
+    def solve(self, route, state_limit=None):
+        """
+        Ruta óptima con los mismos nodos y extremos que `route` ([inicio,
+        tiendas..., fin]); su combustible sirve de cota para podar. Regresa
+        None si alguna capa rebasa state_limit.
+        """
+        self.last_states = 0
+        n = len(route) - 2
+        if n < 2:
+            return list(route)
+        if n > MAX_STORES:
+            raise ValueError(f"⚠️ Ruta demasiado grande para la solución exacta: {n} tiendas (máx. {MAX_STORES})")
+        nodes = np.asarray(route, dtype=np.intp)
+        local = np.concatenate((nodes[1:-1], nodes[[0, -1]]))  # tiendas 0..n-1, inicio n, fin n+1
+        Cm = np.asarray(self.C[np.ix_(local, local)], dtype=float)
+        Dm = np.asarray(self.D[np.ix_(local, local)], dtype=float)
+        start, end = n, n + 1
+        # Arcos por (destino, origen) para sumar a la capa anterior indexada por su última tienda
+        into_f, into_d = Cm[:n, :n].T, Dm[:n, :n].T
+        bit = np.int64(1) << np.arange(n, dtype=np.int64)
+
+        # Cota: cada tienda pendiente sale por su arco más barato (a otra tienda o al fin)
+        out = Cm[:n, list(range(n)) + [end]].copy()
+        out[np.arange(n), np.arange(n)] = np.inf
+        out_min = out.min(axis=1)
+        # Combustible de `route` (en índices locales es inicio, 0, 1, ..., n-1, fin)
+        incumbent = float(Cm[start, 0] + Cm[np.arange(n - 1), np.arange(1, n)].sum() + Cm[n - 1, end])
+        limit = incumbent + 1e-9 * max(1.0, abs(incumbent))  # holgura de redondeo: la ruta recibida sobrevive
+
+        pos = np.full(1 << n, -1, dtype=np.int32)  # subconjunto -> renglón en su capa
+        masks = bit.copy()
+        fuel = np.full((n, n), np.inf)
+        dist = np.full((n, n), np.inf)
+        fuel[np.arange(n), np.arange(n)] = Cm[start, :n]
+        dist[np.arange(n), np.arange(n)] = Dm[start, :n]
+        layers = [np.full((n, n), -1)]  # por capa: tienda previa de cada (subconjunto, última)
+
+        for size in range(1, n):
+            pending = (masks[:, None] & bit[None, :]) == 0
+            # Poda: combustible + salida de la última a una pendiente + salida de cada pendiente
+            step = np.where(pending[:, None, :], Cm[None, :n, :n], np.inf).min(axis=2)
+            fuel[fuel + step + (pending @ out_min)[:, None] > limit] = np.inf
+            alive = np.isfinite(fuel).any(axis=1)
+            if not alive.all():
+                masks, fuel, dist, pending = masks[alive], fuel[alive], dist[alive], pending[alive]
+                layers[-1] = layers[-1][alive]
+            if not len(masks):
+                return None  # solo por redondeo
+            pos[masks] = np.arange(len(masks))
+            self.last_states += len(masks)
+
+            # Subconjuntos de la siguiente capa alcanzables desde los vivos
+            nxt = np.unique((masks[:, None] | bit[None, :])[pending])
+            if state_limit is not None and len(nxt) > state_limit:
+                return None
+            rows = pos[nxt[:, None] ^ bit[None, :]]  # (subconjunto, última) -> renglón previo
+            valid = ((nxt[:, None] & bit[None, :]) != 0) & (rows >= 0)
+            rows = np.where(valid, rows, 0)
+            cand_f = fuel[rows] + into_f[None, :, :]  # (subconjunto, última, previa)
+            cand_f[~valid] = np.inf
+            best_f = cand_f.min(axis=2)
+            cand_d = np.where(cand_f <= best_f[:, :, None], dist[rows] + into_d[None, :, :], np.inf)
+            prev = cand_d.argmin(axis=2)
+            masks, fuel = nxt, best_f
+            dist = np.take_along_axis(cand_d, prev[:, :, None], axis=2)[:, :, 0]
+            dist[~np.isfinite(fuel)] = np.inf
+            layers.append(prev)
+
+        # Capa completa: cerrar hacia el fin (orden lexicográfico) y reconstruir
+        self.last_states += len(masks)
+        total_f = fuel[0] + Cm[:n, end]
+        total_d = dist[0] + Dm[:n, end]
+        last = int(np.lexsort((total_d, total_f))[0])
+        if not np.isfinite(total_f[last]):
+            return None
+        mask, order = masks[0], []
+        pos[masks] = np.arange(len(masks))
+        for prev in reversed(layers):
+            order.append(last)
+            before = int(prev[pos[mask], last])
+            mask ^= bit[last]
+            last = before
+        order.reverse()
+        return [route[0]] + nodes[1:-1][order].tolist() + [route[-1]]
@@ -0,0 +1,154 @@
+# mdvrp/fleet.py
+"""
+Flota heterogénea y multi-viaje (cfg.fleet):
+- Tipos de vehículo con capacidad, factor de combustible por km (sobre C) y
+  unidades por CD: un entero para todos los CDs o {nombre del CD: unidades};
+  sin "count" el tipo no tiene límite de unidades.
+- Los clusters de cada CD se hacen con la mayor capacidad disponible ahí y se
+  empacan en viajes con sus cargas precalculadas (assign_types): de mayor a
+  menor carga, cada ruta va al tipo más barato por km donde cabe y que aún
+  tiene viajes libres (unidades x max_trips_per_vehicle).
+- Ya optimizadas las rutas, los viajes de cada (CD, tipo) se empacan en
+  vehículos (pack_trips): first-fit decreasing por horas de ruta, con tope de
+  viajes por vehículo y de jornada (max_shift_hours, más la recarga entre viajes).
+- El combustible de un tipo es fuel_factor x C. Todas las rutas se optimizan
+  sobre la misma C y después se escala su costo (ninguna matriz por tipo): el
+  orden entre dos secuencias de la misma ruta no cambia al escalar, así que la
+  elección entre candidatas es la misma, pero el recorrido del SA sí (su
+  temperatura tiene pisos absolutos); es un SA sobre C, no sobre factor x C.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+EPS = 1e-9  # holgura de capacidad y de horas
+_SPEC_KEYS = {"name", "capacity", "fuel_factor", "count"}
+
+
+@dataclass(frozen=True)
+class VehicleType:
+    name: str
+    capacity: float
+    fuel_factor: float = 1.0  # combustible por km relativo a la matriz C
+
+
+class Fleet:
+    def __init__(self, types, units, max_trips=1, reload_hours=0.0, max_shift_hours=None):
+        self.types = list(types)
+        self.units = units  # depot_idx -> unidades por tipo (np.inf = sin límite)
+        self.capacity = np.array([t.capacity for t in self.types], dtype=float)
+        self.fuel_factor = np.array([t.fuel_factor for t in self.types], dtype=float)
+        # Preferencia al empacar: menor combustible por km, luego menor capacidad (mejor ajuste)
+        self.preference = np.lexsort((self.capacity, self.fuel_factor))
+        self.max_trips = max_trips
+        self.reload_hours = reload_hours
+        self.max_shift_hours = max_shift_hours
+
+    @classmethod
+    def from_config(cls, cfg, df_depots):
+        """Fleet desde cfg.fleet (lista de dicts), o None si no hay flota definida."""
+        if not cfg.fleet:
+            return None
+        depot_names = df_depots["Nombre"].astype(str).tolist()
+        depots = df_depots["idx"].astype(int).tolist()
+        types, counts = [], []
+        for spec in cfg.fleet:
+            unknown = sorted(set(spec) - _SPEC_KEYS)
+            if unknown:
+                raise ValueError(f"⚠️ Campos desconocidos en cfg.fleet: {', '.join(unknown)} "
+                                 f"(usar {', '.join(sorted(_SPEC_KEYS))})")
+            if "capacity" not in spec:
+                raise ValueError(f"⚠️ Tipo de vehículo sin capacidad en cfg.fleet: {spec!r}")
+            vt = VehicleType(str(spec.get("name", f"Tipo{len(types) + 1}")),
+                             float(spec["capacity"]), float(spec.get("fuel_factor", 1.0)))
+            if vt.capacity <= 0 or vt.fuel_factor <= 0:
+                raise ValueError(f"⚠️ capacity y fuel_factor deben ser positivos: {vt.name}")
+            if any(vt.name == t.name for t in types):
+                raise ValueError(f"⚠️ Tipo de vehículo repetido en cfg.fleet: {vt.name}")
+            types.append(vt)
+            counts.append(cls._depot_counts(spec.get("count"), depot_names, vt.name))
+
+        if cfg.max_trips_per_vehicle < 1:
+            raise ValueError(f"⚠️ max_trips_per_vehicle debe ser al menos 1: {cfg.max_trips_per_vehicle}")
+        if cfg.reload_minutes < 0:
+            raise ValueError(f"⚠️ reload_minutes no puede ser negativo: {cfg.reload_minutes}")
+        units = {d: np.array([c[k] for c in counts], dtype=float) for k, d in enumerate(depots)}
+        return cls(types, units, int(cfg.max_trips_per_vehicle), cfg.reload_minutes / 60.0, cfg.max_shift_hours)
+
+    @staticmethod
+    def _depot_counts(count, depot_names, type_name):
+        """Unidades del tipo en cada CD (en el orden de depot_names)."""
+        if count is None:
+            return [np.inf] * len(depot_names)
+        if isinstance(count, dict):
+            unknown = sorted(set(map(str, count)) - set(depot_names))
+            if unknown:
+                raise ValueError(f"⚠️ CDs desconocidos en la flota de {type_name}: {', '.join(unknown)}")
+            by_name = {str(k): v for k, v in count.items()}
+            values = [by_name.get(name, 0) for name in depot_names]
+        else:
+            values = [count] * len(depot_names)
+        if any(v < 0 for v in values):
+            raise ValueError(f"⚠️ Unidades negativas en la flota de {type_name}")
+        return [float(v) for v in values]
+
+    def available(self, depot_idx, k):
+        """Unidades del tipo k en el CD (None = sin límite)."""
+        units = self.units[depot_idx][k]
+        return None if np.isinf(units) else int(units)
+
+    def depot_capacity(self, depot_idx):
+        """Mayor capacidad con unidades en el CD (la de toda la flota si el CD no tiene vehículos)."""
+        has_units = self.units[depot_idx] > 0
+        return float(self.capacity[has_units].max() if has_units.any() else self.capacity.max())
+
+    def assign_types(self, depot_idx, loads, max_trips):
+        """
+        Tipo de vehículo por ruta del CD a partir de sus cargas: best-fit
+        decreasing sobre los viajes libres de cada tipo. Regresa (tipos,
+        viajes sin vehículo libre); esos van al tipo preferido donde caben.
+        """
+        loads = np.asarray(loads, dtype=float)
+        slots = self.units[depot_idx] * max_trips
+        pref = self.preference
+        fits = self.capacity[pref][None, :] >= loads[:, None] - EPS  # ruta x tipo (en orden de preferencia)
+        kinds = np.empty(len(loads), dtype=int)
+        over = 0
+        for r in np.argsort(-loads, kind="stable"):
+            candidates = pref[fits[r]]
+            free = candidates[slots[candidates] > 0]
+            if len(free):
+                k = int(free[0])
+                slots[k] -= 1
+            else:
+                # Sin viajes libres donde cabe: faltante de flota (o ruta más grande que todo tipo)
+                k = int(candidates[0]) if len(candidates) else int(np.argmax(self.capacity))
+                over += 1
+            kinds[r] = k
+        return kinds, over
+
+    def pack_trips(self, hours, max_trips):
+        """
+        Viajes de un (CD, tipo) -> vehículos, first-fit decreasing por horas.
+        Regresa (vehículo, número de viaje) por ruta, ambos desde 0 y 1.
+        """
+        hours = np.asarray(hours, dtype=float)
+        limit = np.inf if self.max_shift_hours is None else self.max_shift_hours
+        vehicle = np.empty(len(hours), dtype=int)
+        trip = np.empty(len(hours), dtype=int)
+        used, count = np.zeros(len(hours)), np.zeros(len(hours), dtype=int)  # a lo más un vehículo por viaje
+        opened = 0
+        for r in np.argsort(-hours, kind="stable"):
+            fits = np.flatnonzero((count[:opened] < max_trips)
+                                  & (used[:opened] + self.reload_hours + hours[r] <= limit + EPS))
+            if len(fits):
+                v = int(fits[0])
+                used[v] += self.reload_hours + hours[r]
+            else:
+                v = opened
+                opened += 1
+                used[v] = hours[r]
+            count[v] += 1
+            vehicle[r], trip[r] = v, count[v]
+        return vehicle, trip
@@ -18,27 +18,44 @@ class GeometryCalculator:
         return math.atan2(delta_y, delta_x)
 
     @staticmethod
-    def route_fuel_cost(fuel_matrix: np.ndarray, route: List[int]) -> float:
+    def calculate_angles_from_depot(df: pd.DataFrame, depot_idx: int, node_idx) -> np.ndarray:
+        """
+        Versión vectorizada de calculate_angle_from_depot para varios nodos.
+        Regresa un arreglo de ángulos polares (radianes, en [-pi, pi]).
+        """
+        node_idx = np.asarray(node_idx, dtype=int)
+        lat = df["lat"].to_numpy(dtype=float)
+        lon = df["lon"].to_numpy(dtype=float)
+        return np.arctan2(lat[node_idx] - lat[depot_idx], lon[node_idx] - lon[depot_idx])
+
+    @staticmethod
+    def route_fuel_cost(fuel_matrix: np.ndarray, route: List[int], cache=None) -> float:
         """
         Calcula el costo total de combustible de una ruta.
         Args:
             fuel_matrix: Matriz de costos de combustible
             route: Lista de índices (incluye depósito al inicio y final)
+            cache: RouteCostCache opcional (construido sobre la misma matriz)
         Returns:
             Costo total de combustible
         """
+        if cache is not None:
+            return cache.fuel(route)
         return sum(fuel_matrix[route[i], route[i + 1]] for i in range(len(route) - 1))
 
     @staticmethod
-    def route_distance(distance_matrix: np.ndarray, route: List[int]) -> float:
+    def route_distance(distance_matrix: np.ndarray, route: List[int], cache=None) -> float:
         """
         Calcula la distancia total recorrida por una ruta.
         Args:
             distance_matrix: Matriz de distancias
             route: Secuencia de nodos (incluye depósito)
+            cache: RouteCostCache opcional (construido sobre la misma matriz)
         Returns:
             Distancia total en kilómetros
         """
+        if cache is not None:
+            return cache.distance(route)
         return sum(distance_matrix[route[i], route[i + 1]] for i in range(len(route) - 1))
 
     @staticmethod
@@ -0,0 +1,94 @@
+# mdvrp/instances.py
+"""
+Generador de instancias MDVRP sintéticas (reproducibles por semilla).
+Produce las mismas estructuras que DataLoader.load_data:
+(df, df_depots, df_stores, D, C, has_predesigned)
+- Coordenadas alrededor de Culiacán, demandas tipo Capacidad_Venta
+- Distancias euclidianas (km) o "perturbadas" (factor de rodeo simétrico >= 1)
+- Combustible = distancia * costo por km (con variación por arista si se perturba)
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+
+class InstanceGenerator:
+    CENTER_LAT = 24.80
+    CENTER_LON = -107.39
+    KM_PER_DEG = 111.32
+
+    @staticmethod
+    def generate(n_nodes, n_depots=None, seed=0, metric="euclidean",
+                 spread_km=12.0, fuel_per_km=0.15, demand_range=(5000, 20000)):
+        if metric not in ("euclidean", "perturbed"):
+            raise ValueError(f"⚠️ metric inválida: {metric!r} (opciones: euclidean, perturbed)")
+        rng = np.random.default_rng(seed)
+        if n_depots is None:
+            n_depots = max(2, n_nodes // 10 if n_nodes <= 100 else int(np.sqrt(n_nodes)))
+        n_depots = min(n_depots, n_nodes - 1)
+
+        # Coordenadas (km) -> grados
+        xy = rng.normal(0.0, spread_km / 2.0, size=(n_nodes, 2))
+        lat = InstanceGenerator.CENTER_LAT + xy[:, 1] / InstanceGenerator.KM_PER_DEG
+        lon = InstanceGenerator.CENTER_LON + xy[:, 0] / (
+            InstanceGenerator.KM_PER_DEG * np.cos(np.radians(InstanceGenerator.CENTER_LAT)))
+
+        is_depot = np.zeros(n_nodes, dtype=bool)
+        is_depot[:n_depots] = True
+        demand = np.where(is_depot, 0, rng.integers(demand_range[0], demand_range[1], n_nodes))
+
+        names = [f"Centro de Distribución {i + 1}" for i in range(n_depots)] + \
+                [f"Tienda {i + 1}" for i in range(n_nodes - n_depots)]
+        df = pd.DataFrame({
+            "Tipo": np.where(is_depot, "centro de distribución", "tienda"),
+            "Nombre": names,
+            "Latitud_WGS84": np.round(lat * 1e6).astype(np.int64),
+            "Longitud_WGS84": np.round(lon * 1e6).astype(np.int64),
+            "Capacidad_Venta": demand,
+        })
+        df["idx"] = np.arange(n_nodes)
+        df["lat"] = df["Latitud_WGS84"] / 1e6
+        df["lon"] = df["Longitud_WGS84"] / 1e6
+        df["demanda"] = demand.astype(float)
+
+        D = InstanceGenerator._distances(xy, rng, metric)
+        if metric == "perturbed":
+            slope = rng.uniform(0.9, 1.25, size=(n_nodes, n_nodes))
+            C = D * fuel_per_km * np.sqrt(slope * slope.T)
+        else:
+            C = D * fuel_per_km
+        np.fill_diagonal(C, 0.0)
+
+        return df, df[is_depot].copy(), df[~is_depot].copy(), D, C, False
+
+    @staticmethod
+    def _distances(xy, rng, metric, chunk_rows=2048):
+        n = len(xy)
+        D = np.empty((n, n))
+        for start in range(0, n, chunk_rows):
+            stop = min(n, start + chunk_rows)
+            D[start:stop] = np.linalg.norm(xy[start:stop, None, :] - xy[None, :, :], axis=2)
+        if metric == "perturbed":
+            detour = rng.lognormal(mean=0.25, sigma=0.15, size=(n, n))
+            D *= np.maximum(1.0, np.sqrt(detour * detour.T))
+        np.fill_diagonal(D, 0.0)
+        return D
+
+    @staticmethod
+    def write_excel(instance, directory):
+        """
+        Escribe la instancia con el formato de entrada de main.py
+        (distribucion.xlsx + matrices con encabezado Nodo_1..Nodo_N).
+        Regresa (data_file, distance_matrix_file, fuel_matrix_file).
+        """
+        df, _, _, D, C, _ = instance
+        os.makedirs(directory, exist_ok=True)
+        paths = (os.path.join(directory, "distribucion.xlsx"),
+                 os.path.join(directory, "matriz_distancias.xlsx"),
+                 os.path.join(directory, "matriz_costos_combustible.xlsx"))
+        df[["Tipo", "Nombre", "Latitud_WGS84", "Longitud_WGS84", "Capacidad_Venta"]].to_excel(paths[0], index=False)
+        header = [f"Nodo_{i + 1}" for i in range(len(df))]
+        pd.DataFrame(D, columns=header).to_excel(paths[1], index=False)
+        pd.DataFrame(C, columns=header).to_excel(paths[2], index=False)
+        return paths
@@ -0,0 +1,97 @@
+# mdvrp/instrumentation.py
+"""
+Instrumentación ligera del solver:
+- StageClock: tiempo de pared y de CPU por etapa ([1/6]..[6/6] y sub-etapas)
+- Exportación a JSON / CSV de etapas, estadísticas por ruta (tiempo,
+  iteraciones/s, aceptación por operador) y trazas de mejor combustible
+Las estadísticas por ruta las produce SimulatedAnnealingOptimizer.optimize
+(last_stats); los contadores y trazas solo se llenan con cfg.track_iterations.
+Nota: el CPU de etapa es del proceso principal; con workers > 1 el CPU de SA
+está en las estadísticas por ruta (medido dentro de cada worker).
+"""
+
+import csv
+import json
+import os
+import time
+
+
+class StageClock:
+    """Acumula tiempos por etapa en OptimizationResults.stage_times / stage_cpu_times."""
+
+    def __init__(self, results, verbose=True):
+        self.results = results
+        self.verbose = verbose
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def lap(self, stage):
+        wall, cpu = time.perf_counter(), time.process_time()
+        dw, dc = wall - self._wall, cpu - self._cpu
+        self.results.stage_times[stage] = self.results.stage_times.get(stage, 0.0) + dw
+        self.results.stage_cpu_times[stage] = self.results.stage_cpu_times.get(stage, 0.0) + dc
+        self._wall, self._cpu = wall, cpu
+        if self.verbose:
+            print(f"  ⏱ {stage}: {dw:.3f}s (CPU {dc:.3f}s)")
+
+
+class InstrumentationExporter:
+    ROUTE_COLUMNS = ["route_id", "depot_name", "num_stores", "wall_time", "cpu_time",
+                     "iterations", "iterations_per_sec", "starts", "cancelled_starts",
+                     "stopped_starts", "cache_hits", "cache_misses"]
+
+    @staticmethod
+    def to_dict(results):
+        return {
+            "stages": [
+                {"stage": k, "wall_time": v, "cpu_time": results.stage_cpu_times.get(k, 0.0)}
+                for k, v in results.stage_times.items()
+            ],
+            "routes": results.route_stats,
+            "route_cache": results.cache_stats,
+        }
+
+    @staticmethod
+    def export_json(results, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(InstrumentationExporter.to_dict(results), f, indent=2, ensure_ascii=False)
+        print(f"  ✓ Instrumentación exportada a {path}")
+
+    @staticmethod
+    def export_csv(results, directory):
+        """Escribe stages.csv, routes.csv (una fila por ruta) y traces.csv (formato largo)."""
+        os.makedirs(directory, exist_ok=True)
+        data = InstrumentationExporter.to_dict(results)
+
+        with open(os.path.join(directory, "stages.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["stage", "wall_time", "cpu_time"])
+            writer.writeheader()
+            writer.writerows(data["stages"])
+
+        op_columns = []
+        for stats in data["routes"]:
+            for name in stats.get("acceptance_ratio", {}):
+                for prefix in ("proposed", "accepted", "acceptance_ratio"):
+                    col = f"{prefix}_{name}"
+                    if col not in op_columns:
+                        op_columns.append(col)
+
+        with open(os.path.join(directory, "routes.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=InstrumentationExporter.ROUTE_COLUMNS + op_columns)
+            writer.writeheader()
+            for stats in data["routes"]:
+                row = {c: stats.get(c) for c in InstrumentationExporter.ROUTE_COLUMNS}
+                for prefix in ("proposed", "accepted", "acceptance_ratio"):
+                    for name, v in stats.get(prefix, {}).items():
+                        row[f"{prefix}_{name}"] = v
+                writer.writerow(row)
+
+        with open(os.path.join(directory, "traces.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["route_id", "start", "iteration", "best_fuel"])
+            for stats in data["routes"]:
+                interval = stats.get("trace_interval", 1)
+                for start, trace in enumerate(stats.get("traces", [])):
+                    for k, value in enumerate(trace):
+                        writer.writerow([stats["route_id"], start, k * interval, value])
+        print(f"  ✓ Instrumentación exportada a {directory}/ (stages.csv, routes.csv, traces.csv)")
@@ -0,0 +1,245 @@
+# mdvrp/inter_route.py
+"""
+Búsqueda local entre rutas (después del SA por ruta):
+- relocate, swap y CROSS-exchange de segmentos (hasta inter_route_max_segment
+  tiendas por lado) entre rutas del mismo CD
+- opcionalmente entre rutas de CDs distintos (reasignación de tiendas)
+Respeta la capacidad del vehículo y evalúa cada par de rutas con deltas
+vectorizados sobre las 4 aristas afectadas; cargas, prefijos de demanda y
+costos por ruta se mantienen en caché y solo se recalculan al aplicar.
+Con ventanas de tiempo se toma el mejor intercambio cuyas dos rutas nuevas
+sean factibles, revisando los candidatos en orden de mejora (O(1) cada uno
+con RouteSchedule).
+Con flota heterogénea cada ruta trae su capacidad y su factor de combustible
+(el delta de cada lado se pondera por el factor de su vehículo).
+"""
+
+import numpy as np
+from typing import List
+
+from .matrices import cost_tolerance, index_dtype
+from .time_windows import EPS as TW_EPS
+
+EPS = 1e-12  # holgura de capacidad; los deltas de costo usan cost_tolerance
+
+
+class RouteState:
+    """Ruta con arreglo compacto de nodos, prefijo de demanda, carga y costos en caché."""
+    __slots__ = ("nodes", "prefix", "load", "dist", "fuel", "version", "sched", "late")
+
+    def __init__(self):
+        self.nodes = None
+        self.prefix = None
+        self.load = self.dist = self.fuel = 0.0
+        self.version = 0
+        self.sched = None  # RouteSchedule (solo con ventanas de tiempo)
+        self.late = 0.0
+
+
+class InterRouteOptimizer:
+    def __init__(self, distance_matrix, fuel_matrix, demand, vehicle_capacity, config, time_windows=None):
+        self.D = distance_matrix
+        self.C = fuel_matrix
+        self.demand = np.asarray(demand, dtype=float)
+        self.capacity = float(vehicle_capacity)
+        self.cfg = config
+        self.time_windows = time_windows
+        self.capacities = self.factors = None  # por ruta (optimize)
+        self._index = index_dtype(distance_matrix.shape[0], config.compact)
+        self._tol = self._tol_dist = EPS
+
+    # --- cachés por ruta ---
+    def _refresh(self, k):
+        st = self.states[k]
+        r = np.asarray(self.routes[k], dtype=self._index)
+        st.nodes = r
+        st.prefix = np.concatenate([[0.0], np.cumsum(self.demand[r[1:-1]])])
+        st.load = float(st.prefix[-1])
+        st.dist = float(self.D[r[:-1], r[1:]].sum(dtype=float))
+        st.fuel = float(self.C[r[:-1], r[1:]].sum(dtype=float))
+        if self.factors is not None:
+            st.fuel *= self.factors[k]
+        if self.time_windows is not None:
+            st.sched = self.time_windows.schedule(r, self.D)
+            st.late = self.time_windows.lateness(st.sched.nodes, self.D)
+        st.version += 1
+
+    def _segments(self, k, length):
+        """
+        Todos los segmentos de `length` tiendas de la ruta k como arreglos
+        (inicio, previo, primero, último, siguiente, carga). length=0 describe
+        los puntos de inserción (entre previo y siguiente).
+        """
+        r = self.states[k].nodes
+        n = len(r) - 2
+        if length > n:
+            return None
+        if length == 0:
+            i = np.arange(1, n + 2)
+            return i, r[i - 1], None, None, r[i], np.zeros(len(i))
+        i = np.arange(1, n - length + 2)
+        prefix = self.states[k].prefix
+        load = prefix[i + length - 1] - prefix[i - 1]
+        return i, r[i - 1], r[i], r[i + length - 1], r[i + length], load
+
+    @staticmethod
+    def _delta(M, seg_a, la, seg_b, lb, weights=None):
+        """
+        Matriz (segmentos de A) x (segmentos de B) con el cambio de costo del
+        intercambio; `weights` = (factor de A, factor de B) pondera cada lado.
+        """
+        _, pa, fa, ta, na, _ = seg_a
+        _, pb, fb, tb, nb, _ = seg_b
+        old_a = M[pa, fa] + M[ta, na] if la else M[pa, na]
+        old_b = M[pb, fb] + M[tb, nb] if lb else M[pb, nb]
+        if lb:
+            new_a = M[pa[:, None], fb[None, :]] + M[tb[None, :], na[:, None]]
+        else:
+            new_a = M[pa, na][:, None]
+        if la:
+            new_b = M[pb[None, :], fa[:, None]] + M[ta[:, None], nb[None, :]]
+        else:
+            new_b = M[pb, nb][None, :]
+        if weights is None:
+            return new_a + new_b - old_a[:, None] - old_b[None, :]
+        return weights[0] * (new_a - old_a[:, None]) + weights[1] * (new_b - old_b[None, :])
+
+    def _best_move(self, a, b):
+        """Mejor CROSS-exchange factible entre las rutas a y b (o None si no mejora)."""
+        max_seg = self.cfg.inter_route_max_segment
+        cap_a, cap_b = self.capacities[a], self.capacities[b]
+        weights = None if self.factors is None else (self.factors[a], self.factors[b])
+        best = None  # (d_fuel, d_dist, i, la, j, lb)
+        for la in range(0, max_seg + 1):
+            seg_a = self._segments(a, la)
+            if seg_a is None:
+                break
+            for lb in range(0, max_seg + 1):
+                if la == 0 and lb == 0:
+                    continue
+                seg_b = self._segments(b, lb)
+                if seg_b is None:
+                    break
+                # Capacidad con las cargas en caché
+                load_a, load_b = seg_a[5][:, None], seg_b[5][None, :]
+                feasible = ((self.states[a].load - load_a + load_b <= cap_a + EPS)
+                            & (self.states[b].load - load_b + load_a <= cap_b + EPS))
+                if not feasible.any():
+                    continue
+                d_fuel = self._delta(self.C, seg_a, la, seg_b, lb, weights)
+                d_fuel = np.where(feasible, d_fuel, np.inf)
+                tol = self._tol
+                if self.time_windows is not None:
+                    found = self._best_timed(a, b, seg_a, la, seg_b, lb, d_fuel)
+                    if found is None:
+                        continue
+                    f, d, ia, jb = found
+                else:
+                    ia, jb = np.unravel_index(np.argmin(d_fuel), d_fuel.shape)
+                    f = float(d_fuel[ia, jb])
+                    if f < -tol:
+                        d = float(self._delta(self.D, seg_a, la, seg_b, lb)[ia, jb])
+                    elif self.cfg.accept_tie_on_distance and f < tol:
+                        # Empate en combustible: mejor distancia entre los empatados
+                        d_dist = self._delta(self.D, seg_a, la, seg_b, lb)
+                        d_dist = np.where(np.abs(d_fuel) < tol, d_dist, np.inf)
+                        ia, jb = np.unravel_index(np.argmin(d_dist), d_dist.shape)
+                        f, d = float(d_fuel[ia, jb]), float(d_dist[ia, jb])
+                        if d >= -self._tol_dist:
+                            continue
+                    else:
+                        continue
+                if best is None or f < best[0] - tol or (abs(f - best[0]) < tol and d < best[1]):
+                    best = (f, d, int(seg_a[0][ia]), la, int(seg_b[0][jb]), lb)
+        return best
+
+    def _exchange_pieces(self, k, i, lk, other, j, lo):
+        """Tramos de la ruta k tras cambiar su segmento [i, i+lk) por [j, j+lo) de `other`."""
+        own, theirs = self.states[k].sched, self.states[other].sched
+        pieces = [(own, 0, i - 1)]
+        if lo:
+            pieces.append((theirs, j, j + lo - 1))
+        pieces.append((own, i + lk, len(own.nodes) - 1))
+        return pieces
+
+    def _time_ok(self, k, pieces):
+        """Factible en O(1); una ruta ya infactible solo no debe aumentar su retraso."""
+        tw = self.time_windows
+        late = self.states[k].late
+        if late > 0:
+            return tw.lateness(tw.join(pieces), self.D) <= late + TW_EPS
+        return tw.feasible(pieces, self.D)
+
+    def _best_timed(self, a, b, seg_a, la, seg_b, lb, d_fuel):
+        """Mejor intercambio que mejora y respeta las ventanas de tiempo: (d_fuel, d_dist, ia, jb) o None."""
+        d_dist = self._delta(self.D, seg_a, la, seg_b, lb)
+        improving = d_fuel < -self._tol
+        if self.cfg.accept_tie_on_distance:
+            improving |= (np.abs(d_fuel) < self._tol) & (d_dist < -self._tol_dist)
+        cand = np.flatnonzero(improving)
+        # Combustible primero, distancia como desempate
+        for flat in cand[np.lexsort((d_dist.ravel()[cand], d_fuel.ravel()[cand]))]:
+            ia, jb = np.unravel_index(flat, d_fuel.shape)
+            i, j = int(seg_a[0][ia]), int(seg_b[0][jb])
+            if (self._time_ok(a, self._exchange_pieces(a, i, la, b, j, lb))
+                    and self._time_ok(b, self._exchange_pieces(b, j, lb, a, i, la))):
+                return float(d_fuel[ia, jb]), float(d_dist[ia, jb]), ia, jb
+        return None
+
+    def _apply(self, a, b, i, la, j, lb):
+        ra, rb = self.routes[a], self.routes[b]
+        seg_a, seg_b = ra[i:i + la], rb[j:j + lb]
+        ra[i:i + la] = seg_b
+        rb[j:j + lb] = seg_a
+        self._refresh(a)
+        self._refresh(b)
+
+    def optimize(self, routes: List[List[int]], capacities=None, fuel_factors=None):
+        """
+        routes: rutas completas [CD, tiendas..., CD]. Regresa (rutas, stats);
+        una ruta puede quedar vacía ([CD, CD]) si todas sus tiendas se movieron.
+        capacities / fuel_factors: por ruta (flota heterogénea); por defecto la
+        capacidad del constructor y C sin escalar.
+        """
+        self.routes = [list(r) for r in routes]
+        n_routes = len(self.routes)
+        self.capacities = (np.full(n_routes, self.capacity) if capacities is None
+                           else np.asarray(capacities, dtype=float))
+        self.factors = None if fuel_factors is None else np.asarray(fuel_factors, dtype=float)
+        self.states = [RouteState() for _ in range(n_routes)]
+        for k in range(n_routes):
+            self._refresh(k)
+        self._tol = cost_tolerance(self.C, max((st.fuel for st in self.states), default=1.0))
+        self._tol_dist = cost_tolerance(self.D, max((st.dist for st in self.states), default=1.0))
+
+        start_fuel = sum(st.fuel for st in self.states)
+        start_dist = sum(st.dist for st in self.states)
+        cross_depot = self.cfg.inter_route_cross_depot
+        pairs = [(a, b) for a in range(n_routes) for b in range(a + 1, n_routes)
+                 if cross_depot or self.routes[a][0] == self.routes[b][0]]
+
+        checked = {}  # par -> versiones evaluadas (no re-evaluar pares sin cambios)
+        moves = 0
+        for _ in range(self.cfg.inter_route_max_passes):
+            improved = False
+            for a, b in pairs:
+                stamp = (self.states[a].version, self.states[b].version)
+                if checked.get((a, b)) == stamp:
+                    continue
+                move = self._best_move(a, b)
+                if move is None:
+                    checked[(a, b)] = stamp
+                    continue
+                _, _, i, la, j, lb = move
+                self._apply(a, b, i, la, j, lb)
+                moves += 1
+                improved = True
+            if not improved:
+                break
+
+        stats = {
+            "moves": moves,
+            "fuel_gain": start_fuel - sum(st.fuel for st in self.states),
+            "dist_gain": start_dist - sum(st.dist for st in self.states),
+        }
+        return self.routes, stats
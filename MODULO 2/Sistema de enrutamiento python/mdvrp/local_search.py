@@ -40,3 +40,104 @@ class LocalSearchOperators:
             LocalSearchOperators.relocate_one
         ]
         return random.choice(operators)
+
+    # ------------------------------------------------------------------
+    # Movimientos con evaluación delta (no copian la ruta)
+    # Las posiciones son índices sobre la ruta completa (con depósitos),
+    # es decir, posición interna i -> posición i + 1.
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def move_delta(route: List[int], move, M, symmetric: bool = True) -> float:
+        """
+        Cambio exacto en el costo (según la matriz M) si se aplicara `move`
+        sobre `route`. Solo revisa las aristas afectadas.
+        """
+        kind, p, q = move
+        if kind == "2opt":
+            a, b = route[p - 1], route[p]
+            c, d = route[q], route[q + 1]
+            delta = M[a, c] + M[b, d] - M[a, b] - M[c, d]
+            if not symmetric:
+                # el tramo invertido cambia de sentido
+                for k in range(p, q):
+                    delta += M[route[k + 1], route[k]] - M[route[k], route[k + 1]]
+            return delta
+
+        if kind == "swap":
+            if p > q:
+                p, q = q, p
+            x, y = route[p], route[q]
+            a, d = route[p - 1], route[q + 1]
+            if q == p + 1:
+                return (M[a, y] + M[y, x] + M[x, d]) - (M[a, x] + M[x, y] + M[y, d])
+            b, c = route[p + 1], route[q - 1]
+            return ((M[a, y] + M[y, b] + M[c, x] + M[x, d])
+                    - (M[a, x] + M[x, b] + M[c, y] + M[y, d]))
+
+        # relocate: extrae el nodo en p y lo inserta en la posición q de la ruta resultante
+        x = route[p]
+        prev, nxt = route[p - 1], route[p + 1]
+        delta = M[prev, nxt] - M[prev, x] - M[x, nxt]
+        left = route[q - 1] if q - 1 < p else route[q]
+        right = route[q] if q < p else route[q + 1]
+        return delta + M[left, x] + M[x, right] - M[left, right]
+
+    @staticmethod
+    def _random_positions(route: List[int]):
+        n_inner = len(route) - 2
+        if n_inner < 2:
+            return None
+        i, j = np.random.choice(n_inner, 2, replace=False)
+        return int(i) + 1, int(j) + 1
+
+    @staticmethod
+    def _propose(kind, route, D, C, symmetric):
+        pos = LocalSearchOperators._random_positions(route)
+        if pos is None:
+            return None, 0.0, 0.0
+        p, q = pos
+        if kind == "2opt" and p > q:
+            p, q = q, p
+        move = (kind, p, q)
+        return (move,
+                LocalSearchOperators.move_delta(route, move, D, symmetric),
+                LocalSearchOperators.move_delta(route, move, C, symmetric))
+
+    @staticmethod
+    def two_opt_move(route: List[int], D, C, symmetric: bool = True):
+        """Propone un 2-opt. Regresa (movimiento, delta_distancia, delta_combustible)."""
+        return LocalSearchOperators._propose("2opt", route, D, C, symmetric)
+
+    @staticmethod
+    def swap_two_move(route: List[int], D, C, symmetric: bool = True):
+        """Propone un intercambio de dos tiendas. Regresa (movimiento, delta_distancia, delta_combustible)."""
+        return LocalSearchOperators._propose("swap", route, D, C, symmetric)
+
+    @staticmethod
+    def relocate_one_move(route: List[int], D, C, symmetric: bool = True):
+        """Propone reubicar una tienda. Regresa (movimiento, delta_distancia, delta_combustible)."""
+        return LocalSearchOperators._propose("relocate", route, D, C, symmetric)
+
+    @staticmethod
+    def apply_move(route: List[int], move) -> None:
+        """Aplica el movimiento sobre la ruta (in-place)."""
+        if move is None:
+            return
+        kind, p, q = move
+        if kind == "2opt":
+            route[p:q + 1] = route[p:q + 1][::-1]
+        elif kind == "swap":
+            route[p], route[q] = route[q], route[p]
+        else:
+            node = route.pop(p)
+            route.insert(q, node)
+
+    @staticmethod
+    def get_random_move_operator():
+        operators = [
+            LocalSearchOperators.two_opt_move,
+            LocalSearchOperators.swap_two_move,
+            LocalSearchOperators.relocate_one_move
+        ]
+        return random.choice(operators)
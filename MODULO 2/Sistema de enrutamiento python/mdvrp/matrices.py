@@ -0,0 +1,153 @@
+# mdvrp/matrices.py
+"""
+Backends para las matrices D (distancias) y C (combustible):
+- 'dense':     ndarray en memoria
+- 'memmap':    .npy de la caché de DataLoader mapeado en memoria
+- 'haversine': calculada bajo demanda desde lat/lon (sin archivos N x N),
+               con caché LRU de filas; C = factor x D sin materializarla
+Los tres responden a la misma interfaz que usa el solver: M[a, b],
+M[filas, columnas] con enteros, listas, arreglos o np.ix_, M.shape, M.dtype
+y matrix_is_symmetric(M). Con cfg.compact los valores son float32.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+MATRIX_BACKENDS = ("dense", "memmap", "haversine")
+EARTH_RADIUS_KM = 6371.0088
+
+
+def cost_tolerance(M, scale=1.0):
+    """
+    Umbral para decidir si un delta de costo mejora: 1e-12 relativo al costo con
+    float64; con float32 el redondeo de un delta de 4 arcos es mucho mayor y un
+    movimiento y su inverso podrían "mejorar" ambos.
+    """
+    eps = max(1e-12, 8 * float(np.finfo(getattr(M, "dtype", float)).eps))
+    return eps * max(1.0, abs(float(scale)))
+
+
+def index_dtype(n_nodes, compact=False):
+    """Tipo entero más chico para índices de nodo (int16 solo en modo compacto)."""
+    if compact and n_nodes <= np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+def matrix_is_symmetric(M):
+    """Usa el atributo `symmetric` de los backends bajo demanda (evita materializar N x N)."""
+    symmetric = getattr(M, "symmetric", None)
+    if symmetric is not None:
+        return bool(symmetric)
+    # Igualdad exacta: con symmetric=True los deltas 2-opt ignoran el sentido de los
+    # arcos invertidos, y una asimetría dentro de la tolerancia de allclose los sesgaría
+    return bool(np.array_equal(M, M.T))
+
+
+class HaversineMatrix:
+    """Distancia de gran círculo (km) x road_factor, calculada al vuelo."""
+
+    symmetric = True
+    ndim = 2
+
+    def __init__(self, lat, lon, road_factor: float = 1.3, row_cache: int = 256, dtype=np.float64):
+        self.lat = np.radians(np.asarray(lat, dtype=float))
+        self.lon = np.radians(np.asarray(lon, dtype=float))
+        self.cos_lat = np.cos(self.lat)
+        self.road_factor = float(road_factor)
+        self.dtype = np.dtype(dtype)
+        self.shape = (len(self.lat), len(self.lat))
+        self.row_cache = max(1, int(row_cache))
+        self._rows = OrderedDict()
+        self.row_hits = 0
+        self.row_misses = 0
+
+    def __getstate__(self):
+        # Al mandarla a otro proceso no viaja la caché de filas
+        state = self.__dict__.copy()
+        state["_rows"] = OrderedDict()
+        return state
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def T(self):
+        return self
+
+    def _compute(self, a, b):
+        """Haversine con broadcasting entre los índices a y b (0 exacto si a == b)."""
+        dlat = self.lat[b] - self.lat[a]
+        dlon = self.lon[b] - self.lon[a]
+        h = np.sin(dlat * 0.5) ** 2 + self.cos_lat[a] * self.cos_lat[b] * np.sin(dlon * 0.5) ** 2
+        dist = (2.0 * EARTH_RADIUS_KM * self.road_factor) * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+        return dist.astype(self.dtype, copy=False)
+
+    def row(self, a: int) -> np.ndarray:
+        row = self._rows.get(a)
+        if row is not None:
+            self.row_hits += 1
+            self._rows.move_to_end(a)
+            return row
+        self.row_misses += 1
+        row = self._compute(a, np.arange(self.shape[1]))
+        row.flags.writeable = False
+        self._rows[a] = row
+        if len(self._rows) > self.row_cache:
+            self._rows.popitem(last=False)
+        return row
+
+    def _as_index(self, key, size):
+        if isinstance(key, slice):
+            return np.arange(size)[key]
+        return np.asarray(key, dtype=np.intp)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        a, b = key
+        if isinstance(a, (int, np.integer)):
+            return self.row(int(a))[b]
+        outer = isinstance(a, slice) or isinstance(b, slice)
+        a = self._as_index(a, self.shape[0])
+        b = self._as_index(b, self.shape[1])
+        if outer and a.ndim == 1 and b.ndim == 1:
+            a = a[:, None]  # semántica de numpy: rebanada x arreglo = producto cruz
+        return self._compute(a, b)
+
+    def __array__(self, dtype=None, copy=None):
+        full = self[:, :]
+        return full if dtype is None else full.astype(dtype)
+
+    def cache_stats(self):
+        return {"row_hits": self.row_hits, "row_misses": self.row_misses,
+                "rows": len(self._rows), "row_cache": self.row_cache}
+
+
+class ScaledMatrix:
+    """Vista factor x base sin copiar (p. ej. combustible = costo_por_km x distancia)."""
+
+    ndim = 2
+
+    def __init__(self, base, factor: float):
+        self.base = base
+        self.factor = float(factor)
+        self.shape = base.shape
+        self.dtype = np.dtype(base.dtype)
+        self.symmetric = matrix_is_symmetric(base)
+        self._scale = self.dtype.type(self.factor)  # mismo tipo que la base (no promueve float32)
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def T(self):
+        return self if self.symmetric else ScaledMatrix(self.base.T, self.factor)
+
+    def __getitem__(self, key):
+        return self.base[key] * self._scale
+
+    def __array__(self, dtype=None, copy=None):
+        full = np.asarray(self.base) * self._scale
+        return full if dtype is None else full.astype(dtype)
@@ -0,0 +1,114 @@
+# mdvrp/neighbors.py
+"""
+Listas de vecinos (k más cercanos) para búsqueda local guiada.
+- NeighborIndex se construye una vez por conjunto de datos (sobre la matriz
+  de combustible o de distancias) y se comparte entre rutas y depósitos.
+- NeighborMoves propone 2-opt / swap / relocate que acercan una tienda a uno
+  de sus vecinos dentro de la misma ruta, en lugar de posiciones al azar.
+"""
+
+import random
+import numpy as np
+from typing import List, Optional
+
+from .local_search import LocalSearchOperators
+
+
+class NeighborIndex:
+    """Para cada nodo, sus k candidatos más cercanos (ordenados por costo)."""
+
+    def __init__(self, matrix, k: int, candidates: Optional[List[int]] = None, chunk_rows: int = 1024):
+        n = matrix.shape[0]
+        cand = np.arange(n) if candidates is None else np.asarray(sorted(candidates), dtype=np.int64)
+        k = int(min(k, max(1, len(cand) - 1)))
+        self.k = k
+        self.neighbors = np.empty((n, k), dtype=np.int32)
+
+        # Por bloques de filas para no duplicar una matriz N x N completa
+        for start in range(0, n, chunk_rows):
+            rows = np.arange(start, min(n, start + chunk_rows))
+            block = np.array(matrix[np.ix_(rows, cand)], dtype=float)
+            block[cand[None, :] == rows[:, None]] = np.inf  # excluir el propio nodo
+            part = np.argpartition(block, k - 1, axis=1)[:, :k]
+            order = np.take_along_axis(block, part, axis=1).argsort(axis=1, kind="stable")
+            self.neighbors[rows] = cand[np.take_along_axis(part, order, axis=1)]
+
+    def of(self, node: int) -> np.ndarray:
+        return self.neighbors[node]
+
+
+class NeighborMoves:
+    """
+    Operadores guiados por vecinos para una ruta concreta.
+    Mantiene la posición de cada tienda; llamar update() tras aplicar un movimiento.
+    """
+
+    def __init__(self, index: NeighborIndex, route: List[int]):
+        members = set(route[1:-1])
+        self.candidates = {x: [int(y) for y in index.of(x) if int(y) in members] for x in members}
+        self.pos = {}
+        self._reindex(route, 1, len(route) - 2)
+
+    def _reindex(self, route, lo, hi):
+        for i in range(lo, hi + 1):
+            self.pos[route[i]] = i
+
+    def update(self, route, move):
+        if move is None:
+            return
+        _, p, q = move
+        self._reindex(route, min(p, q), max(p, q))
+
+    def _pick(self, route):
+        """Posición p al azar y un vecino y de route[p] en la misma ruta (o None)."""
+        n_inner = len(route) - 2
+        if n_inner < 2:
+            return None
+        p = random.randint(1, n_inner)
+        cands = self.candidates[route[p]]
+        if not cands:
+            return None
+        return p, self.pos[random.choice(cands)]
+
+    @staticmethod
+    def _score(route, move, D, C, symmetric):
+        return (move,
+                LocalSearchOperators.move_delta(route, move, D, symmetric),
+                LocalSearchOperators.move_delta(route, move, C, symmetric))
+
+    def two_opt_move(self, route, D, C, symmetric=True):
+        """2-opt que crea la arista (x, vecino)."""
+        picked = self._pick(route)
+        if picked is None:
+            return LocalSearchOperators.two_opt_move(route, D, C, symmetric)
+        p, q = picked
+        lo, hi = (p + 1, q) if p < q else (q + 1, p)
+        if lo >= hi:
+            return None, 0.0, 0.0
+        return self._score(route, ("2opt", lo, hi), D, C, symmetric)
+
+    def swap_two_move(self, route, D, C, symmetric=True):
+        """Intercambia x con el sucesor (o predecesor) de su vecino."""
+        picked = self._pick(route)
+        if picked is None:
+            return LocalSearchOperators.swap_two_move(route, D, C, symmetric)
+        p, q = picked
+        n_inner = len(route) - 2
+        r = q + 1 if q + 1 <= n_inner and q + 1 != p else q - 1
+        if r < 1 or r == p:
+            return None, 0.0, 0.0
+        return self._score(route, ("swap", p, r), D, C, symmetric)
+
+    def relocate_one_move(self, route, D, C, symmetric=True):
+        """Mueve x justo después de su vecino."""
+        picked = self._pick(route)
+        if picked is None:
+            return LocalSearchOperators.relocate_one_move(route, D, C, symmetric)
+        p, q = picked
+        target = q if p < q else q + 1
+        if target == p:
+            return None, 0.0, 0.0
+        return self._score(route, ("relocate", p, target), D, C, symmetric)
+
+    def get_random_operator(self):
+        return random.choice([self.two_opt_move, self.swap_two_move, self.relocate_one_move])
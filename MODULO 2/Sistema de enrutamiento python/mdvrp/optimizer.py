@@ -1,25 +1,131 @@
 # mdvrp/optimizer.py
 """
 Recocido Simulado para optimizar rutas, con multistart y desempate por distancia.
+Los arranques pueden correr en secuencia (referencia), intercalados por tramos
+('lockstep') o en un pool de procesos ('process'); en los dos últimos modos se
+cancelan en cada checkpoint los arranques claramente dominados.
+Con cfg.time_budget_s / cfg.stagnation_* cada arranque se corta al vencer su
+plazo o al estancarse su mejor solución (iteraciones adaptativas).
+Con ventanas de tiempo (time_windows.py) cada movimiento se revisa en O(1)
+antes de aceptarse; una ruta que arranca infactible primero reduce su retraso.
+Las rutas chicas se resuelven exactas (exact.py) sin pasar por el SA.
 """
 
 import math
 import random
+import time
 import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from .exact import MAX_STORES as EXACT_MAX_STORES, ExactRouteSolver
 from .local_search import LocalSearchOperators
+from .neighbors import NeighborMoves
+from .route_cache import RouteCostCache
+from .time_windows import EPS as TW_EPS, SCHEDULE_MIN_STORES, move_pieces
+from .matrices import index_dtype, matrix_is_symmetric
+
+MULTISTART_MODES = ("sequential", "lockstep", "process")
+SA_ENGINES = ("python", "numba", "population")
+
+# Orden de operadores para contadores de instrumentación (igual que sa_kernel)
+OP_NAMES = ("2opt", "swap", "relocate")
+OP_INDEX = {name: k for k, name in enumerate(OP_NAMES)}
+
+
+def _sa_kernel():
+    """sa_kernel importa numba (~0.25 s): solo se carga con sa_engine='numba'."""
+    from . import sa_kernel
+    return sa_kernel
+
+
+@dataclass
+class ChainState:
+    """Estado de un arranque (cadena) de SA; se puede pausar y reanudar."""
+    route: List[int]
+    dist: float
+    fuel: float
+    T: float
+    best_route: List[int]
+    best_dist: float
+    best_fuel: float
+    remaining: int
+    # Horas de retraso (ventanas de tiempo); se minimizan antes que el combustible
+    late: float = 0.0
+    best_late: float = 0.0
+    rng_state: Optional[Any] = None
+    cancelled: bool = False
+    # Corte adaptativo: plazo (time.monotonic) y estancamiento del mejor;
+    # pause_at solo termina el tramo actual (multistart concurrente)
+    deadline: Optional[float] = None
+    pause_at: Optional[float] = None
+    since_improve: int = 0
+    last_improve: float = 0.0
+    stopped: bool = False
+    # Instrumentación (solo se llena con cfg.track_iterations)
+    done: int = 0
+    proposed: List[int] = field(default_factory=lambda: [0, 0, 0])
+    accepted: List[int] = field(default_factory=lambda: [0, 0, 0])
+    trace: List[float] = field(default_factory=list)  # mejor fuel cada cfg.tracking_interval
 
 
 class SimulatedAnnealingOptimizer:
-    def __init__(self, distance_matrix, fuel_matrix, config):
+    def __init__(self, distance_matrix, fuel_matrix, config, neighbors=None, time_windows=None):
         self.D = distance_matrix
         self.C = fuel_matrix
         self.cfg = config
+        self.neighbors = neighbors  # NeighborIndex compartido (movimientos guiados) o None
+        self.time_windows = time_windows  # TimeWindows (restricciones de horario) o None
+        if config.multistart_mode not in MULTISTART_MODES:
+            raise ValueError(f"⚠️ multistart_mode inválido: {config.multistart_mode!r} "
+                             f"(opciones: {', '.join(MULTISTART_MODES)})")
+        if config.sa_engine not in SA_ENGINES:
+            raise ValueError(f"⚠️ sa_engine inválido: {config.sa_engine!r} "
+                             f"(opciones: {', '.join(SA_ENGINES)})")
+        # El núcleo compilado necesita arreglos; con matrices bajo demanda se usa el motor Python
+        self.engine = config.sa_engine
+        if self.engine == "numba" and not (isinstance(distance_matrix, np.ndarray)
+                                           and isinstance(fuel_matrix, np.ndarray)):
+            print("  ⚠️ sa_engine='numba' requiere matrices densas: se usa el motor 'python'")
+            self.engine = "python"
+        if self.engine != "python" and time_windows is not None:
+            print(f"  ⚠️ Las ventanas de tiempo solo aplican al motor 'python': se usa en lugar de {self.engine!r}")
+            self.engine = "python"
+        if self.engine == "numba" and not _sa_kernel().HAS_NUMBA:
+            print("  ⚠️ numba no está instalado: el motor compilado corre sin compilar")
+        if self.engine != "python" and neighbors is not None:
+            print("  ⚠️ Los movimientos guiados por vecinos solo aplican al motor 'python'")
+        # Con matrices simétricas el delta de 2-opt solo depende de 4 aristas
+        self.symmetric = matrix_is_symmetric(self.D) and matrix_is_symmetric(self.C)
+        self._pool = None
+        self._shared = None
+        self.cache = (RouteCostCache(distance_matrix, fuel_matrix, config.route_cache_size)
+                      if config.route_cache_size > 0 else None)
+        self.exact = ExactRouteSolver(distance_matrix, fuel_matrix)
+        self.last_stats = {}
         random.seed(config.seed)
         np.random.seed(config.seed)
 
+    def reseed(self, seed):
+        random.seed(seed)
+        np.random.seed(seed)
+
+    @staticmethod
+    def route_seed(base_seed, route_number):
+        """Semilla determinista por ruta (independiente del orden de ejecución)."""
+        return int(np.random.SeedSequence([base_seed, route_number]).generate_state(1)[0])
+
+    def close(self):
+        """Libera el pool de procesos del multistart (si se creó)."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._shared.close()
+            self._pool = self._shared = None
+
     def route_cost(self, route):
-        dist = 0.0
-        fuel = 0.0
+        if self.cache is not None:
+            return self.cache.cost(route)
+        dist = fuel = np.float64(0.0)  # float64 aunque las matrices sean float32
         for i in range(len(route) - 1):
             a, b = route[i], route[i + 1]
             dist += self.D[a, b]
@@ -33,12 +139,364 @@ class SimulatedAnnealingOptimizer:
             return False
         return (random.random() < math.exp(-delta / T))
 
-    def optimize(self, initial_route):
+    def _new_chain(self, seed_route, iterations):
+        route = seed_route[:]
+        dist, fuel = self.route_cost(route)
+        # Temperatura inicial relativa al costo
+        T = max(1.0, self.cfg.initial_temp * max(1.0, fuel))
+        late = self.time_windows.lateness(route, self.D) if self.time_windows is not None else 0.0
+        return ChainState(route=route, dist=dist, fuel=fuel, T=T,
+                          best_route=route[:], best_dist=dist, best_fuel=fuel,
+                          remaining=iterations, late=late, best_late=late,
+                          last_improve=time.monotonic())
+
+    def _clock_check(self, chain, now):
+        """
+        'stop' si venció el plazo o el mejor lleva cfg.stagnation_seconds sin mejorar,
+        'pause' si solo terminó el tiempo del tramo; None para seguir.
+        """
+        if chain.deadline is not None and now >= chain.deadline:
+            return "stop"
+        stag_s = self.cfg.stagnation_seconds
+        if stag_s is not None and now - chain.last_improve >= stag_s:
+            return "stop"
+        if chain.pause_at is not None and now >= chain.pause_at:
+            return "pause"
+        return None
+
+    def _finish(self, chain, executed, halt):
+        chain.done += executed
+        if halt == "stop":
+            chain.stopped = True
+            chain.remaining = 0
+        else:
+            chain.remaining -= executed
+
+    def route_lower_bound(self, route):
+        """
+        Cota inferior barata del combustible de la ruta (mismos nodos): cada nodo
+        sale por su arco más barato hacia otro nodo de la ruta; con matrices
+        simétricas, media de sus dos arcos más baratos.
+        """
+        nodes = np.unique(np.asarray(route))
+        if len(nodes) < 2:
+            return 0.0
+        sub = np.asarray(self.C[np.ix_(nodes, nodes)], dtype=float).copy()
+        np.fill_diagonal(sub, np.inf)
+        if self.symmetric and len(nodes) > 2:
+            two = np.partition(sub, 1, axis=1)[:, :2]
+            return float(0.5 * two.sum())
+        return float(sub.min(axis=1).sum())
+
+    def improvement_potential(self, route):
+        """Peso para repartir el presupuesto: tiendas x brecha relativa contra la cota inferior."""
+        n_inner = len(route) - 2
+        if n_inner < 2:
+            return 0.0
+        _, fuel = self.route_cost(route)
+        if fuel <= 0:
+            return 0.0
+        gap = max(0.0, fuel - self.route_lower_bound(route)) / fuel
+        return n_inner * gap
+
+    def _solve_exact(self, route):
+        """
+        (ruta óptima, método) para rutas chicas, o None si va por SA: hasta
+        cfg.exact_max_stores tiendas el DP completo; hasta cfg.exact_bnb_max_stores
+        con poda y tope de subconjuntos (si lo rebasa, SA). El DP completo
+        también puede regresar None (poda por redondeo): entonces va por SA.
+        """
+        n_inner = len(route) - 2
+        if self.time_windows is not None or n_inner < 1:
+            return None
+        if n_inner <= min(self.cfg.exact_max_stores, EXACT_MAX_STORES):
+            exact = self.exact.solve(route)
+            if exact is not None:
+                return exact, "held_karp"
+        elif n_inner <= min(self.cfg.exact_bnb_max_stores, EXACT_MAX_STORES):
+            exact = self.exact.solve(route, state_limit=self.cfg.exact_max_states)
+            if exact is not None:
+                return exact, "branch_and_bound"
+        return None
+
+    def _anneal(self, chain, n_iters):
+        """Avanza la cadena n_iters iteraciones con el RNG global."""
+        if self.engine == "numba":
+            return self._anneal_compiled(chain, n_iters)
+        route, dist, fuel, T = chain.route, chain.dist, chain.fuel, chain.T
+        best_route, best_dist, best_fuel = chain.best_route, chain.best_dist, chain.best_fuel
+        late, best_late = chain.late, chain.best_late
+        tw = self.time_windows
+        # Sin tiendas con ventana basta el límite de distancia; en rutas largas, tabla
+        # por tramos (revisión O(1), reconstrucción al aceptar); en las cortas el
+        # SA acepta tanto que sale más barato evaluar la ruta candidata completa
+        limit = tw.distance_limit(route) if tw is not None else None
+        sched = None
+        if tw is not None and limit is None and len(route) - 2 >= SCHEDULE_MIN_STORES:
+            sched = tw.schedule(route, self.D)
+        guided = NeighborMoves(self.neighbors, route) if self.neighbors is not None else None
+        track = self.cfg.track_iterations
+        interval = max(1, self.cfg.tracking_interval)
+        proposed, accepted, trace, done = chain.proposed, chain.accepted, chain.trace, chain.done
+        stag_it = self.cfg.stagnation_iterations or 0
+        timed = (chain.deadline is not None or chain.pause_at is not None
+                 or self.cfg.stagnation_seconds is not None)
+        adaptive = bool(stag_it) or timed
+        since = chain.since_improve
+        executed, halt = n_iters, None
+
+        for it in range(n_iters):
+            # Proponer vecino (solo posiciones + delta exacto sobre las aristas afectadas)
+            if guided is not None and random.random() < self.cfg.neighbor_move_prob:
+                op = guided.get_random_operator()
+            else:
+                op = LocalSearchOperators.get_random_move_operator()
+            move, d_dist, d_fuel = op(route, self.D, self.C, self.symmetric)
+
+            # fuel-first delta (con desempate por distancia si aplica)
+            if self.cfg.accept_tie_on_distance and abs(d_fuel) < 1e-12:
+                delta = d_dist
+            else:
+                delta = d_fuel
+
+            accept = self._accept(delta, T)
+            if tw is not None and move is not None and (accept or late > 0):
+                if sched is not None and late == 0:
+                    # Ruta factible: solo movimientos factibles (revisión O(1) por tramos)
+                    accept = tw.feasible(move_pieces(sched, move), self.D)
+                    new_late = 0.0
+                else:
+                    if limit is not None:
+                        new_late = max(0.0, (dist + d_dist - limit) / tw.speed)
+                    else:
+                        candidate = route[:]
+                        LocalSearchOperators.apply_move(candidate, move)
+                        new_late = tw.lateness(candidate, self.D)
+                    if late == 0:
+                        accept = new_late <= TW_EPS
+                    elif abs(new_late - late) > TW_EPS:
+                        # Ruta infactible: manda el retraso; si no cambia, decide Metropolis
+                        accept = new_late < late
+            if track and move is not None:
+                proposed[OP_INDEX[move[0]]] += 1
+                accepted[OP_INDEX[move[0]]] += accept
+
+            if accept:
+                LocalSearchOperators.apply_move(route, move)
+                if guided is not None:
+                    guided.update(route, move)
+                dist += d_dist
+                fuel += d_fuel
+                if tw is not None and move is not None:
+                    if sched is not None:
+                        sched = tw.schedule(route, self.D)
+                    late = new_late
+                # Actualizar best local por retraso, fuel y distancia
+                better = False
+                if late < best_late - TW_EPS:
+                    better = True
+                elif late > best_late + TW_EPS:
+                    better = False
+                elif fuel < best_fuel - 1e-12:
+                    better = True
+                elif abs(fuel - best_fuel) < 1e-12 and dist < best_dist - 1e-12:
+                    better = True
+                if better:
+                    best_route, best_dist, best_fuel, best_late = route[:], dist, fuel, late
+                    if adaptive:
+                        since = -1
+                        if timed:
+                            chain.last_improve = time.monotonic()
+
+            # enfriamiento
+            T *= self.cfg.cooling_rate
+            if T < self.cfg.min_temp:
+                T = max(1.0, self.cfg.initial_temp * max(1.0, best_fuel))
+
+            if track and (done + it) % interval == 0:
+                trace.append(best_fuel)
+
+            if adaptive:
+                since += 1
+                if stag_it and since >= stag_it:
+                    halt = "stop"
+                elif timed and (it & 127) == 0:
+                    halt = self._clock_check(chain, time.monotonic())
+                if halt is not None:
+                    executed = it + 1
+                    break
+
+        chain.route, chain.dist, chain.fuel, chain.T = route, dist, fuel, T
+        chain.best_route, chain.best_dist, chain.best_fuel = best_route, best_dist, best_fuel
+        chain.late, chain.best_late = late, best_late
+        chain.since_improve = since
+        self._finish(chain, executed, halt)
+
+    def _anneal_compiled(self, chain, n_iters):
+        """Igual que _anneal, pero el ciclo corre en sa_kernel sobre arreglos int32 (int16 compacto)."""
+        kernel = _sa_kernel()
+        index = index_dtype(self.D.shape[0], self.cfg.compact)
+        route = np.asarray(chain.route, dtype=index)
+        best_route = np.asarray(chain.best_route, dtype=index)
+        state = np.array([chain.dist, chain.fuel, chain.T, chain.best_dist, chain.best_fuel,
+                          chain.since_improve], dtype=float)
+        n_inner = len(route) - 2
+        interval = max(1, self.cfg.tracking_interval) if self.cfg.track_iterations else 0
+        counts = np.zeros((2, 3), dtype=np.int64)
+        stag_it = self.cfg.stagnation_iterations or 0
+        timed = (chain.deadline is not None or chain.pause_at is not None
+                 or self.cfg.stagnation_seconds is not None)
+        # Con plazo se revisa el reloj entre lotes: lotes más cortos para no pasarse
+        batch = min(self.cfg.sa_batch_size, 4096) if timed else self.cfg.sa_batch_size
+
+        done, halt = 0, None
+        while done < n_iters:
+            size = min(batch, n_iters - done)
+            ops, pos_i, pos_j, rand_u = kernel.draw_batch(n_inner, size)
+            trace = np.empty(size // interval + 1 if interval else 0)
+            best_before = state[kernel.S_BEST_FUEL]
+            written, executed = kernel.anneal_batch(route, best_route, state, self.D, self.C,
+                                                       ops, pos_i, pos_j, rand_u,
+                                                       self.cfg.cooling_rate, self.cfg.min_temp,
+                                                       self.cfg.initial_temp,
+                                                       self.cfg.accept_tie_on_distance, self.symmetric,
+                                                       counts, trace, chain.done + done, interval, stag_it)
+            chain.trace.extend(trace[:written].tolist())
+            done += executed
+            if executed < size:
+                halt = "stop"
+                break
+            if timed:
+                now = time.monotonic()
+                if state[kernel.S_BEST_FUEL] < best_before:
+                    chain.last_improve = now
+                halt = self._clock_check(chain, now)
+                if halt is not None:
+                    break
+
+        if interval:
+            for k in range(3):
+                chain.proposed[k] += int(counts[0, k])
+                chain.accepted[k] += int(counts[1, k])
+        chain.route, chain.best_route = route.tolist(), best_route.tolist()
+        chain.dist, chain.fuel, chain.T, chain.best_dist, chain.best_fuel = (float(v) for v in state[:5])
+        chain.since_improve = int(state[kernel.S_SINCE])
+        self._finish(chain, done, halt)
+
+    def _anneal_population(self, starts, iterations, deadline=None):
+        """Todos los arranques como una población de cfg.population_size cadenas (population.py)."""
+        from .population import PopulationAnnealer
+        # remaining/done cuentan movimientos evaluados (pasos x cadenas)
+        chain = self._new_chain(starts[0], iterations * max(1, self.cfg.population_size))
+        chain.deadline = deadline
+        annealer = PopulationAnnealer(self.D, self.C, self.cfg, self.symmetric)
+        executed, halt = annealer.run(chain, starts, iterations, self.route_cost, self._clock_check)
+        self._finish(chain, executed, halt)
+        return chain
+
+    def _run_segment(self, chain, n_iters):
+        """Avanza la cadena con su propio flujo aleatorio (reanudable en cualquier proceso)."""
+        py_state, np_state = chain.rng_state
+        random.setstate(py_state)
+        np.random.set_state(np_state)
+        self._anneal(chain, min(n_iters, chain.remaining))
+        chain.rng_state = (random.getstate(), np.random.get_state())
+        return chain
+
+    def _cancel_dominated(self, chains):
+        """
+        Cancela arranques cuyo mejor combustible supera al líder por más de
+        cfg.multistart_cancel_gap; con ventanas de tiempo también los que tienen
+        más retraso que el líder (el líder es el de menor retraso).
+        """
+        gap = self.cfg.multistart_cancel_gap
+        if gap is None:
+            return
+        live = [ch for ch in chains if not ch.cancelled and ch.remaining > 0]
+        if len(live) < 2:
+            return
+        least_late = min(ch.best_late for ch in chains)
+        leader = min(ch.best_fuel for ch in chains if ch.best_late <= least_late + TW_EPS)
+        for ch in live:
+            if ch.best_late > least_late + TW_EPS or ch.best_fuel > leader * (1.0 + gap) + 1e-12:
+                ch.cancelled = True
+
+    def _get_pool(self):
+        if self._pool is None:
+            from .parallel import make_worker_pool
+            self._pool, self._shared = make_worker_pool(self.D, self.C, self.cfg,
+                                                        self.cfg.multistart_workers, self.neighbors,
+                                                        self.time_windows)
+        return self._pool
+
+    def _run_concurrent(self, chains, deadline=None):
+        """
+        Arranques intercalados por tramos, con checkpoints para cancelar dominados.
+        Con `deadline` (time.monotonic) el tiempo restante se reparte en cada ronda
+        entre los tramos pendientes.
+        """
+        outer_state = (random.getstate(), np.random.get_state())
+        base = random.getrandbits(32)
+        for k, ch in enumerate(chains):
+            self.reseed(self.route_seed(base, k))
+            ch.rng_state = (random.getstate(), np.random.get_state())
+
+        use_pool = self.cfg.multistart_mode == "process" and self.cfg.multistart_workers > 1
+        parallel = self.cfg.multistart_workers if use_pool else 1
+        checkpoints = max(1, self.cfg.multistart_checkpoints)
+        segment = max(1, math.ceil(max(ch.remaining for ch in chains) / checkpoints))
+
+        while True:
+            live = [k for k, ch in enumerate(chains) if not ch.cancelled and ch.remaining > 0]
+            if not live:
+                break
+            if deadline is not None:
+                now = time.monotonic()
+                rounds = math.ceil(max(chains[k].remaining for k in live) / segment)
+                slots = math.ceil(len(live) / parallel)
+                share = max(0.0, deadline - now) / (rounds * slots)
+                for pos, k in enumerate(live):
+                    chains[k].deadline = deadline
+                    chains[k].pause_at = now + share * (pos // parallel + 1)
+            if use_pool:
+                from .parallel import advance_chain_task
+                tasks = [(chains[k], segment) for k in live]
+                for k, ch in zip(live, self._get_pool().map(advance_chain_task, tasks)):
+                    chains[k] = ch
+            else:
+                for k in live:
+                    self._run_segment(chains[k], segment)
+            self._cancel_dominated(chains)
+
+        random.setstate(outer_state[0])
+        np.random.set_state(outer_state[1])
+        return chains
+
+    def optimize(self, initial_route, time_budget=None):
         """
         SA fuel-first: minimiza combustible, empata con distancia si cfg.accept_tie_on_distance.
         Aplica multistart con pequeñas perturbaciones de la solución inicial.
+        Con time_budget (segundos) las iteraciones pasan a ser un tope
+        (x cfg.budget_iteration_factor) y cada arranque corre hasta su parte del
+        presupuesto o hasta estancarse.
+        Deja en self.last_stats el tiempo de la llamada y, con cfg.track_iterations,
+        iteraciones/s, aceptación por operador y trazas de mejor combustible.
+        Las rutas chicas se resuelven exactas (_solve_exact) sin arranques de SA.
         """
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        hits0, misses0 = (self.cache.hits, self.cache.misses) if self.cache is not None else (0, 0)
+
+        exact = self._solve_exact(initial_route)
+        if exact is not None:
+            route, method = exact
+            dist, fuel = self.route_cost(route)
+            self.last_stats = self._chain_stats([], time.perf_counter() - wall0, time.process_time() - cpu0)
+            self.last_stats.update(exact=method, exact_states=self.exact.last_states)
+            self._cache_stats(hits0, misses0)
+            return route, dist, fuel
+
         best_overall = None  # (route, dist, fuel)
+        best_late = 0.0
 
         starts = [initial_route[:]]
         # Perturbaciones controladas
@@ -48,52 +506,71 @@ class SimulatedAnnealingOptimizer:
             pert = [initial_route[0]] + op(inner) + [initial_route[-1]]
             starts.append(pert)
 
-        for seed_route in starts:
-            route = seed_route[:]
-            dist, fuel = self.route_cost(route)
-            best_route, best_dist, best_fuel = route[:], dist, fuel
+        iterations = max(self.cfg.iterations_base, self.cfg.iterations_per_store * max(1, len(inner)))
+        deadline = None
+        if time_budget is not None:
+            iterations *= max(1, self.cfg.budget_iteration_factor)
+            deadline = time.monotonic() + max(0.0, time_budget)
 
-            # Temperatura inicial relativa al costo
-            T = max(1.0, self.cfg.initial_temp * max(1.0, fuel))
-            iterations = max(self.cfg.iterations_base, self.cfg.iterations_per_store * max(1, len(inner)))
+        if self.engine == "population":
+            # Una sola población con todos los arranques (reemplaza al multistart)
+            chains = [self._anneal_population(starts, iterations, deadline)]
+        elif self.cfg.multistart_mode == "sequential":
+            chains = []
+            for k, seed_route in enumerate(starts):
+                chain = self._new_chain(seed_route, iterations)
+                if deadline is not None:
+                    # Lo no usado por un arranque estancado pasa a los siguientes
+                    now = time.monotonic()
+                    chain.deadline = now + max(0.0, deadline - now) / (len(starts) - k)
+                self._anneal(chain, iterations)
+                chains.append(chain)
+        else:
+            chains = self._run_concurrent([self._new_chain(r, iterations) for r in starts], deadline)
 
-            for it in range(iterations):
-                # Generar vecino (mutar parte interna)
-                inner_now = route[1:-1]
-                op = LocalSearchOperators.get_random_operator()
-                new_inner = op(inner_now)
-                candidate = [route[0]] + new_inner + [route[-1]]
+        for chain in chains:
+            # Recalcular exacto (evita arrastre numérico de los deltas)
+            best_route = chain.best_route
+            best_dist, best_fuel = self.route_cost(best_route)
+            late = self.time_windows.lateness(best_route, self.D) if self.time_windows is not None else 0.0
 
-                new_dist, new_fuel = self.route_cost(candidate)
-
-                # fuel-first delta (con desempate por distancia si aplica)
-                if self.cfg.accept_tie_on_distance and abs(new_fuel - fuel) < 1e-12:
-                    delta = new_dist - dist
-                else:
-                    delta = new_fuel - fuel
-
-                if self._accept(delta, T):
-                    route, dist, fuel = candidate, new_dist, new_fuel
-                    # Actualizar best local por fuel y distancia
-                    better = False
-                    if fuel < best_fuel - 1e-12:
-                        better = True
-                    elif abs(fuel - best_fuel) < 1e-12 and dist < best_dist - 1e-12:
-                        better = True
-                    if better:
-                        best_route, best_dist, best_fuel = route[:], dist, fuel
-
-                # enfriamiento
-                T *= self.cfg.cooling_rate
-                if T < self.cfg.min_temp:
-                    T = max(1.0, self.cfg.initial_temp * max(1.0, best_fuel))
-
-            # Actualizar mejor global
+            # Actualizar mejor global (con ventanas de tiempo, primero el menor retraso)
             if best_overall is None:
-                best_overall = (best_route, best_dist, best_fuel)
-            else:
+                best_overall, best_late = (best_route, best_dist, best_fuel), late
+            elif late < best_late - TW_EPS:
+                best_overall, best_late = (best_route, best_dist, best_fuel), late
+            elif late <= best_late + TW_EPS:
                 _, bD, bF = best_overall
                 if best_fuel < bF - 1e-12 or (abs(best_fuel - bF) < 1e-12 and best_dist < bD - 1e-12):
-                    best_overall = (best_route, best_dist, best_fuel)
+                    best_overall, best_late = (best_route, best_dist, best_fuel), late
 
+        self.last_stats = self._chain_stats(chains, time.perf_counter() - wall0, time.process_time() - cpu0)
+        if self.engine == "population":
+            self.last_stats["population_size"] = max(1, self.cfg.population_size)
+        if self.time_windows is not None:
+            self.last_stats["late_hours"] = best_late
+        self._cache_stats(hits0, misses0)
         return best_overall
+
+    def _cache_stats(self, hits0, misses0):
+        if self.cache is not None:
+            self.last_stats["cache_hits"] = self.cache.hits - hits0
+            self.last_stats["cache_misses"] = self.cache.misses - misses0
+
+    def _chain_stats(self, chains, wall, cpu):
+        stats = {"wall_time": wall, "cpu_time": cpu,
+                 "iterations": sum(ch.done for ch in chains),
+                 "starts": len(chains),
+                 "cancelled_starts": sum(ch.cancelled for ch in chains),
+                 "stopped_starts": sum(ch.stopped for ch in chains)}
+        stats["iterations_per_sec"] = stats["iterations"] / wall if wall > 0 else 0.0
+        if self.cfg.track_iterations:
+            proposed = [sum(ch.proposed[k] for ch in chains) for k in range(3)]
+            accepted = [sum(ch.accepted[k] for ch in chains) for k in range(3)]
+            stats["proposed"] = dict(zip(OP_NAMES, proposed))
+            stats["accepted"] = dict(zip(OP_NAMES, accepted))
+            stats["acceptance_ratio"] = {name: (a / p if p else 0.0)
+                                         for name, p, a in zip(OP_NAMES, proposed, accepted)}
+            stats["trace_interval"] = max(1, self.cfg.tracking_interval)
+            stats["traces"] = [list(ch.trace) for ch in chains]
+        return stats
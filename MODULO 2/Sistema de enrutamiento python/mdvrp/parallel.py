@@ -0,0 +1,111 @@
+# mdvrp/parallel.py
+"""
+Ejecución paralela de SA por ruta (pool de procesos).
+- Las matrices D y C se publican una sola vez en memoria compartida;
+  cada worker las adjunta sin copiarlas (no se serializan por tarea).
+  Las matrices bajo demanda (matrices.py) viajan tal cual: solo son lat/lon.
+- Cada ruta trae su propia semilla, así el resultado no depende del
+  número de workers ni del orden en que terminan las tareas.
+- El mismo pool sirve para avanzar tramos de arranques del multistart
+  (multistart_mode='process').
+"""
+
+import numpy as np
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .optimizer import SimulatedAnnealingOptimizer
+
+
+class SharedMatrices:
+    """Copia D y C a bloques de memoria compartida (usar como context manager)."""
+
+    def __init__(self, D, C):
+        self._blocks = []
+        self.specs = (self._publish(D), self._publish(C))
+
+    def _publish(self, M):
+        if not isinstance(M, np.ndarray):
+            return ("object", M)
+        M = np.ascontiguousarray(M)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, M.nbytes))
+        view = np.ndarray(M.shape, dtype=M.dtype, buffer=shm.buf)
+        view[...] = M
+        self._blocks.append(shm)
+        return (shm.name, M.shape, M.dtype.str)
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Estado por proceso worker
+_WORKER = {}
+
+
+def _attach(spec):
+    if spec[0] == "object":
+        return None, spec[1]
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def worker_config(config):
+    """Config para correr dentro de un worker: sin pools anidados."""
+    config = replace(config, workers=1)
+    if config.multistart_mode == "process":
+        config = replace(config, multistart_mode="lockstep")
+    return config
+
+
+def _init_worker(d_spec, c_spec, config, neighbors=None, time_windows=None):
+    config = worker_config(config)
+    shm_d, D = _attach(d_spec)
+    shm_c, C = _attach(c_spec)
+    _WORKER["blocks"] = (shm_d, shm_c)  # mantener vivos los bloques
+    _WORKER["sa"] = SimulatedAnnealingOptimizer(D, C, config, neighbors=neighbors,
+                                               time_windows=time_windows)
+
+
+def _optimize_task(task):
+    base_route, seed, budget = task
+    sa = _WORKER["sa"]
+    sa.reseed(seed)
+    result = sa.optimize(base_route, time_budget=budget)
+    return result, sa.last_stats
+
+
+def advance_chain_task(task):
+    """Avanza un tramo de un arranque del multistart (ChainState)."""
+    chain, n_iters = task
+    return _WORKER["sa"]._run_segment(chain, n_iters)
+
+
+def make_worker_pool(D, C, config, workers, neighbors=None, time_windows=None):
+    """Crea (pool, memoria_compartida); el llamador debe cerrar ambos."""
+    shared = SharedMatrices(D, C)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(*shared.specs, config, neighbors, time_windows))
+    return pool, shared
+
+
+def optimize_routes_parallel(D, C, config, tasks, workers, neighbors=None, time_windows=None):
+    """
+    tasks: lista de (ruta_base, semilla, presupuesto_s|None). Regresa [((ruta, dist, fuel), stats), ...]
+    en el mismo orden que `tasks` (stats = SimulatedAnnealingOptimizer.last_stats).
+    """
+    if not tasks:
+        return []
+    pool, shared = make_worker_pool(D, C, config, workers, neighbors, time_windows)
+    with shared, pool:
+        return list(pool.map(_optimize_task, tasks, chunksize=1))
@@ -0,0 +1,257 @@
+# mdvrp/population.py
+"""
+Recocido Simulado poblacional (sa_engine='population').
+Las P cadenas de una ruta viven en un arreglo (P, n) de permutaciones; en cada
+paso cada cadena propone un movimiento (2-opt, swap o relocate, igual que
+sa_kernel), los P deltas salen de indexación avanzada y la prueba de
+Metropolis es vectorizada. Cada cfg.population_sync_interval pasos las peores
+cadenas se reemplazan por copias del mejor global.
+- D y C se recortan a los nodos de la ruta y se apilan en W (m, m, 2): una
+  sola indexación da los arcos de distancia y de combustible de todas las
+  cadenas (plantillas de arcos por tipo de movimiento).
+- Aleatorios, posiciones de los arcos y permutaciones de cada movimiento se
+  preparan por bloques de pasos (_draw_block); en cada paso quedan unas pocas
+  indexaciones sobre las P cadenas.
+El costo por paso es de unas pocas operaciones de numpy sin importar P, así
+que el intérprete se amortiza entre todas las cadenas.
+"""
+
+import time
+
+import numpy as np
+
+# Mismo orden de operadores que sa_kernel / optimizer.OP_NAMES
+OP_TWO_OPT, OP_SWAP, OP_RELOCATE = 0, 1, 2
+# Tipo de movimiento para el delta: el swap adyacente no tiene aristas intermedias
+KIND_TWO_OPT, KIND_SWAP, KIND_RELOCATE, KIND_SWAP_ADJACENT = 0, 1, 2, 3
+RANDOM_BLOCK = 256  # pasos por sorteo de aleatorios y posiciones (tope)
+
+# Ranuras: posición en la ruta como combinación de (lo, hi, p, q, q < p, 1)
+#   a=lo-1, b=lo, c=hi, d=hi+1, bb=lo+1, cc=hi-1 (2-opt / swap)
+#   prev=p-1, x=p, nxt=p+1, left/right = vecinos de la posición destino q (relocate)
+A, B, C, D, BB, CC, PREV, X, NXT, LEFT, RIGHT = range(11)
+SLOT_POSITIONS = np.array([
+    # a   b   c   d  bb  cc prev x nxt left right
+    [1,  1,  0,  0,  1,  0,  0,  0,  0,  0,  0],   # lo
+    [0,  0,  1,  1,  0,  1,  0,  0,  0,  0,  0],   # hi
+    [0,  0,  0,  0,  0,  0,  1,  1,  1,  0,  0],   # p
+    [0,  0,  0,  0,  0,  0,  0,  0,  0,  1,  1],   # q
+    [0,  0,  0,  0,  0,  0,  0,  0,  0, -1, -1],   # q < p
+    [-1, 0,  0,  1,  1, -1, -1,  0,  1,  0,  1],   # constante
+])
+
+# Arcos (cola, cabeza, signo) por tipo de movimiento, rellenos con signo 0
+_ENDS = [(A, C, 1), (B, D, 1), (A, B, -1), (C, D, -1)]
+_ARCS = {
+    KIND_TWO_OPT: _ENDS,
+    KIND_SWAP: _ENDS + [(C, BB, 1), (CC, B, 1), (B, BB, -1), (CC, C, -1)],
+    KIND_RELOCATE: [(PREV, NXT, 1), (PREV, X, -1), (X, NXT, -1),
+                    (LEFT, X, 1), (X, RIGHT, 1), (LEFT, RIGHT, -1)],
+    KIND_SWAP_ADJACENT: _ENDS + [(C, B, 1), (B, C, -1)],
+}
+_WIDTH = max(len(arcs) for arcs in _ARCS.values())
+_PADDED = [_ARCS[k] + [(A, A, 0)] * (_WIDTH - len(_ARCS[k])) for k in range(len(_ARCS))]
+ARC_TAIL = np.array([[t for t, _, _ in arcs] for arcs in _PADDED])
+ARC_HEAD = np.array([[h for _, h, _ in arcs] for arcs in _PADDED])
+ARC_SIGN = np.array([[s for _, _, s in arcs] for arcs in _PADDED], dtype=np.float64)
+
+
+class PopulationAnnealer:
+    def __init__(self, distance_matrix, fuel_matrix, config, symmetric):
+        self.D = distance_matrix
+        self.C = fuel_matrix
+        self.cfg = config
+        self.symmetric = symmetric
+
+    def _local_costs(self, nodes):
+        """W[a, b] = (D, C) entre los nodos de la ruta, en índices locales."""
+        sub = np.ix_(nodes, nodes)
+        return np.stack([np.asarray(self.D[sub], dtype=np.float64),
+                         np.asarray(self.C[sub], dtype=np.float64)], axis=-1)
+
+    @staticmethod
+    def _arc_reversal(W, routes):
+        """Suma acumulada de W[r[k+1], r[k]] - W[r[k], r[k+1]] por cadena (solo asimétricas)."""
+        diff = W[routes[:, 1:], routes[:, :-1]] - W[routes[:, :-1], routes[:, 1:]]
+        cum = np.zeros(routes.shape + (2,))
+        np.cumsum(diff, axis=1, out=cum[:, 1:])
+        return cum
+
+    @staticmethod
+    def _draw_block(size, n_inner):
+        """
+        Aleatorios y posiciones de un bloque de pasos (size = (pasos, cadenas)):
+        operador, posiciones de la ruta de los arcos de cada delta (ARC_*),
+        parámetros de la permutación que aplica el movimiento y -log(u) para Metropolis.
+        """
+        op = np.random.randint(0, 3, size=size)
+        p = np.random.randint(0, n_inner, size=size)
+        q = np.random.randint(0, n_inner - 1, size=size)
+        q += q >= p
+        p += 1
+        q += 1
+        lo, hi = np.minimum(p, q), np.maximum(p, q)
+        kind = np.where((op == OP_SWAP) & (hi == lo + 1), KIND_SWAP_ADJACENT, op)
+        back = q < p
+        slots = np.stack([lo, hi, p, q, back, np.ones_like(lo)], axis=-1) @ SLOT_POSITIONS
+        tails = np.take_along_axis(slots, ARC_TAIL[kind], axis=-1)
+        heads = np.take_along_axis(slots, ARC_HEAD[kind], axis=-1)
+
+        # Movimiento como permutación de posiciones sobre [lo, hi] (ver _apply):
+        # interior j -> s*j + t, extremos lo -> v_lo y hi -> v_hi, fuera sin cambio
+        two_opt, relocate, forward = op == OP_TWO_OPT, op == OP_RELOCATE, q > p
+        perm = np.stack([lo, hi,
+                         np.where(two_opt, -1, 1),
+                         np.where(two_opt, lo + hi, np.where(relocate, np.where(forward, 1, -1), 0)),
+                         np.where(relocate & forward, lo + 1, hi),
+                         np.where(relocate, np.where(forward, lo, hi - 1), lo)], axis=-1)
+
+        return {"op": op, "lo": lo, "hi": hi, "two_opt": kind == KIND_TWO_OPT,
+                "tails": tails, "heads": heads, "sign": ARC_SIGN[kind], "perm": perm,
+                "threshold": -np.log1p(-np.random.random(size))}
+
+    @staticmethod
+    def _apply(routes, moved, perm):
+        """Aplica a las cadenas `moved` su movimiento: nueva_ruta = ruta[idx]."""
+        lo, hi, s, t, v_lo, v_hi = (col[:, None] for col in perm.T)
+        j = np.arange(routes.shape[1])
+        idx = np.where((j > lo) & (j < hi), s * j + t, j)
+        idx = np.where(j == lo, v_lo, np.where(j == hi, v_hi, idx))
+        routes[moved] = routes[moved[:, None], idx]
+
+    @staticmethod
+    def _count(proposed, accepted, moves, accepts):
+        """Propuestas / aceptaciones por operador de un bloque de pasos."""
+        proposed += np.bincount(moves["op"].ravel(), minlength=3)
+        accepted += np.bincount(moves["op"][accepts], minlength=3)
+
+    @staticmethod
+    def _leader(best_dist, best_fuel):
+        """Índice del mejor (combustible, desempate por distancia)."""
+        tied = np.flatnonzero(best_fuel <= best_fuel.min() + 1e-12)
+        return int(tied[np.argmin(best_dist[tied])])
+
+    def run(self, chain, starts, n_iters, route_cost, clock_check):
+        """
+        Avanza la población n_iters pasos (cada cadena, un movimiento por paso)
+        con el RNG global de numpy. Las cadenas arrancan de `starts` (cíclicamente)
+        y el mejor global queda en `chain`. Regresa (movimientos evaluados, corte)
+        con corte None o 'stop' como en SimulatedAnnealingOptimizer.
+        """
+        cfg = self.cfg
+        P = max(1, cfg.population_size)
+        n_inner = len(starts[0]) - 2
+        if n_inner < 2:
+            return 0, None
+
+        # Rutas en índices locales (0..m-1) sobre W
+        nodes = np.unique(np.asarray(starts[0]))
+        W = self._local_costs(nodes)
+        m = len(nodes)
+        Wf = W.reshape(m * m, 2)
+        start_of = np.arange(P) % len(starts)
+        routes = np.searchsorted(nodes, np.asarray(starts))[start_of]
+        costs = np.array([route_cost(s) for s in starts], dtype=np.float64)[start_of]
+        best_routes, best_costs = routes.copy(), costs.copy()
+        # Vistas (distancia, combustible) de las cadenas y de sus mejores
+        dist, fuel = costs[:, 0], costs[:, 1]
+        best_dist, best_fuel = best_costs[:, 0], best_costs[:, 1]
+        # Temperatura inicial relativa al costo de cada cadena
+        T = np.maximum(1.0, cfg.initial_temp * np.maximum(1.0, fuel))
+
+        rows = np.arange(P)[:, None]
+        block = RANDOM_BLOCK
+        track = cfg.track_iterations
+        interval = max(1, cfg.tracking_interval)
+        sync = max(0, cfg.population_sync_interval)
+        n_replace = min(P - 1, int(round(P * cfg.population_replace_fraction)))
+        stag_it = cfg.stagnation_iterations or 0
+        timed = (chain.deadline is not None or chain.pause_at is not None
+                 or cfg.stagnation_seconds is not None)
+        tie = cfg.accept_tie_on_distance
+        proposed = np.zeros(3, dtype=np.int64)
+        accepted = np.zeros(3, dtype=np.int64)
+        leader_fuel = best_fuel.min()
+        since = chain.since_improve
+        executed, halt = n_iters, None
+
+        for it in range(n_iters):
+            b = it % block
+            if b == 0:
+                if track and it:
+                    self._count(proposed, accepted, moves, accepts)
+                moves = self._draw_block((min(block, n_iters - it), P), n_inner)
+                accepts = np.zeros(moves["op"].shape, dtype=bool)
+
+            tails = routes[rows, moves["tails"][b]]
+            heads = routes[rows, moves["heads"][b]]
+            delta = np.einsum("pk,pkc->pc", moves["sign"][b], Wf[tails * m + heads])
+            if not self.symmetric:
+                # Asimétrica: el tramo invertido del 2-opt recorre sus arcos al revés
+                arc_cum = self._arc_reversal(W, routes)
+                two_opt = moves["two_opt"][b]
+                lo, hi = moves["lo"][b][two_opt], moves["hi"][b][two_opt]
+                delta[two_opt] += arc_cum[two_opt, hi] - arc_cum[two_opt, lo]
+            d_dist, d_fuel = delta[:, 0], delta[:, 1]
+
+            # Metropolis fuel-first (desempate por distancia si aplica):
+            # u < exp(-score/T)  <=>  score < T * -log(u)
+            score = np.where(np.abs(d_fuel) < 1e-12, d_dist, d_fuel) if tie else d_fuel
+            accept = accepts[b]
+            np.less(score, T * moves["threshold"][b], out=accept)
+
+            moved = np.flatnonzero(accept)
+            if len(moved):
+                self._apply(routes, moved, moves["perm"][b, moved])
+                costs[moved] += delta[moved]
+                better = moved[(fuel[moved] < best_fuel[moved] - 1e-12)
+                               | ((np.abs(fuel[moved] - best_fuel[moved]) < 1e-12)
+                                  & (dist[moved] < best_dist[moved] - 1e-12))]
+                if len(better):
+                    best_routes[better] = routes[better]
+                    best_costs[better] = costs[better]
+
+            # enfriamiento (recalentado relativo al mejor de cada cadena)
+            T *= cfg.cooling_rate
+            cold = T < cfg.min_temp
+            if cold.any():
+                T[cold] = np.maximum(1.0, cfg.initial_temp * np.maximum(1.0, best_fuel[cold]))
+
+            # Las peores cadenas pasan a ser copias del mejor global
+            if sync and n_replace and (it + 1) % sync == 0:
+                k = self._leader(best_dist, best_fuel)
+                worst = np.argsort(fuel)[P - n_replace:]
+                worst = worst[worst != k]
+                routes[worst] = best_routes[k]
+                costs[worst] = best_costs[k]
+
+            if track and it % interval == 0:
+                chain.trace.append(float(best_fuel.min()))
+
+            if stag_it or timed:
+                since += 1
+                if best_fuel.min() < leader_fuel - 1e-12:
+                    leader_fuel = best_fuel.min()
+                    since = 0
+                    if timed:
+                        chain.last_improve = time.monotonic()
+                if stag_it and since >= stag_it:
+                    halt = "stop"
+                elif timed and (it & 15) == 0:
+                    halt = clock_check(chain, time.monotonic())
+                if halt is not None:
+                    executed = it + 1
+                    break
+
+        if track and executed:
+            steps = executed - (executed - 1) // block * block
+            self._count(proposed, accepted, {"op": moves["op"][:steps]}, accepts[:steps])
+            for k in range(3):
+                chain.proposed[k] += int(proposed[k])
+                chain.accepted[k] += int(accepted[k])
+        k = self._leader(best_dist, best_fuel)
+        chain.route, chain.best_route = nodes[routes[k]].tolist(), nodes[best_routes[k]].tolist()
+        chain.dist, chain.fuel, chain.T = float(dist[k]), float(fuel[k]), float(T[k])
+        chain.best_dist, chain.best_fuel = float(best_dist[k]), float(best_fuel[k])
+        chain.since_improve = since
+        return executed * P, halt
@@ -1,16 +1,205 @@
 # mdvrp/results_table.py
 """
-Tabla de resultados en terminal + export a Excel con resumen por CD y global.
+Tabla de resultados en terminal + export con resumen por CD y global.
+El export es incremental (RouteRowWriter): una fila por ruta a medida que el
+solver las termina, sin lista de dicts ni DataFrame intermedio.
+Formatos: '.xlsx' (xlsxwriter en modo constant_memory), '.csv' y '.parquet'
+(requiere pyarrow); CSV/Parquet dejan el resumen en <nombre>_resumen.<ext>.
 """
 
-import pandas as pd
+import csv
+import os
 from collections import defaultdict
 
+REPORT_FORMATS = ("xlsx", "csv", "parquet")
+
+# (encabezado, atributo de RouteComparison)
+ROUTE_COLUMNS = [
+    ("Centro de Distribución", "depot_name"),
+    ("Ruta", "route_id"),
+    ("Tiendas", "num_stores"),
+    ("Base Tipo", "base_kind"),
+    ("Base Combustible", "base_fuel_cost"),
+    ("Base Distancia", "base_distance"),
+    ("SA Combustible", "sa_fuel_cost"),
+    ("SA Distancia", "sa_distance"),
+    ("Elegida", "chosen_kind"),
+    ("Elegida Combustible", "chosen_fuel_cost"),
+    ("Elegida Distancia", "chosen_distance"),
+    ("Ahorro Combustible (%) vs Base", "sa_improvement_fuel_pct"),
+    ("Ahorro Distancia (%) vs Base", "sa_improvement_dist_pct"),
+    ("Mejora LS Base Combustible", "ls_base_fuel_gain"),
+    ("Mejora LS SA Combustible", "ls_sa_fuel_gain"),
+    ("Horas Ruta", "route_hours"),
+    ("Retraso (h)", "late_hours"),
+    ("Tipo Vehículo", "vehicle_type"),
+    ("Vehículo", "vehicle_id"),
+    ("Viaje", "trip"),
+]
+SUMMARY_SHEET = "Resumen Global (Culiacán)"
+
+
+def _cell(value):
+    # np.float32/np.int64 -> tipos de Python (csv, xlsxwriter y pyarrow los aceptan igual)
+    return value.item() if hasattr(value, "item") else value
+
+
+class RouteRowWriter:
+    """
+    Escribe la hoja de rutas fila por fila y acumula los totales globales.
+    Uso: `with RouteRowWriter(path) as w: w.write(route)`; al cerrar se escribe
+    el resumen. Todo se escribe en <archivo>.tmp y se renombra al cerrar, así
+    que una corrida fallida o interrumpida (abort) solo borra el temporal y
+    deja intacto el reporte anterior.
+    """
+
+    def __init__(self, path, fmt=None, chunk_rows=10_000):
+        fmt = (fmt or os.path.splitext(path)[1].lstrip(".") or "xlsx").lower()
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"⚠️ Formato de reporte inválido: {fmt!r} (opciones: {', '.join(REPORT_FORMATS)})")
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.fmt = fmt
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.rows = 0
+        self.totals = {"base_fuel": 0.0, "opt_fuel": 0.0, "base_dist": 0.0, "opt_dist": 0.0}
+        self.closed = False
+        self._buffer = []
+        self._open()
+
+    # --- backends ---
+    def _open(self):
+        headers = [h for h, _ in ROUTE_COLUMNS]
+        if self.fmt == "xlsx":
+            import xlsxwriter
+            self._book = xlsxwriter.Workbook(self.tmp_path, {"constant_memory": True})
+            self._header_format = self._book.add_format({"bold": True, "border": 1})
+            self._sheet = self._book.add_worksheet("Rutas Detalle")
+            self._sheet.write_row(0, 0, headers, self._header_format)
+        elif self.fmt == "csv":
+            self._file = open(self.tmp_path, "w", newline="", encoding="utf-8-sig")
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(headers)
+        else:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:  # pyarrow es opcional
+                raise ValueError("⚠️ El reporte en Parquet requiere pyarrow (pip install pyarrow)") from None
+            self._pa, self._pq = pa, pq
+            self._parquet = None
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self.fmt == "csv":
+            self._csv.writerows(self._buffer)
+            self._file.flush()
+        elif self.fmt == "parquet":
+            columns = {h: [row[k] for row in self._buffer] for k, (h, _) in enumerate(ROUTE_COLUMNS)}
+            table = self._pa.Table.from_pydict(columns)
+            if self._parquet is None:
+                self._parquet = self._pq.ParquetWriter(self.tmp_path, table.schema)
+            self._parquet.write_table(table)
+        self._buffer = []
+
+    def write(self, route):
+        values = [_cell(getattr(route, attr)) for _, attr in ROUTE_COLUMNS]
+        self.rows += 1
+        if self.fmt == "xlsx":
+            self._sheet.write_row(self.rows, 0, values)  # constant_memory: se vuelca al cambiar de fila
+        else:
+            self._buffer.append(values)
+            if len(self._buffer) >= self.chunk_rows:
+                self._flush()
+        self.totals["base_fuel"] += float(route.base_fuel_cost)
+        self.totals["opt_fuel"] += float(route.chosen_fuel_cost)
+        self.totals["base_dist"] += float(route.base_distance)
+        self.totals["opt_dist"] += float(route.chosen_distance)
+
+    def summary(self):
+        t = self.totals
+        sav, dist_sav = t["base_fuel"] - t["opt_fuel"], t["base_dist"] - t["opt_dist"]
+        return {
+            "Costo Base Total": t["base_fuel"],
+            "Costo Optimizado Total": t["opt_fuel"],
+            "Ahorro $": sav,
+            "Ahorro %": (100.0 * sav / t["base_fuel"]) if t["base_fuel"] > 0 else 0.0,
+            "Distancia Base Total": t["base_dist"],
+            "Distancia Optimizada Total": t["opt_dist"],
+            "Reducción Distancia km": dist_sav,
+            "Reducción Distancia %": (100.0 * dist_sav / t["base_dist"]) if t["base_dist"] > 0 else 0.0,
+        }
+
+    @property
+    def summary_path(self):
+        if self.fmt == "xlsx":
+            return self.path
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}_resumen{ext or '.' + self.fmt}"
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        summary = self.summary()
+        if self.fmt == "xlsx":
+            sheet = self._book.add_worksheet(SUMMARY_SHEET)
+            sheet.write_row(0, 0, list(summary), self._header_format)
+            sheet.write_row(1, 0, list(summary.values()))
+            self._book.close()
+        elif self.fmt == "csv":
+            self._flush()
+            self._file.close()
+            with open(self.summary_path + ".tmp", "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                writer.writerow(list(summary))
+                writer.writerow(list(summary.values()))
+        else:
+            if self._parquet is None:
+                # Sin rutas: archivo con el esquema de columnas y sin filas
+                self._buffer = []
+                table = self._pa.Table.from_pydict({h: [] for h, _ in ROUTE_COLUMNS})
+                self._parquet = self._pq.ParquetWriter(self.tmp_path, table.schema)
+            self._flush()
+            self._parquet.close()
+            self._pq.write_table(self._pa.Table.from_pydict({k: [v] for k, v in summary.items()}),
+                                 self.summary_path + ".tmp")
+        # Reemplazo atómico de los archivos completos (como DataLoader._save_atomic)
+        os.replace(self.tmp_path, self.path)
+        if self.summary_path != self.path:
+            os.replace(self.summary_path + ".tmp", self.summary_path)
+
+    def abort(self):
+        """Cierra sin resumen y borra el temporal (el reporte anterior no se toca)."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.fmt == "xlsx":
+            self._book.close()
+        elif self.fmt == "csv":
+            self._file.close()
+        elif self._parquet is not None:
+            self._parquet.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
 
 class ResultsTableGenerator:
 
     @staticmethod
-    def print_and_export(results, df, output_excel="resumen_global.xlsx"):
+    def print_table(results):
+        """Tabla por CD en consola (se omite con quiet en reportes grandes)."""
         print("\n" + "="*100)
         print("TABLA DE RESULTADOS - OPTIMIZACION MDVRP (Prediseñada vs SA vs Elegida)")
         print("="*100)
@@ -20,7 +209,6 @@ class ResultsTableGenerator:
         for r in results.routes:
             by_depot[r.depot_name].append(r)
 
-        rows = []
         for depot_num, (depot_name, routes) in enumerate(by_depot.items(), start=1):
             print(f"\n{'='*100}")
             print(f"CENTRO DE DISTRIBUCION #{depot_num}: {depot_name}")
@@ -42,22 +230,6 @@ class ResultsTableGenerator:
                       f"{route.base_fuel_cost:>10.2f}{route.sa_fuel_cost:>10.2f}{route.chosen_kind:>10}"
                       f"{route.sa_improvement_fuel_pct:>12.2f}")
 
-                rows.append({
-                    "Centro de Distribución": depot_name,
-                    "Ruta": route.route_id,
-                    "Tiendas": route.num_stores,
-                    "Base Tipo": route.base_kind,
-                    "Base Combustible": route.base_fuel_cost,
-                    "Base Distancia": route.base_distance,
-                    "SA Combustible": route.sa_fuel_cost,
-                    "SA Distancia": route.sa_distance,
-                    "Elegida": route.chosen_kind,
-                    "Elegida Combustible": route.chosen_fuel_cost,
-                    "Elegida Distancia": route.chosen_distance,
-                    "Ahorro Combustible (%) vs Base": route.sa_improvement_fuel_pct,
-                    "Ahorro Distancia (%) vs Base": route.sa_improvement_dist_pct
-                })
-
             depot_sav = depot_base - depot_opt
             depot_sav_pct = (100.0 * depot_sav / depot_base) if depot_base > 0 else 0.0
             depot_dist_sav = depot_base_dist - depot_opt_dist
@@ -67,35 +239,34 @@ class ResultsTableGenerator:
             print(f"➡️  TOTAL {depot_name:<25} | BASE $:{depot_base:>10.2f} | OPT $:{depot_opt:>10.2f} | "
                   f"AHORRO: {depot_sav_pct:>6.2f}% | REDUCCION DIST: {depot_dist_sav_pct:>6.2f}%")
 
-        # Resumen global
-        df_routes = pd.DataFrame(rows)
-        total_base = df_routes["Base Combustible"].sum()
-        total_opt = df_routes["Elegida Combustible"].sum()
-        total_sav = total_base - total_opt
-        total_sav_pct = (100.0 * total_sav / total_base) if total_base > 0 else 0.0
-        total_base_dist = df_routes["Base Distancia"].sum()
-        total_opt_dist = df_routes["Elegida Distancia"].sum()
-        total_dist_sav = total_base_dist - total_opt_dist
-        total_dist_sav_pct = (100.0 * total_dist_sav / total_base_dist) if total_base_dist > 0 else 0.0
-
+    @staticmethod
+    def print_summary(writer):
+        s = writer.summary()
         print("\n" + "="*100)
         print("📈  RESUMEN GLOBAL DEL SISTEMA DE OPTIMIZACIÓN")
         print("="*100)
-        print(f"BASE $: {total_base:.2f} | OPT $: {total_opt:.2f} | AHORRO $: {total_sav:.2f} ({total_sav_pct:.2f}%)")
-        print(f"BASE km: {total_base_dist:.2f} | OPT km: {total_opt_dist:.2f} | REDUCCION km: {total_dist_sav:.2f} ({total_dist_sav_pct:.2f}%)")
-
-        # Exportar a Excel (incluye hoja rutas y hoja resumen)
-        with pd.ExcelWriter(output_excel, engine="xlsxwriter") as writer:
-            df_routes.to_excel(writer, sheet_name="Rutas Detalle", index=False)
-            pd.DataFrame([{
-                "Costo Base Total": total_base,
-                "Costo Optimizado Total": total_opt,
-                "Ahorro $": total_sav,
-                "Ahorro %": total_sav_pct,
-                "Distancia Base Total": total_base_dist,
-                "Distancia Optimizada Total": total_opt_dist,
-                "Reducción Distancia km": total_dist_sav,
-                "Reducción Distancia %": total_dist_sav_pct
-            }]).to_excel(writer, sheet_name="Resumen Global (Culiacán)", index=False)
-
-        print(f"\nResumen exportado a {output_excel}")
+        print(f"BASE $: {s['Costo Base Total']:.2f} | OPT $: {s['Costo Optimizado Total']:.2f} | "
+              f"AHORRO $: {s['Ahorro $']:.2f} ({s['Ahorro %']:.2f}%)")
+        print(f"BASE km: {s['Distancia Base Total']:.2f} | OPT km: {s['Distancia Optimizada Total']:.2f} | "
+              f"REDUCCION km: {s['Reducción Distancia km']:.2f} ({s['Reducción Distancia %']:.2f}%)")
+
+    @staticmethod
+    def print_and_export(results, df, output_excel="resumen_global.xlsx", fmt=None, quiet=False,
+                         chunk_rows=10_000, writer=None):
+        """
+        Imprime la tabla (salvo quiet) y exporta las rutas. Si `writer` ya
+        recibió las rutas durante MDVRPSolver.solve(sink=...), solo se cierra
+        y se usan sus totales en lugar de volver a escribir.
+        """
+        if not quiet:
+            ResultsTableGenerator.print_table(results)
+
+        if writer is None:
+            with RouteRowWriter(output_excel, fmt, chunk_rows) as writer:
+                for route in results.routes:
+                    writer.write(route)
+        else:
+            writer.close()
+
+        ResultsTableGenerator.print_summary(writer)
+        print(f"\nResumen exportado a {writer.path}")
@@ -15,14 +15,21 @@ class RouteBuilder:
         if not stores_idx:
             return [depot_idx, depot_idx]
 
-        unvisited = list(stores_idx)
+        # argmin enmascarado sobre la fila del nodo actual; ante empate gana
+        # la primera tienda en el orden de stores_idx (igual que min())
+        nodes = np.asarray(stores_idx)
+        visited = np.zeros(len(nodes), dtype=bool)
         route = [depot_idx]
         current = depot_idx
-        while unvisited:
-            nxt = min(unvisited, key=lambda j: distance_matrix[current, j])
-            unvisited.remove(nxt)
-            route.append(nxt)
-            current = nxt
+        for _ in range(len(nodes)):
+            row = np.array(distance_matrix[current, nodes], dtype=float)
+            row[visited] = np.inf
+            k = int(np.argmin(row))
+            if visited[k]:  # solo quedan costos infinitos
+                k = int(np.flatnonzero(~visited)[0])
+            visited[k] = True
+            current = int(nodes[k])
+            route.append(current)
         route.append(depot_idx)
         return route
 
@@ -0,0 +1,98 @@
+# mdvrp/route_cache.py
+"""
+Caché de evaluación de rutas (distancia, combustible) con desalojo LRU.
+La llave es un hash estilo Zobrist sobre los arcos de la ruta: cada arco
+dirigido (a, b) tiene una llave pseudoaleatoria de 64 bits (splitmix64 de
+a*n + b, sin tabla n x n) y el hash de la ruta es la suma módulo 2^64 de sus
+arcos. La llave (hash, longitud) solo elige la entrada: cada entrada guarda
+la ruta como tupla y un acierto exige que coincida, así que una colisión del
+hash cuenta como fallo y nunca regresa el costo de otra ruta. Una consulta es
+O(n) en la longitud de la ruta (hash y comparación), igual que evaluarla; lo
+que se ahorra es el acceso a D y C. Con matrices densas eso es más barato que
+el hash, así que el caché viene apagado (route_cache_size=0); conviene con
+matrices bajo demanda (matrix_backend='haversine'), donde cada arco se calcula.
+"""
+
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+
+
+def _splitmix64(x, seed):
+    """Mezcla splitmix64 vectorizada (aritmética uint64 con desborde)."""
+    with np.errstate(over="ignore"):
+        z = x + seed * _GOLDEN + _GOLDEN
+        z = (z ^ (z >> np.uint64(30))) * _M1
+        z = (z ^ (z >> np.uint64(27))) * _M2
+        return z ^ (z >> np.uint64(31))
+
+
+class RouteCostCache:
+    """
+    Memoiza (distancia, combustible) por ruta. Se comparte entre arranques del
+    multistart, la post-optimización y el reporte; con workers > 1 cada proceso
+    tiene el suyo.
+    """
+
+    def __init__(self, distance_matrix, fuel_matrix, max_entries: int = 100_000, seed: int = 0):
+        self.D = distance_matrix
+        self.C = fuel_matrix
+        self.n = np.uint64(distance_matrix.shape[0])
+        self.seed = np.uint64(seed)
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, route: List[int]) -> Tuple[int, int]:
+        r = np.asarray(route, dtype=np.uint64)
+        if len(r) < 2:
+            return 0, len(r)
+        keys = _splitmix64(r[:-1] * self.n + r[1:], self.seed)
+        return int(keys.sum(dtype=np.uint64)), len(r)
+
+    def cost(self, route: List[int]) -> Tuple[float, float]:
+        key = self.key(route)
+        stored = tuple(route)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == stored:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        # Misma suma secuencial que SimulatedAnnealingOptimizer.route_cost (resultados idénticos)
+        dist = fuel = np.float64(0.0)  # float64 aunque las matrices sean float32
+        for i in range(len(route) - 1):
+            a, b = route[i], route[i + 1]
+            dist += self.D[a, b]
+            fuel += self.C[a, b]
+        value = (dist, fuel)
+        self._entries[key] = (stored, value)  # con colisión, la ruta nueva reemplaza a la anterior
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def distance(self, route: List[int]) -> float:
+        return self.cost(route)[0]
+
+    def fuel(self, route: List[int]) -> float:
+        return self.cost(route)[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._entries), "max_entries": self.max_entries,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
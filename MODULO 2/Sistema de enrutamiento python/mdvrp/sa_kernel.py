@@ -0,0 +1,173 @@
+# mdvrp/sa_kernel.py
+"""
+Núcleo compilado del Recocido Simulado (sa_engine='numba').
+Recorre el ciclo completo de SA sobre un arreglo int32 contiguo (ruta con
+depósitos) usando lotes de números aleatorios ya generados, con la misma
+semántica que SimulatedAnnealingOptimizer._anneal: combustible primero y
+desempate por distancia.
+
+Si numba no está instalado, las mismas funciones corren como Python normal
+(correcto, pero sin la ganancia de velocidad).
+"""
+
+import math
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba es opcional
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+# Códigos de operador (mismo orden que LocalSearchOperators.get_random_move_operator)
+OP_TWO_OPT, OP_SWAP, OP_RELOCATE = 0, 1, 2
+
+# Índices del vector de estado
+S_DIST, S_FUEL, S_TEMP, S_BEST_DIST, S_BEST_FUEL, S_SINCE = 0, 1, 2, 3, 4, 5
+
+
+@njit(cache=True)
+def move_delta(route, op, p, q, M, symmetric):
+    """Delta exacto de costo (matriz M) del movimiento; ver LocalSearchOperators.move_delta."""
+    if op == OP_TWO_OPT:
+        a = route[p - 1]; b = route[p]
+        c = route[q]; d = route[q + 1]
+        delta = M[a, c] + M[b, d] - M[a, b] - M[c, d]
+        if not symmetric:
+            for k in range(p, q):
+                delta += M[route[k + 1], route[k]] - M[route[k], route[k + 1]]
+        return delta
+
+    if op == OP_SWAP:
+        if p > q:
+            p, q = q, p
+        x = route[p]; y = route[q]
+        a = route[p - 1]; d = route[q + 1]
+        if q == p + 1:
+            return (M[a, y] + M[y, x] + M[x, d]) - (M[a, x] + M[x, y] + M[y, d])
+        b = route[p + 1]; c = route[q - 1]
+        return ((M[a, y] + M[y, b] + M[c, x] + M[x, d])
+                - (M[a, x] + M[x, b] + M[c, y] + M[y, d]))
+
+    x = route[p]
+    prev = route[p - 1]; nxt = route[p + 1]
+    delta = M[prev, nxt] - M[prev, x] - M[x, nxt]
+    left = route[q - 1] if q - 1 < p else route[q]
+    right = route[q] if q < p else route[q + 1]
+    return delta + M[left, x] + M[x, right] - M[left, right]
+
+
+@njit(cache=True)
+def apply_move(route, op, p, q):
+    if op == OP_TWO_OPT:
+        while p < q:
+            tmp = route[p]; route[p] = route[q]; route[q] = tmp
+            p += 1; q -= 1
+    elif op == OP_SWAP:
+        tmp = route[p]; route[p] = route[q]; route[q] = tmp
+    else:
+        x = route[p]
+        if q > p:
+            for k in range(p, q):
+                route[k] = route[k + 1]
+        else:
+            for k in range(p, q, -1):
+                route[k] = route[k - 1]
+        route[q] = x
+
+
+@njit(cache=True)
+def anneal_batch(route, best_route, state, D, C, ops, pos_i, pos_j, rand_u,
+                 cooling_rate, min_temp, initial_temp, tie_on_distance, symmetric,
+                 counts, trace, it_offset, interval, stag_limit):
+    """
+    Avanza hasta len(ops) iteraciones. `route` y `best_route` se modifican in-place;
+    `state` = [dist, fuel, T, best_dist, best_fuel, iteraciones_sin_mejora].
+    Con stag_limit > 0 se detiene al llegar a stag_limit iteraciones sin mejora.
+    pos_i / pos_j: posiciones internas distintas (0..n-1), ya sorteadas.
+    Instrumentación (interval > 0): counts[0|1, op] acumula propuestas/aceptaciones
+    y trace recibe el mejor fuel cuando (it_offset + it) % interval == 0.
+    Regresa (valores escritos en trace, iteraciones ejecutadas).
+    """
+    written = 0
+    dist = state[S_DIST]; fuel = state[S_FUEL]; T = state[S_TEMP]
+    best_dist = state[S_BEST_DIST]; best_fuel = state[S_BEST_FUEL]
+    since = int(state[S_SINCE])
+    n_inner = route.shape[0] - 2
+    executed = ops.shape[0]
+
+    for it in range(ops.shape[0]):
+        op = ops[it]
+        if n_inner < 2:
+            d_dist = 0.0; d_fuel = 0.0
+            p = 0; q = 0
+        else:
+            p = pos_i[it] + 1; q = pos_j[it] + 1
+            if op == OP_TWO_OPT and p > q:
+                p, q = q, p
+            d_dist = move_delta(route, op, p, q, D, symmetric)
+            d_fuel = move_delta(route, op, p, q, C, symmetric)
+
+        if tie_on_distance and abs(d_fuel) < 1e-12:
+            delta = d_dist
+        else:
+            delta = d_fuel
+
+        accept = False
+        if delta < 0:
+            accept = True
+        elif T > 0:
+            accept = rand_u[it] < math.exp(-delta / T)
+
+        if interval > 0 and n_inner >= 2:
+            counts[0, op] += 1
+            if accept:
+                counts[1, op] += 1
+
+        since += 1
+        if accept:
+            if n_inner >= 2:
+                apply_move(route, op, p, q)
+            dist += d_dist
+            fuel += d_fuel
+            if fuel < best_fuel - 1e-12 or (abs(fuel - best_fuel) < 1e-12 and dist < best_dist - 1e-12):
+                best_route[:] = route
+                best_dist = dist
+                best_fuel = fuel
+                since = 0
+
+        T *= cooling_rate
+        if T < min_temp:
+            T = max(1.0, initial_temp * max(1.0, best_fuel))
+
+        if interval > 0 and (it_offset + it) % interval == 0:
+            trace[written] = best_fuel
+            written += 1
+
+        if stag_limit > 0 and since >= stag_limit:
+            executed = it + 1
+            break
+
+    state[S_DIST] = dist; state[S_FUEL] = fuel; state[S_TEMP] = T
+    state[S_BEST_DIST] = best_dist; state[S_BEST_FUEL] = best_fuel
+    state[S_SINCE] = since
+    return written, executed
+
+
+def draw_batch(n_inner, size):
+    """Lote de aleatorios (global np.random): operador, par de posiciones distintas y uniforme."""
+    ops = np.random.randint(0, 3, size=size).astype(np.int8)
+    if n_inner >= 2:
+        pos_i = np.random.randint(0, n_inner, size=size).astype(np.int32)
+        pos_j = np.random.randint(0, n_inner - 1, size=size).astype(np.int32)
+        pos_j += (pos_j >= pos_i)
+    else:
+        pos_i = np.zeros(size, dtype=np.int32)
+        pos_j = np.zeros(size, dtype=np.int32)
+    rand_u = np.random.random(size)
+    return ops, pos_i, pos_j, rand_u
@@ -0,0 +1,218 @@
+# mdvrp/scenarios.py
+"""
+Escenarios what-if (capacidad, velocidad, precio de combustible, parámetros
+de SA, ...) sobre un solo dataset cargado una vez.
+- Parámetros solo de reporte: no cambian las rutas, se aplican al resultado.
+  average_speed_kmh y service_time_minutes solo entran en las horas de ruta
+  (salvo con ventanas de tiempo o max_shift_hours: ahí sí cambian las rutas).
+- fuel_price_scale sí tiene corrida propia: la corrida usa C escalada
+  (ScaledMatrix, sin copiar C). El SA no es invariante a escalar C (la
+  temperatura inicial tiene piso absoluto y min_temp es absoluta), así que
+  escalar el combustible de otra corrida no daría lo mismo. Con
+  sa_engine='numba' esas corridas usan el motor 'python' (requiere arreglos).
+- Escenarios que solo difieren en parámetros de reporte (o en multiplicadores
+  de capacidad que dan la misma capacidad) comparten una corrida.
+- Capacidad + asignación + clustering se calculan una vez por stage_key
+  (MDVRPSolver.build_stages) y se reutilizan en cada corrida.
+- Las corridas van en un pool de procesos con D/C en memoria compartida
+  (parallel.SharedMatrices); el resultado es una sola tabla comparativa.
+"""
+
+import contextlib
+import io
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields, replace
+
+import pandas as pd
+
+from .config import DATASET_FIELDS, OptimizationConfig
+from .geometry import GeometryCalculator
+from .matrices import ScaledMatrix
+from .parallel import SharedMatrices, _attach, worker_config
+from .solver import MDVRPSolver
+from .time_windows import has_windows
+
+REPORT_ONLY_FIELDS = ("average_speed_kmh", "service_time_minutes")
+# Cambian las rutas pero no son campos de OptimizationConfig (se aplican a las matrices)
+MATRIX_FIELDS = ("fuel_price_scale",)
+# Solo entran a la capacidad: dos escenarios con la misma capacidad resultante comparten corrida
+CAPACITY_FIELDS = ("capacity_multiplier_p50", "capacity_multiplier_p80")
+_CONFIG_FIELDS = {f.name for f in fields(OptimizationConfig)}
+
+
+def _solve_run(data, cfg, scale, stages):
+    t0 = time.perf_counter()
+    C = data["C"] if scale == 1.0 else ScaledMatrix(data["C"], scale)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver = MDVRPSolver(cfg, data["df"], data["df_depots"], data["df_stores"],
+                             data["D"], C, data["has_predesigned"])
+        results = solver.solve(stages=stages)
+    return {
+        "summary": results.summary,
+        # (tiendas, distancia elegida, horas) por ruta: suficiente para recalcular horas
+        "routes": [(r.num_stores, float(r.chosen_distance), float(r.route_hours)) for r in results.routes],
+        "solve_s": time.perf_counter() - t0,
+    }
+
+
+# --- lado worker ---
+_WORKER = {}
+
+
+def _init_scenario_worker(d_spec, c_spec, frames):
+    shm_d, D = _attach(d_spec)
+    shm_c, C = _attach(c_spec)
+    _WORKER["blocks"] = (shm_d, shm_c)  # mantener vivos los bloques
+    _WORKER["data"] = dict(zip(("df", "df_depots", "df_stores", "has_predesigned"), frames), D=D, C=C)
+
+
+def _run_task(task):
+    return _solve_run(_WORKER["data"], *task)
+
+
+class ScenarioRunner:
+    def __init__(self, config: OptimizationConfig, df, df_depots, df_stores, D, C, has_predesigned: bool,
+                 workers: int = 1):
+        self.cfg = config
+        self.data = {"df": df, "df_depots": df_depots, "df_stores": df_stores,
+                     "D": D, "C": C, "has_predesigned": has_predesigned}
+        self.workers = max(1, int(workers))
+        self.has_windows = has_windows(df)
+
+    def _timed(self, overrides):
+        """Con restricciones de horario la velocidad y el servicio entran a la factibilidad (cambian rutas)."""
+        return self.has_windows or overrides.get("max_shift_hours", self.cfg.max_shift_hours) is not None
+
+    @staticmethod
+    def grid(axes):
+        """{"param": [v1, v2], ...} -> lista de escenarios (producto cartesiano, en orden)."""
+        keys = list(axes)
+        return [dict(zip(keys, values)) for values in itertools.product(*(axes[k] for k in keys))]
+
+    @staticmethod
+    def scenario_name(overrides):
+        return ", ".join(f"{k}={v}" for k, v in overrides.items()) or "base"
+
+    @staticmethod
+    def _validate(overrides):
+        unknown = sorted(set(overrides) - _CONFIG_FIELDS - set(REPORT_ONLY_FIELDS) - set(MATRIX_FIELDS))
+        if unknown:
+            raise ValueError(f"⚠️ Parámetros de escenario desconocidos: {', '.join(unknown)}")
+        fixed = sorted(set(overrides) & set(DATASET_FIELDS))
+        if fixed:
+            raise ValueError(f"⚠️ Parámetros del dataset no se pueden variar por escenario: {', '.join(fixed)}")
+        scale = overrides.get("fuel_price_scale", 1.0)
+        if scale <= 0:
+            raise ValueError(f"⚠️ fuel_price_scale debe ser positivo: {scale}")
+
+    def _solver(self, cfg):
+        d = self.data
+        return MDVRPSolver(cfg, d["df"], d["df_depots"], d["df_stores"], d["D"], d["C"], d["has_predesigned"])
+
+    def run(self, scenarios):
+        """Corre los escenarios y regresa la tabla comparativa (un renglón por escenario)."""
+        t_start = time.perf_counter()
+        for overrides in scenarios:
+            self._validate(overrides)
+
+        # Escenario -> corrida (solo parámetros que cambian las rutas) -> etapas base
+        runs = {}        # llave de corrida -> (config, escala de C)
+        stages = {}      # stage_key -> (capacidad, clusters, prediseñadas)
+        run_stages = {}  # llave de corrida -> etapas que usa
+        scenario_runs = []
+        for overrides in scenarios:
+            report_only = () if self._timed(overrides) else REPORT_ONLY_FIELDS
+            route_params = {k: v for k, v in overrides.items() if k not in report_only}
+            scale = float(route_params.pop("fuel_price_scale", 1.0))
+            cfg = worker_config(replace(self.cfg, **route_params))
+            solver = self._solver(cfg)
+            stage_key = solver.stage_key()
+            # repr: valores no hashables como cfg.fleet (lista de dicts)
+            key = (stage_key, scale, tuple(sorted((k, repr(v)) for k, v in route_params.items()
+                                                  if k not in CAPACITY_FIELDS)))
+            scenario_runs.append(key)
+            if key in runs:
+                continue
+            runs[key] = (cfg, scale)
+            if stage_key not in stages:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stages[stage_key] = solver.build_stages()
+            run_stages[key] = stages[stage_key]
+        print(f"  ✓ {len(scenarios)} escenarios -> {len(runs)} corridas de SA "
+              f"({len(stages)} asignaciones/clusterings)")
+
+        keys = list(runs)
+        tasks = [(*runs[k], run_stages[k]) for k in keys]
+        if self.workers > 1 and len(tasks) > 1:
+            print(f"  ✓ Workers: {self.workers}")
+            with SharedMatrices(self.data["D"], self.data["C"]) as shared:
+                frames = (self.data["df"], self.data["df_depots"], self.data["df_stores"],
+                          self.data["has_predesigned"])
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)),
+                                         initializer=_init_scenario_worker,
+                                         initargs=(*shared.specs, frames)) as pool:
+                    outputs = list(pool.map(_run_task, tasks, chunksize=1))
+        else:
+            outputs = [_solve_run(self.data, *task) for task in tasks]
+        outputs = dict(zip(keys, outputs))
+
+        rows = [self._row(overrides, runs[key][0], run_stages[key][0], outputs[key],
+                          timed=self._timed(overrides))
+                for overrides, key in zip(scenarios, scenario_runs)]
+        print(f"  ✓ Escenarios completados en {time.perf_counter() - t_start:.2f}s")
+        return pd.DataFrame(rows)
+
+    def _row(self, overrides, cfg, capacity, output, timed=False):
+        s = output["summary"]  # el combustible ya viene con la escala de la corrida
+        if timed:
+            # La corrida ya usó la velocidad y el servicio del escenario (con esperas)
+            hours = [h for _, _, h in output["routes"]]
+        else:
+            speed = float(overrides.get("average_speed_kmh", cfg.average_speed_kmh))
+            service_h = float(overrides.get("service_time_minutes", cfg.service_time_minutes)) / 60.0
+            hours = [GeometryCalculator.route_time(dist, n, speed, service_h) for n, dist, _ in output["routes"]]
+        row = {"Escenario": self.scenario_name(overrides)}
+        row.update(overrides)
+        row.update({
+            "Capacidad Vehículo": capacity,
+            "Rutas": s["total_routes"],
+            "Vehículos": s.get("vehicles_used", s["total_routes"]),  # sin flota, un vehículo por ruta
+            "Combustible Base": s["total_base_fuel"],
+            "Combustible Optimizado": s["total_opt_fuel"],
+            "Ahorro $": s["fuel_savings"],
+            "Ahorro %": s["fuel_savings_pct"],
+            "Distancia Base": s["total_base_distance"],
+            "Distancia Optimizada": s["total_opt_distance"],
+            "Reducción Distancia %": s["distance_savings_pct"],
+            "Horas Totales": sum(hours),
+            "Ruta Más Larga (h)": max(hours, default=0.0),
+            "Tiempo SA (s)": output["solve_s"],
+        })
+        return row
+
+    @staticmethod
+    def print_table(table):
+        print("\n" + "="*100)
+        print("COMPARATIVO DE ESCENARIOS")
+        print("="*100)
+        print(f"{'#':<6}{'CAPACIDAD':>11}{'RUTAS':>7}{'BASE $':>12}{'OPT $':>12}{'AHORRO%':>9}"
+              f"{'OPT km':>11}{'HORAS':>9}{'MAX h':>8}{'SA s':>8}")
+        print("-"*100)
+        for k, (_, r) in enumerate(table.iterrows(), start=1):
+            print(f"{'E' + str(k):<6}{r['Capacidad Vehículo']:>11.0f}{int(r['Rutas']):>7}"
+                  f"{r['Combustible Base']:>12.2f}{r['Combustible Optimizado']:>12.2f}{r['Ahorro %']:>9.2f}"
+                  f"{r['Distancia Optimizada']:>11.2f}{r['Horas Totales']:>9.1f}{r['Ruta Más Larga (h)']:>8.1f}"
+                  f"{r['Tiempo SA (s)']:>8.2f}")
+        print("-"*100)
+        for k, name in enumerate(table["Escenario"], start=1):
+            print(f"E{k}: {name}")
+
+    @staticmethod
+    def export(table, path):
+        if path.lower().endswith(".csv"):
+            table.to_csv(path, index=False, encoding="utf-8-sig")
+        else:
+            table.to_excel(path, sheet_name="Escenarios", index=False)
+        print(f"\nComparativo exportado a {path}")
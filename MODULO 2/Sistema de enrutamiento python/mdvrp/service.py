@@ -0,0 +1,440 @@
+# mdvrp/service.py
+"""
+Modo servicio: API HTTP local (JSON) sobre MDVRPSolver, para no pagar en cada
+re-optimización los imports, la lectura de Excel y el armado de matrices.
+- Datasets residentes por dataset_id (df + D/C). Las matrices se publican una
+  sola vez en memoria compartida (parallel.SharedMatrices); cada worker las
+  adjunta sin copiarlas la primera vez que recibe un trabajo de ese dataset.
+- Trabajos (plan completo o una sola ruta) en un pool de procesos
+  (cfg.service_workers). Con "wait": false se responde con el job_id.
+- El último plan de cada dataset queda como corrida previa: tras recargar el
+  dataset con cambios, {"warm_start": true} re-optimiza solo lo afectado.
+
+Endpoints:
+  GET    /health
+  GET    /datasets
+  POST   /datasets                {"dataset_id": "...", "config": {...}}  carga o recarga
+  DELETE /datasets/<id>
+  POST   /datasets/<id>/plan      {"config": {...}, "warm_start": false, "wait": true}
+  POST   /datasets/<id>/route     {"stores": [nombres], "depot": nombre|null, "seed": int, "wait": true}
+  GET    /jobs/<job_id>
+"""
+
+import contextlib
+import io
+import json
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse
+
+import numpy as np
+
+from .config import DATASET_FIELDS, OptimizationConfig
+from .data_loader import DataLoader
+from .descent import LocalDescent
+from .optimizer import SimulatedAnnealingOptimizer
+from .parallel import SharedMatrices, _attach, worker_config
+from .route_builder import RouteBuilder
+from .solver import MDVRPSolver
+from .time_windows import EPS as TW_EPS, TimeWindows
+from .warm_start import RunSnapshot
+
+_CONFIG_FIELDS = {f.name for f in fields(OptimizationConfig)}
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"⚠️ No serializable: {type(value).__name__}")
+
+
+def _check_overrides(overrides, allow_dataset_fields):
+    unknown = sorted(set(overrides) - _CONFIG_FIELDS)
+    if unknown:
+        raise ValueError(f"⚠️ Parámetros desconocidos: {', '.join(unknown)}")
+    if not allow_dataset_fields:
+        fixed = sorted(set(overrides) & set(DATASET_FIELDS))
+        if fixed:
+            raise ValueError(f"⚠️ Parámetros del dataset (recargarlo para cambiarlos): {', '.join(fixed)}")
+
+
+# --- lado worker ---
+
+_WORKER_DATASETS = OrderedDict()  # (dataset_id, versión) -> datos adjuntos (por proceso worker)
+_MAX_WORKER_DATASETS = 4
+
+
+def _release(entry):
+    blocks = entry.pop("blocks")
+    entry.clear()  # soltar las vistas antes de cerrar los bloques
+    for shm in blocks:
+        if shm is not None:
+            with contextlib.suppress(BufferError):
+                shm.close()
+
+
+def _worker_dataset(ref):
+    key = (ref["dataset_id"], ref["version"])
+    entry = _WORKER_DATASETS.get(key)
+    if entry is not None:
+        _WORKER_DATASETS.move_to_end(key)
+        return entry
+    # Versiones anteriores del mismo dataset ya no se usan
+    for old in [k for k in _WORKER_DATASETS if k[0] == key[0]]:
+        _release(_WORKER_DATASETS.pop(old))
+
+    shm_d, D = _attach(ref["d_spec"])
+    shm_c, C = _attach(ref["c_spec"])
+    df, df_depots, df_stores, has_predesigned = pickle.loads(ref["frames"])
+    entry = {
+        "blocks": (shm_d, shm_c), "D": D, "C": C,
+        "df": df, "df_depots": df_depots, "df_stores": df_stores, "has_predesigned": has_predesigned,
+        "index": dict(zip(df["Nombre"].astype(str), df["idx"].astype(int))),
+        "optimizers": {},  # overrides (JSON) -> (SA, descenso) reutilizables entre trabajos
+    }
+    _WORKER_DATASETS[key] = entry
+    if len(_WORKER_DATASETS) > _MAX_WORKER_DATASETS:
+        _release(_WORKER_DATASETS.popitem(last=False)[1])
+    return entry
+
+
+def _route_summary(r, names):
+    return {"route_id": r.route_id, "depot": str(r.depot_name), "stores": r.num_stores,
+            "kind": r.chosen_kind, "fuel": r.chosen_fuel_cost, "distance": r.chosen_distance,
+            "base_fuel": r.base_fuel_cost, "base_distance": r.base_distance,
+            "hours": r.route_hours, "late_hours": r.late_hours,
+            "vehicle_type": r.vehicle_type, "vehicle": r.vehicle_id, "trip": r.trip,
+            "sequence": [names[i] for i in r.chosen_sequence_idx]}
+
+
+def plan_job(ref, cfg, previous=None):
+    """Plan completo con MDVRPSolver (la salida de consola se descarta)."""
+    data = _worker_dataset(ref)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver = MDVRPSolver(cfg, data["df"], data["df_depots"], data["df_stores"],
+                             data["D"], data["C"], data["has_predesigned"])
+        results = solver.solve(previous=previous)
+    names = data["df"]["Nombre"].astype(str).tolist()
+    return {
+        "summary": results.summary,
+        "stage_times": results.stage_times,
+        "routes": [_route_summary(r, names) for r in results.routes],
+        "snapshot": RunSnapshot.build(results, data["df"]),
+    }
+
+
+def _resolve(index, node):
+    if isinstance(node, int):
+        return node
+    if str(node) not in index:
+        raise ValueError(f"⚠️ Nodo desconocido: {node!r}")
+    return index[str(node)]
+
+
+def route_job(ref, cfg, overrides_key, stores, depot=None, seed=None):
+    """Una sola ruta: NN desde el CD + SA (multistart) + descenso local."""
+    data = _worker_dataset(ref)
+    D, C = data["D"], data["C"]
+    stores_idx = [_resolve(data["index"], s) for s in stores]
+    if not stores_idx:
+        raise ValueError("⚠️ La ruta no tiene tiendas")
+    if depot is None:
+        # CD con menor costo de combustible total hacia las tiendas de la ruta
+        depots = data["df_depots"]["idx"].astype(int).tolist()
+        depot_idx = depots[int(np.argmin(np.asarray(C[np.ix_(depots, stores_idx)]).sum(axis=1)))]
+    else:
+        depot_idx = _resolve(data["index"], depot)
+
+    cached = data["optimizers"].get(overrides_key)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if cached is None:
+            tw = TimeWindows.from_frame(data["df"], cfg)
+            sa = SimulatedAnnealingOptimizer(D, C, cfg, time_windows=tw)
+            descent = (LocalDescent(D, C, cfg, symmetric=sa.symmetric, cache=sa.cache, time_windows=tw)
+                       if cfg.post_optimize else None)
+            cached = data["optimizers"][overrides_key] = (sa, descent)
+        sa, descent = cached
+        tw = sa.time_windows
+        base = RouteBuilder.nearest_neighbor_route(depot_idx, stores_idx, D)
+        base_dist, base_fuel = sa.route_cost(base)
+        sa.reseed(cfg.seed if seed is None else seed)
+        route, dist, fuel = sa.optimize(base)
+        if descent is not None:
+            route, dist, fuel, _ = descent.improve(route)
+    late = base_late = 0.0
+    if tw is not None:
+        late, base_late = tw.lateness(route, D), tw.lateness(base, D)
+    if base_late < late - TW_EPS or (abs(base_late - late) <= TW_EPS and base_fuel < fuel):
+        route, dist, fuel, late = base, base_dist, base_fuel, base_late
+
+    names = data["df"]["Nombre"].astype(str).tolist()
+    demand = data["df"]["demanda"].to_numpy(dtype=float)
+    return {
+        "depot": names[depot_idx],
+        "sequence": [names[i] for i in route],
+        "sequence_idx": [int(i) for i in route],
+        "fuel": fuel, "distance": dist,
+        "base_fuel": base_fuel, "base_distance": base_dist,
+        "load": float(demand[route[1:-1]].sum()),
+        "late_hours": late,
+    }
+
+
+# --- proceso principal ---
+
+@dataclass
+class Dataset:
+    dataset_id: str
+    version: int
+    config: OptimizationConfig
+    shared: SharedMatrices
+    ref: dict                       # lo que viaja a los workers (specs + frames serializados)
+    n_nodes: int
+    load_s: float
+    loaded_at: float
+    last_snapshot: Optional[dict] = None  # último plan (arranque en caliente)
+    pending: int = 0
+    retired: bool = False
+
+
+class MDVRPService:
+    def __init__(self, config: OptimizationConfig, workers: Optional[int] = None):
+        self.cfg = config
+        self.workers = max(1, workers or config.service_workers)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.datasets = {}
+        self.jobs = OrderedDict()  # job_id -> (tipo, Dataset, future, enviado)
+        self._lock = threading.Lock()
+        self._version = 0
+        self.started = time.time()
+
+    # --- datasets ---
+    def load_dataset(self, dataset_id, overrides=None):
+        overrides = overrides or {}
+        _check_overrides(overrides, allow_dataset_fields=True)
+        cfg = replace(self.cfg, **overrides)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            df, df_depots, df_stores, D, C, has_predesigned = DataLoader(cfg).load_data()
+        shared = SharedMatrices(D, C)
+        d_spec, c_spec = shared.specs
+        with self._lock:
+            self._version += 1
+            old = self.datasets.get(dataset_id)
+            ds = Dataset(dataset_id=dataset_id, version=self._version, config=cfg, shared=shared,
+                         ref={"dataset_id": dataset_id, "version": self._version,
+                              "d_spec": d_spec, "c_spec": c_spec,
+                              "frames": pickle.dumps((df, df_depots, df_stores, has_predesigned))},
+                         n_nodes=len(df), load_s=time.perf_counter() - t0, loaded_at=time.time(),
+                         last_snapshot=old.last_snapshot if old is not None else None)
+            self.datasets[dataset_id] = ds
+            if old is not None:
+                self._retire(old)
+        print(f"  ✓ Dataset {dataset_id!r}: {ds.n_nodes} nodos en {ds.load_s:.2f}s")
+        return self.describe(ds)
+
+    def drop_dataset(self, dataset_id):
+        with self._lock:
+            ds = self._dataset(dataset_id)
+            del self.datasets[dataset_id]
+            self._retire(ds)
+        return {"dataset_id": dataset_id, "dropped": True}
+
+    def _retire(self, ds):
+        # La memoria compartida se libera cuando terminan sus trabajos pendientes
+        ds.retired = True
+        if ds.pending == 0:
+            ds.shared.close()
+
+    def _dataset(self, dataset_id):
+        if dataset_id not in self.datasets:
+            raise KeyError(f"⚠️ Dataset desconocido: {dataset_id!r}")
+        return self.datasets[dataset_id]
+
+    @staticmethod
+    def describe(ds):
+        return {"dataset_id": ds.dataset_id, "version": ds.version, "n_nodes": ds.n_nodes,
+                "matrix_backend": ds.config.matrix_backend, "load_s": ds.load_s,
+                "loaded_at": ds.loaded_at, "has_previous_plan": ds.last_snapshot is not None}
+
+    # --- trabajos ---
+    def _submit(self, kind, ds, fn, *args):
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            ds.pending += 1
+            future = self.pool.submit(fn, ds.ref, *args)
+            self.jobs[job_id] = (kind, ds, future, time.time())
+            self._trim_jobs()
+        future.add_done_callback(lambda f: self._job_done(ds, kind, f))
+        return job_id
+
+    def _job_done(self, ds, kind, future):
+        with self._lock:
+            ds.pending -= 1
+            if ds.retired and ds.pending == 0:
+                ds.shared.close()
+        self._remember_plan(ds, kind, future)
+
+    def _remember_plan(self, ds, kind, future):
+        # También se llama al consultar el trabajo: quien espera el resultado
+        # puede despertar antes de que corran los callbacks del future
+        if kind != "plan" or future.exception() is not None:
+            return
+        with self._lock:
+            if not ds.retired:
+                ds.last_snapshot = future.result()["snapshot"]
+
+    def _trim_jobs(self):
+        done = [j for j, (_, _, f, _) in self.jobs.items() if f.done()]
+        for job_id in done[:max(0, len(done) - self.cfg.service_max_jobs)]:
+            del self.jobs[job_id]
+
+    def submit_plan(self, dataset_id, overrides=None, warm_start=False):
+        overrides = overrides or {}
+        _check_overrides(overrides, allow_dataset_fields=False)
+        with self._lock:
+            ds = self._dataset(dataset_id)
+        previous = ds.last_snapshot if warm_start else None
+        if warm_start and previous is None:
+            raise ValueError(f"⚠️ El dataset {dataset_id!r} no tiene un plan previo para arranque en caliente")
+        return self._submit("plan", ds, plan_job, worker_config(replace(ds.config, **overrides)), previous)
+
+    def submit_route(self, dataset_id, stores, depot=None, seed=None, overrides=None):
+        overrides = overrides or {}
+        _check_overrides(overrides, allow_dataset_fields=False)
+        if not isinstance(stores, list) or not stores:
+            raise ValueError("⚠️ 'stores' debe ser una lista no vacía de nombres o índices")
+        with self._lock:
+            ds = self._dataset(dataset_id)
+        key = json.dumps(overrides, sort_keys=True)
+        return self._submit("route", ds, route_job, worker_config(replace(ds.config, **overrides)), key,
+                            stores, depot, seed)
+
+    def job_status(self, job_id, wait=False):
+        with self._lock:
+            if job_id not in self.jobs:
+                raise KeyError(f"⚠️ Trabajo desconocido: {job_id!r}")
+            kind, ds, future, submitted = self.jobs[job_id]
+        if wait:
+            future.exception()  # bloquea hasta terminar
+        if future.done():
+            self._remember_plan(ds, kind, future)
+        status = {"job_id": job_id, "kind": kind, "dataset_id": ds.dataset_id,
+                  "status": "running" if not future.done() else "done"}
+        if future.done():
+            status["elapsed_s"] = time.time() - submitted
+            error = future.exception()
+            if error is not None:
+                status["status"] = "error"
+                status["error"] = str(error)
+            else:
+                status["result"] = {k: v for k, v in future.result().items() if k != "snapshot"}
+        return status
+
+    # --- API ---
+    def handle(self, method, parts, body):
+        """(método, ruta en partes, cuerpo JSON) -> (estado HTTP, respuesta)."""
+        if method == "GET" and parts == ["health"]:
+            return 200, {"status": "ok", "workers": self.workers, "datasets": len(self.datasets),
+                         "uptime_s": time.time() - self.started}
+        if parts == ["datasets"]:
+            if method == "GET":
+                with self._lock:
+                    return 200, [self.describe(ds) for ds in self.datasets.values()]
+            if method == "POST":
+                dataset_id = body.get("dataset_id")
+                if not dataset_id:
+                    raise ValueError("⚠️ Falta 'dataset_id'")
+                return 201, self.load_dataset(str(dataset_id), body.get("config"))
+        if len(parts) == 2 and parts[0] == "datasets" and method == "DELETE":
+            return 200, self.drop_dataset(parts[1])
+        if len(parts) == 3 and parts[0] == "datasets" and method == "POST":
+            if parts[2] == "plan":
+                job_id = self.submit_plan(parts[1], body.get("config"), bool(body.get("warm_start", False)))
+            elif parts[2] == "route":
+                job_id = self.submit_route(parts[1], body.get("stores"), body.get("depot"),
+                                           body.get("seed"), body.get("config"))
+            else:
+                raise KeyError(f"⚠️ Operación desconocida: {parts[2]!r}")
+            wait = bool(body.get("wait", True))
+            status = self.job_status(job_id, wait=wait)
+            if not wait:
+                return 202, status
+            return (422 if status["status"] == "error" else 200), status
+        if len(parts) == 2 and parts[0] == "jobs" and method == "GET":
+            return 200, self.job_status(parts[1])
+        raise KeyError(f"⚠️ Ruta desconocida: {method} /{'/'.join(parts)}")
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            for ds in self.datasets.values():
+                ds.shared.close()
+            self.datasets = {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None  # MDVRPService (se asigna en serve)
+
+    def log_message(self, fmt, *args):
+        pass  # sin una línea de log por petición
+
+    def _send(self, status, body):
+        data = json.dumps(body, default=_json_default, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            if not isinstance(body, dict):
+                raise ValueError("⚠️ El cuerpo debe ser un objeto JSON")
+            status, response = self.service.handle(method, parts, body)
+        except KeyError as e:
+            status, response = 404, {"error": e.args[0] if e.args else str(e)}
+        except (ValueError, TypeError) as e:
+            status, response = 400, {"error": str(e)}
+        except Exception as e:  # error del solver: se reporta sin tumbar el servicio
+            status, response = 500, {"error": f"{type(e).__name__}: {e}"}
+        self._send(status, response)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+def serve(config: OptimizationConfig, host=None, port=None, workers=None, preload=None):
+    """Levanta el servicio hasta Ctrl+C. preload: dataset_id a cargar con la config base."""
+    service = MDVRPService(config, workers)
+    handler = type("MDVRPHandler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host or config.service_host, port or config.service_port), handler)
+    try:
+        if preload:
+            service.load_dataset(preload)
+        print(f"  ✓ Servicio MDVRP en http://{server.server_address[0]}:{server.server_address[1]} "
+              f"({service.workers} workers)")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n  ✓ Servicio detenido")
+    finally:
+        server.server_close()
+        service.close()
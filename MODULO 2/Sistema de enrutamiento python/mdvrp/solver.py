@@ -2,23 +2,40 @@
 """
 Orquestador MDVRP:
 - Carga datos (ya hecho en main)
-- Capacidad vehículo
+- Capacidad vehículo (o flota heterogénea cfg.fleet: tipo por ruta y viajes
+  por vehículo, ver fleet.py)
 - Si hay rutas prediseñadas: las respeta por CD y grupo; si no, usa asignación+clustering
-- Para cada grupo/ruta: evalúa Prediseñada (o NN) vs SA y ELIGE la mejor por combustible
+- Para cada grupo/ruta: evalúa Prediseñada (o NN) vs SA (rutas chicas: solución exacta,
+  ver exact.py) y ELIGE la mejor por combustible
+  (con ventanas de tiempo, primero la de menor retraso; ver time_windows.py)
+- Con una corrida previa (warm_start.py) reutiliza las rutas no afectadas y solo
+  repara y pule con un SA corto las que cambiaron
 - Imprime informe estilo auditoría + retorna OptimizationResults
 """
 
+import time
 import numpy as np
 from collections import defaultdict
+from dataclasses import replace
 
 from .config import OptimizationResults, OptimizationConfig, RouteComparison
-from .clustering import StoreAssigner, CapacityClusterer
+from .geometry import GeometryCalculator
+from .clustering import StoreAssigner, CapacityClusterer, CapacityClusteringEngine
 from .route_builder import RouteBuilder
 from .optimizer import SimulatedAnnealingOptimizer
+from .parallel import optimize_routes_parallel
+from .neighbors import NeighborIndex
+from .descent import LocalDescent
+from .fleet import Fleet
+from .inter_route import InterRouteOptimizer
+from .instrumentation import StageClock
+from .time_windows import EPS as TW_EPS, TimeWindows
+from .warm_start import WarmStartPlanner
 
 
 class MDVRPSolver:
-    def __init__(self, config: OptimizationConfig, df, df_depots, df_stores, D, C, has_predesigned: bool):
+    def __init__(self, config: OptimizationConfig, df, df_depots, df_stores, D, C, has_predesigned: bool,
+                 reference_matrices=None):
         self.cfg = config
         self.df = df
         self.df_depots = df_depots
@@ -26,14 +43,60 @@ class MDVRPSolver:
         self.D = D
         self.C = C
         self.has_predesigned = has_predesigned
+        # (D, C) en float64 para medir la deriva del modo compacto (cfg.compact)
+        self.reference_matrices = reference_matrices
+        self.time_windows = None  # TimeWindows de la corrida (solve)
+        self.fleet = Fleet.from_config(config, df_depots)
+
+    def _precision_drift(self, results):
+        """Recalcula las rutas elegidas con las matrices float64 y reporta la diferencia."""
+        D64, C64 = self.reference_matrices
+        worst_abs = worst_rel = 0.0
+        total32 = total64 = 0.0
+        for r in results.routes:
+            seq = np.asarray(r.chosen_sequence_idx, dtype=np.intp)
+            fuel64 = r.fuel_factor * float(C64[seq[:-1], seq[1:]].sum(dtype=np.float64))
+            diff = abs(float(r.chosen_fuel_cost) - fuel64)
+            worst_abs = max(worst_abs, diff)
+            worst_rel = max(worst_rel, diff / fuel64 if fuel64 > 0 else 0.0)
+            total32 += float(r.chosen_fuel_cost)
+            total64 += fuel64
+        results.precision_drift = {
+            "dtype": np.dtype(self.C.dtype).name,
+            "max_abs_fuel": worst_abs,
+            "max_rel_fuel": worst_rel,
+            "total_fuel": total32,
+            "total_fuel_float64": total64,
+            "total_abs_fuel": abs(total32 - total64),
+        }
+        print(f"  ✓ Deriva {results.precision_drift['dtype']} vs float64: "
+              f"máx. por ruta {worst_abs:.3g} ({100.0 * worst_rel:.2g}%) | total {abs(total32 - total64):.3g}")
+
+    def _demand_percentiles(self):
+        return (float(np.percentile(self.df_stores["demanda"], 50)),
+                float(np.percentile(self.df_stores["demanda"], 80)))
+
+    def vehicle_capacity(self):
+        """Capacidad por vehículo: máx(mult_p50 x p50, mult_p80 x p80) de la demanda, redondeada."""
+        if self.fleet is not None:
+            return float(self.fleet.capacity.max())
+        p50, p80 = self._demand_percentiles()
+        cap = max(self.cfg.capacity_multiplier_p50 * p50,
+                  self.cfg.capacity_multiplier_p80 * p80)
+        return round(cap, 0)
 
     def _vehicle_capacity(self):
         print("\n[2/6] Calculando capacidad de vehículos...")
-        p50 = float(np.percentile(self.df_stores["demanda"], 50))
-        p80 = float(np.percentile(self.df_stores["demanda"], 80))
-        cap = max(self.cfg.capacity_multiplier_p50 * p50,
-                  self.cfg.capacity_multiplier_p80 * p80)
-        cap = round(cap, 0)
+        if self.fleet is not None:
+            for k, t in enumerate(self.fleet.types):
+                units = [self.fleet.available(d, k) for d in self.fleet.units]
+                total = "sin límite" if None in units else sum(units)
+                print(f"  ✓ {t.name}: capacidad {t.capacity:.2f} | combustible x{t.fuel_factor:.2f} | "
+                      f"{total} unidades")
+            print(f"  ✓ Viajes por vehículo: hasta {self.fleet.max_trips}")
+            return self.vehicle_capacity()
+        p50, p80 = self._demand_percentiles()
+        cap = self.vehicle_capacity()
         print(f"  ✓ Demanda mediana (p50): {p50:.2f}")
         print(f"  ✓ Demanda p80: {p80:.2f}")
         print(f"  ✓ Capacidad vehículo: {cap:.2f}")
@@ -50,11 +113,12 @@ class MDVRPSolver:
 
             # map de nombre depósito -> idx (elige el más cercano por distancia por seguridad)
             # asume que cada tienda se asigna al CD de menor distancia si no hay mapping explícito
-            for _, row in self.df[self.df["demanda"] > 0].iterrows():
-                store_idx = int(row["idx"])
-                # deposit nearest:
-                nearest_depot = min(depots_idx, key=lambda di: self.D[store_idx, di])
-                route_name = str(row[self.cfg.col_route_name])
+            rows = self.df[self.df["demanda"] > 0]
+            store_ids = rows["idx"].to_numpy(dtype=int)
+            # argmin por fila: ante empate gana el primer CD (igual que min())
+            nearest = np.asarray(depots_idx)[np.argmin(self.D[np.ix_(store_ids, depots_idx)], axis=1)]
+            route_names = rows[self.cfg.col_route_name].astype(str).tolist()
+            for store_idx, nearest_depot, route_name in zip(store_ids.tolist(), nearest.tolist(), route_names):
                 groups[(nearest_depot, route_name)].append(store_idx)
 
             # imprimir conteo por CD
@@ -71,17 +135,22 @@ class MDVRPSolver:
         depots_idx = self.df_depots["idx"].tolist()
         stores_idx = self.df_stores["idx"].tolist()
 
-        # Asignar por depósito más cercano (en distancia)
+        # Asignar por depósito más cercano (en combustible), todas las tiendas a la vez
         assignment = {d: [] for d in depots_idx}
-        for s in stores_idx:
-            d_best = min(depots_idx, key=lambda d: self.C[d, s])
-            assignment[d_best].append(s)
+        if stores_idx:
+            best = np.asarray(depots_idx)[np.argmin(self.C[np.ix_(depots_idx, stores_idx)], axis=0)]
+            for s, d_best in zip(stores_idx, best.tolist()):
+                assignment[d_best].append(s)
 
         for d in depots_idx:
             print(f"  ✓ {self.df.loc[d, 'Nombre']}: {len(assignment[d])} tiendas")
 
         return assignment, False  # False = no prediseñadas (iremos a clustering)
 
+    def _depot_capacity(self, depot_idx, vehicle_capacity):
+        """Capacidad para agrupar las tiendas del CD (con flota: la mayor disponible ahí)."""
+        return vehicle_capacity if self.fleet is None else self.fleet.depot_capacity(depot_idx)
+
     def _clusters_from_groups_or_capacity(self, assignment_or_groups, pre_grouped, vehicle_capacity):
         print("\n[4/6] Creando clusters por capacidad...")
         clusters = defaultdict(list)  # depot_idx -> list of store-list
@@ -89,11 +158,12 @@ class MDVRPSolver:
         if pre_grouped:
             # Cada grupo prediseñado ya es una "ruta base" (validamos capacidad: si excede, se parte)
             for (depot_idx, route_name), stores in assignment_or_groups.items():
+                capacity = self._depot_capacity(depot_idx, vehicle_capacity)
                 current = []
                 demand = 0.0
                 for s in stores:
                     d = float(self.df.loc[s, "demanda"])
-                    if demand + d <= vehicle_capacity:
+                    if demand + d <= capacity:
                         current.append(s); demand += d
                     else:
                         clusters[depot_idx].append(current)
@@ -101,111 +171,416 @@ class MDVRPSolver:
                 if current:
                     clusters[depot_idx].append(current)
         else:
-            # Clustering simple secuencial por capacidad
+            # Clustering por capacidad (secuencial, barrido, k-means capacitado o bin-packing)
+            engine = CapacityClusteringEngine(self.df, self.cfg.clustering_method)
+            print(f"  ✓ Método: {self.cfg.clustering_method}")
             for depot_idx, stores in assignment_or_groups.items():
-                current = []
-                demand = 0.0
-                for s in stores:
-                    d = float(self.df.loc[s, "demanda"])
-                    if demand + d <= vehicle_capacity:
-                        current.append(s); demand += d
-                    else:
-                        clusters[depot_idx].append(current)
-                        current = [s]; demand = d
-                if current:
-                    clusters[depot_idx].append(current)
+                depot_clusters = engine.cluster(depot_idx, stores, self._depot_capacity(depot_idx, vehicle_capacity))
+                if depot_clusters:
+                    clusters[depot_idx] = depot_clusters
 
         # imprimir totales
         for depot_idx, routes in clusters.items():
             print(f"  ✓ {self.df.loc[depot_idx, 'Nombre']}: {len(routes)} rutas")
         return clusters
 
-    def solve(self):
+    def _neighbor_index(self):
+        """k vecinos más cercanos entre tiendas (una vez por dataset), o None si está desactivado."""
+        if self.cfg.neighbor_k <= 0:
+            return None
+        matrix = self.C if self.cfg.neighbor_metric == "fuel" else self.D
+        index = NeighborIndex(matrix, self.cfg.neighbor_k, candidates=self.df_stores["idx"].tolist())
+        print(f"  ✓ Listas de vecinos: k={index.k} ({self.cfg.neighbor_metric})")
+        return index
+
+    @staticmethod
+    def _budget_shares(budget, weights, workers):
+        """
+        Reparte `budget` segundos de pared entre rutas en proporción a su peso
+        (tamaño x potencial de mejora). Con varios workers las rutas corren a la
+        vez, así que cada parte se escala por workers (sin pasar del total).
+        """
+        budget = max(0.0, budget)
+        total = sum(weights)
+        if total <= 0:  # sin potencial estimado: partes iguales
+            weights, total = [1.0] * len(weights), float(max(1, len(weights)))
+        return [min(budget, budget * workers * w / total) for w in weights]
+
+    def _time_windows(self):
+        """TimeWindows del dataset y la configuración, o None si no hay restricciones de horario."""
+        tw = TimeWindows.from_frame(self.df, self.cfg)
+        if tw is not None:
+            windows = int((np.isfinite(tw.ready) | np.isfinite(tw.due)).sum())
+            shift = (f"jornada máx. {self.cfg.max_shift_hours:.1f} h" if self.cfg.max_shift_hours is not None
+                     else "sin límite de jornada")
+            print(f"  ✓ Ventanas de tiempo: {windows} tiendas | salida {self.cfg.shift_start_hour:.2f} h | {shift}")
+        return tw
+
+    def _timing(self, route, dist):
+        """(horas de la ruta, horas de retraso); sin ventanas, viaje + servicio."""
+        if self.time_windows is None:
+            hours = GeometryCalculator.route_time(dist, len(route) - 2, self.cfg.average_speed_kmh,
+                                                  self.cfg.service_time_minutes / 60.0)
+            return float(hours), 0.0
+        starts, late = self.time_windows.timeline(route, self.D)
+        return starts[-1] - self.time_windows.shift_start, late
+
+    def _fleet_stage(self, jobs, trips):
+        """
+        Tipo de vehículo por ruta: las rutas de cada CD se empacan en los viajes
+        de la flota según su carga (Fleet.assign_types). Regresa un tipo por job.
+        """
+        demand = self.df["demanda"].to_numpy(dtype=float)
+        kinds = np.empty(len(jobs), dtype=int)
+        by_depot = defaultdict(list)
+        for n, job in enumerate(jobs):
+            by_depot[job[0]].append(n)
+        for depot_idx, ns in by_depot.items():
+            sizes = [len(jobs[n][2]) for n in ns]
+            stores = np.concatenate([np.asarray(jobs[n][2], dtype=np.intp) for n in ns])
+            loads = np.bincount(np.repeat(np.arange(len(ns)), sizes), weights=demand[stores], minlength=len(ns))
+            kinds[ns], over = self.fleet.assign_types(depot_idx, loads, trips)
+            used = np.bincount(kinds[ns], minlength=len(self.fleet.types))
+            mix = ", ".join(f"{t.name} {c}" for t, c in zip(self.fleet.types, used.tolist()) if c)
+            print(f"  ✓ {self.df.loc[depot_idx, 'Nombre']}: viajes por tipo: {mix}")
+            if over:
+                print(f"  ⚠️ {self.df.loc[depot_idx, 'Nombre']}: {over} viajes exceden la flota disponible")
+        return kinds
+
+    def _vehicle_stage(self, results, depots, kinds, trips):
+        """
+        Empaca los viajes de cada (CD, tipo) en vehículos por horas de ruta
+        (Fleet.pack_trips); asigna vehicle_id / trip y regresa el uso de la flota.
+        """
+        groups = defaultdict(list)
+        for n, (depot_idx, k) in enumerate(zip(depots, kinds.tolist())):
+            if results.routes[n].num_stores > 0:  # la búsqueda entre rutas puede vaciar una ruta
+                groups[(depot_idx, k)].append(n)
+        usage = []
+        for (depot_idx, k), ns in groups.items():
+            depot_name, vt = self.df.loc[depot_idx, "Nombre"], self.fleet.types[k]
+            vehicle, trip = self.fleet.pack_trips([results.routes[n].route_hours for n in ns], trips)
+            for n, v, j in zip(ns, vehicle.tolist(), trip.tolist()):
+                results.routes[n].vehicle_id = f"{depot_name}-{vt.name}-{v + 1}"
+                results.routes[n].trip = j
+            available = self.fleet.available(depot_idx, k)
+            usage.append({"depot": str(depot_name), "vehicle_type": vt.name, "trips": len(ns),
+                          "vehicles": int(vehicle.max()) + 1, "available": available})
+            note = "" if available is None else f" de {available}"
+            mark = "⚠️" if available is not None and usage[-1]["vehicles"] > available else "✓"
+            print(f"  {mark} {depot_name} · {vt.name}: {len(ns)} viajes en {usage[-1]['vehicles']}{note} vehículos")
+        return usage
+
+    def _inter_route_stage(self, results, vehicle_capacity, descent=None, kinds=None):
+        """
+        Relocate / swap / CROSS-exchange entre rutas (mismo CD, o entre CDs si
+        cfg.inter_route_cross_depot). Actualiza la ruta elegida de cada
+        RouteComparison modificada (chosen_kind='IR').
+        """
+        print("  Búsqueda entre rutas (relocate / swap / CROSS)...")
+        demand = self.df["demanda"].to_numpy(dtype=float)
+        ir = InterRouteOptimizer(self.D, self.C, demand, vehicle_capacity, self.cfg,
+                                 time_windows=self.time_windows)
+        before = [r.chosen_sequence_idx for r in results.routes]
+        if kinds is None:
+            after, stats = ir.optimize(before)
+        else:
+            after, stats = ir.optimize(before, capacities=self.fleet.capacity[kinds],
+                                       fuel_factors=self.fleet.fuel_factor[kinds])
+
+        for k, (rc, old, new) in enumerate(zip(results.routes, before, after)):
+            if new == old:
+                continue
+            dist, fuel = ir.states[k].dist, ir.states[k].fuel
+            if descent is not None:
+                # reordenar la ruta modificada con el descenso local
+                new, dist, fuel, _ = descent.improve(new)
+                fuel *= rc.fuel_factor
+            rc.chosen_kind = "IR"
+            rc.chosen_sequence_idx = new
+            rc.chosen_distance, rc.chosen_fuel_cost = dist, fuel
+            rc.route_hours, rc.late_hours = self._timing(new, dist)
+            rc.stores = self._store_names(new[1:-1])
+            rc.num_stores = len(new) - 2
+
+        print(f"  ✓ Movimientos entre rutas: {stats['moves']} | "
+              f"Combustible -{stats['fuel_gain']:.2f} | Distancia -{stats['dist_gain']:.2f} km")
+
+    def _warm_start_config(self):
+        """Configuración del SA corto para rutas reparadas (sin perturbaciones del multistart)."""
+        f = self.cfg.warm_start_iteration_factor
+        return replace(self.cfg,
+                       iterations_base=max(1, int(self.cfg.iterations_base * f)),
+                       iterations_per_store=max(1, int(self.cfg.iterations_per_store * f)),
+                       multistart_perturbations=0)
+
+    def _store_names(self, stores_idx):
+        if not self.cfg.report_store_names:
+            return []
+        return [self.df.loc[s, "Nombre"] for s in stores_idx]
+
+    def stage_key(self):
+        """Entradas de asignación + clustering; misma llave = mismas rutas base."""
+        return (self.vehicle_capacity(), self.cfg.clustering_method,
+                self.cfg.col_route_name, self.cfg.col_route_order, repr(self.cfg.fleet))
+
+    def build_stages(self):
+        """Capacidad, asignación y clusters sin optimizar (para reutilizar en solve(stages=...))."""
+        vehicle_capacity = self._vehicle_capacity()
+        assignment_or_groups, pre_grouped = self._assignment_or_groups()
+        clusters = self._clusters_from_groups_or_capacity(assignment_or_groups, pre_grouped, vehicle_capacity)
+        return vehicle_capacity, clusters, pre_grouped
+
+    def solve(self, previous=None, sink=None, stages=None):
+        """
+        Optimización completa; con `previous` (RunSnapshot.load) se hace arranque
+        en caliente si la corrida previa es compatible. Con `sink` (p. ej.
+        RouteRowWriter) cada ruta se entrega en cuanto queda definitiva: al
+        terminarla, o al final de la búsqueda entre rutas si cfg.inter_route.
+        `stages` (build_stages de otro solver con la misma stage_key) evita
+        repetir capacidad, asignación y clustering.
+        """
         print("\n======================================================================")
         print("INICIANDO OPTIMIZACIÓN MDVRP")
         print("======================================================================")
 
-        vehicle_capacity = self._vehicle_capacity()
-
-        # Asignación / agrupación
-        assignment_or_groups, pre_grouped = self._assignment_or_groups()
+        results = OptimizationResults()
+        lap = StageClock(results, verbose=self.cfg.track_iterations).lap
 
-        # Clusters por capacidad
-        clusters = self._clusters_from_groups_or_capacity(assignment_or_groups, pre_grouped, vehicle_capacity)
+        if stages is not None:
+            vehicle_capacity, clusters, pre_grouped = stages
+            print(f"\n[2-4/6] Capacidad ({vehicle_capacity:.2f}), asignación y clusters reutilizados")
+        else:
+            vehicle_capacity = self._vehicle_capacity()
+        lap("capacity")
+
+        plan = None
+        if previous is not None:
+            print("\n[3/6] Arranque en caliente: comparando con la corrida previa...")
+            # Con flota, cada CD se repara con la mayor capacidad disponible ahí
+            capacity = lambda depot: self._depot_capacity(depot, vehicle_capacity)
+            plan = WarmStartPlanner(self.df, self.D, self.C, capacity).plan(previous)
+            lap("warm_start")
+
+        if plan is None and stages is None:
+            # Asignación / agrupación
+            assignment_or_groups, pre_grouped = self._assignment_or_groups()
+            lap("assignment")
+
+            # Clusters por capacidad
+            clusters = self._clusters_from_groups_or_capacity(assignment_or_groups, pre_grouped, vehicle_capacity)
+            lap("clustering")
 
         # Optimizador
         print("\n[5/6] Optimizando rutas con Recocido Simulado...")
-        sa = SimulatedAnnealingOptimizer(self.D, self.C, self.cfg)
+        neighbors = self._neighbor_index()
+        self.time_windows = tw = self._time_windows()
+        sa_cfg = self.cfg if plan is None else self._warm_start_config()
+        sa = SimulatedAnnealingOptimizer(self.D, self.C, sa_cfg, neighbors=neighbors, time_windows=tw)
+        lap("setup")
 
-        results = OptimizationResults()
         total_base_fuel = total_opt_fuel = 0.0
         total_base_dist = total_opt_dist = 0.0
         route_counter = 0
 
-        for depot_idx, routes in clusters.items():
+        # Rutas base (Prediseñada si hay orden, si no NN; en caliente: Previa o Reparada)
+        jobs = []  # (depot_idx, route_id, stores_idx, base_route, base_kind)
+        if plan is not None:
+            affected = set(plan.affected)
+            for route_id, route in plan.routes.items():
+                jobs.append((plan.depots[route_id], route_id, route[1:-1], route,
+                             "Reparada" if route_id in affected else "Previa"))
+        else:
+            for depot_idx, routes in clusters.items():
+                depot_name = self.df.loc[depot_idx, "Nombre"]
+                for r_i, stores_idx in enumerate(routes, start=1):
+                    if pre_grouped:
+                        base_route = RouteBuilder.route_from_predesigned(
+                            depot_idx, stores_idx, self.df, self.cfg.col_route_order, self.D
+                        )
+                        base_kind = "Predisenada"
+                    else:
+                        base_route = RouteBuilder.nearest_neighbor_route(depot_idx, stores_idx, self.D)
+                        base_kind = "NN"
+                    jobs.append((depot_idx, f"{depot_name}-R{r_i}", stores_idx, base_route, base_kind))
+
+        # Flota heterogénea: tipo de vehículo por ruta (con ventanas, un viaje por vehículo)
+        kinds = trips = None
+        if self.fleet is not None:
+            trips = self.fleet.max_trips
+            if tw is not None and tw.windowed.any() and trips > 1:
+                print("  ⚠️ Con ventanas de tiempo cada vehículo hace un solo viaje (horario desde la salida)")
+                trips = 1
+            kinds = self._fleet_stage(jobs, trips)
+        lap("base_routes")
+
+        descent = None
+        if self.cfg.post_optimize:
+            descent = LocalDescent(self.D, self.C, self.cfg, neighbors=neighbors, symmetric=sa.symmetric,
+                                   cache=sa.cache, time_windows=tw)
+
+        # Las rutas reutilizadas ('Previa') no pasan por SA
+        seeds = [sa.route_seed(self.cfg.seed, n) for n in range(1, len(jobs) + 1)]
+        sa_jobs = [n for n, job in enumerate(jobs) if job[4] != "Previa"]
+        budget = self.cfg.time_budget_s
+        weights = [sa.improvement_potential(jobs[n][3]) for n in sa_jobs] if budget is not None else None
+        parallel = self.cfg.workers > 1 and len(sa_jobs) > 1
+        if budget is not None:
+            print(f"  ✓ Presupuesto SA: {budget:.1f}s repartido por tamaño y potencial de mejora")
+
+        # Optimizar con SA (multistart); en paralelo si cfg.workers > 1
+        if parallel:
+            print(f"  ✓ Workers: {self.cfg.workers}")
+            shares = ([None] * len(sa_jobs) if budget is None
+                      else self._budget_shares(budget, weights, self.cfg.workers))
+            tasks = [(jobs[n][3], seeds[n], share) for n, share in zip(sa_jobs, shares)]
+            outputs = optimize_routes_parallel(self.D, self.C, sa_cfg, tasks, self.cfg.workers, neighbors, tw)
+        else:
+            outputs = []
+            deadline = time.monotonic() + budget if budget is not None else None
+            try:
+                for k, n in enumerate(sa_jobs):
+                    share = None
+                    if deadline is not None:
+                        # Reparto dinámico: lo que no usó una ruta estancada pasa a las siguientes
+                        share = self._budget_shares(deadline - time.monotonic(), weights[k:], 1)[0]
+                    sa.reseed(seeds[n])
+                    result = sa.optimize(jobs[n][3], time_budget=share)
+                    outputs.append((result, sa.last_stats))
+            finally:
+                sa.close()
+        sa_outputs = dict(zip(sa_jobs, outputs))
+        exact = sum(1 for _, stats in outputs if stats.get("exact"))
+        if exact:
+            print(f"  ✓ Rutas resueltas exactas (sin SA): {exact} de {len(outputs)}")
+        lap("sa")
+
+        for n, (depot_idx, route_id, stores_idx, base_route, base_kind) in enumerate(jobs):
             depot_name = self.df.loc[depot_idx, "Nombre"]
-            for r_i, stores_idx in enumerate(routes, start=1):
-                route_counter += 1
-
-                # Construir ruta base (Prediseñada si hay orden, si no NN)
-                if pre_grouped:
-                    base_route = RouteBuilder.route_from_predesigned(
-                        depot_idx, stores_idx, self.df, self.cfg.col_route_order, self.D
-                    )
-                    base_kind = "Predisenada"
-                else:
-                    base_route = RouteBuilder.nearest_neighbor_route(depot_idx, stores_idx, self.D)
-                    base_kind = "NN"
-
-                base_dist, base_fuel = sa.route_cost(base_route)
-
-                # Optimizar con SA (multistart)
-                sa_route, sa_dist, sa_fuel = sa.optimize(base_route)
-
-                # Elegir mejor (combustible; si empate y activado, distancia)
-                chosen_kind = base_kind
-                chosen_route = base_route
-                chosen_dist, chosen_fuel = base_dist, base_fuel
-
+            route_counter += 1
+            base_dist, base_fuel = sa.route_cost(base_route)
+            reused = n not in sa_outputs
+            if reused:
+                sa_output, sa_stats = (base_route, base_dist, base_fuel), {"reused": True}
+            else:
+                sa_output, sa_stats = sa_outputs[n]
+            results.route_stats.append({"route_id": route_id, "depot_name": depot_name,
+                                        "num_stores": len(stores_idx), **sa_stats})
+
+            sa_route, sa_dist, sa_fuel = sa_output
+            sa_kind = "Exacta" if sa_stats.get("exact") else "SA"
+
+            # Elegir mejor (combustible; si empate y activado, distancia)
+            chosen_kind = base_kind
+            chosen_route = base_route
+            chosen_dist, chosen_fuel = base_dist, base_fuel
+            candidates = [(sa_kind, sa_route, sa_dist, sa_fuel)]
+
+            # Descenso local determinista sobre base y SA (antes de elegir)
+            ls_gains = {}
+            if descent is not None and not reused:
+                ls_route, ls_dist, ls_fuel, _ = descent.improve(base_route)
+                ls_gains["ls_base_fuel_gain"] = base_fuel - ls_fuel
+                ls_gains["ls_base_dist_gain"] = base_dist - ls_dist
+                imp_route, imp_dist, imp_fuel, _ = descent.improve(sa_route)
+                ls_gains["ls_sa_fuel_gain"] = sa_fuel - imp_fuel
+                ls_gains["ls_sa_dist_gain"] = sa_dist - imp_dist
+                sa_route, sa_dist, sa_fuel = imp_route, imp_dist, imp_fuel
+                candidates = [(sa_kind, sa_route, sa_dist, sa_fuel), ("LS", ls_route, ls_dist, ls_fuel)]
+
+            chosen_late = tw.lateness(base_route, self.D) if tw is not None else 0.0
+            for kind, route, dist, fuel in candidates:
+                late = tw.lateness(route, self.D) if tw is not None else 0.0
                 better = False
-                if sa_fuel < base_fuel - 1e-12:
+                if late < chosen_late - TW_EPS:
+                    better = True
+                elif late > chosen_late + TW_EPS:
+                    better = False
+                elif fuel < chosen_fuel - 1e-12:
                     better = True
-                elif self.cfg.accept_tie_on_distance and abs(sa_fuel - base_fuel) < 1e-12 and sa_dist < base_dist - 1e-12:
+                elif self.cfg.accept_tie_on_distance and abs(fuel - chosen_fuel) < 1e-12 and dist < chosen_dist - 1e-12:
                     better = True
                 if better:
-                    chosen_kind = "SA"
-                    chosen_route = sa_route
-                    chosen_dist, chosen_fuel = sa_dist, sa_fuel
-
-                fuel_savings_pct = 100.0 * (base_fuel - sa_fuel) / base_fuel if base_fuel > 0 else 0.0
-                dist_savings_pct = 100.0 * (base_dist - sa_dist) / base_dist if base_dist > 0 else 0.0
-
-                print(f"  [{route_counter}] {depot_name}-R{r_i}: Combustible {fuel_savings_pct:.1f}%, Distancia {dist_savings_pct:.1f}%")
-
-                total_base_fuel += base_fuel
-                total_opt_fuel += chosen_fuel
-                total_base_dist += base_dist
-                total_opt_dist += chosen_dist
-
-                results.routes.append(RouteComparison(
-                    depot_name=depot_name,
-                    route_id=f"{depot_name}-R{r_i}",
-                    stores=[self.df.loc[s, "Nombre"] for s in stores_idx],
-                    num_stores=len(stores_idx),
-                    base_kind=base_kind,
-                    base_distance=base_dist,
-                    base_fuel_cost=base_fuel,
-                    sa_distance=sa_dist,
-                    sa_fuel_cost=sa_fuel,
-                    sa_improvement_fuel_pct=fuel_savings_pct,
-                    sa_improvement_dist_pct=dist_savings_pct,
-                    chosen_kind=chosen_kind,
-                    chosen_distance=chosen_dist,
-                    chosen_fuel_cost=chosen_fuel,
-                    base_sequence_idx=base_route,
-                    sa_sequence_idx=sa_route,
-                    chosen_sequence_idx=chosen_route
-                ))
+                    chosen_kind = kind
+                    chosen_route = route
+                    chosen_dist, chosen_fuel, chosen_late = dist, fuel, late
+            route_hours, late_hours = self._timing(chosen_route, chosen_dist)
+
+            # Combustible del tipo de vehículo: las rutas se optimizaron sobre C y se escala su costo
+            vehicle_type, factor = "", 1.0
+            if kinds is not None:
+                vehicle_type = self.fleet.types[kinds[n]].name
+                factor = float(self.fleet.fuel_factor[kinds[n]])
+                base_fuel, sa_fuel, chosen_fuel = base_fuel * factor, sa_fuel * factor, chosen_fuel * factor
+                ls_gains = {k: v * factor if "fuel" in k else v for k, v in ls_gains.items()}
+
+            fuel_savings_pct = 100.0 * (base_fuel - sa_fuel) / base_fuel if base_fuel > 0 else 0.0
+            dist_savings_pct = 100.0 * (base_dist - sa_dist) / base_dist if base_dist > 0 else 0.0
+
+            # Solo las mejoras del descenso (sin ganancia no se imprime "-0.00$")
+            ls_parts = [f"{label} -{ls_gains[key]:.2f}$"
+                        for label, key in (("LS base", "ls_base_fuel_gain"), ("LS SA", "ls_sa_fuel_gain"))
+                        if ls_gains.get(key, 0.0) > 0.005]
+            ls_note = f" | {', '.join(ls_parts)}" if ls_parts else ""
+            print(f"  [{route_counter}] {route_id}: Combustible {fuel_savings_pct:.1f}%, Distancia {dist_savings_pct:.1f}%{ls_note}")
+
+            total_base_fuel += base_fuel
+            total_opt_fuel += chosen_fuel
+            total_base_dist += base_dist
+            total_opt_dist += chosen_dist
+
+            results.routes.append(RouteComparison(
+                depot_name=depot_name,
+                route_id=route_id,
+                stores=self._store_names(stores_idx),
+                num_stores=len(stores_idx),
+                base_kind=base_kind,
+                base_distance=base_dist,
+                base_fuel_cost=base_fuel,
+                sa_distance=sa_dist,
+                sa_fuel_cost=sa_fuel,
+                sa_improvement_fuel_pct=fuel_savings_pct,
+                sa_improvement_dist_pct=dist_savings_pct,
+                chosen_kind=chosen_kind,
+                chosen_distance=chosen_dist,
+                chosen_fuel_cost=chosen_fuel,
+                base_sequence_idx=base_route,
+                sa_sequence_idx=sa_route,
+                chosen_sequence_idx=chosen_route,
+                route_hours=route_hours,
+                late_hours=late_hours,
+                vehicle_type=vehicle_type,
+                fuel_factor=factor,
+                **ls_gains
+            ))
+            if sink is not None and not self.cfg.inter_route and kinds is None:
+                sink.write(results.routes[-1])
+
+        lap("post_optimize")
+
+        # Búsqueda entre rutas sobre las rutas elegidas
+        if self.cfg.inter_route:
+            self._inter_route_stage(results, vehicle_capacity, descent, kinds)
+            total_opt_fuel = sum(r.chosen_fuel_cost for r in results.routes)
+            total_opt_dist = sum(r.chosen_distance for r in results.routes)
+            lap("inter_route")
+
+        # Viajes -> vehículos, con las horas de las rutas definitivas
+        fleet_usage = None
+        if kinds is not None:
+            fleet_usage = self._vehicle_stage(results, [job[0] for job in jobs], kinds, trips)
+            lap("fleet")
+        if sink is not None and (self.cfg.inter_route or kinds is not None):
+            for rc in results.routes:
+                sink.write(rc)
+
+        if self.reference_matrices is not None:
+            self._precision_drift(results)
+
+        if sa.cache is not None:
+            results.cache_stats = sa.cache.stats()
+            print(f"  ✓ Caché de rutas: {sa.cache.hits} aciertos / {sa.cache.misses} fallos "
+                  f"({100.0 * results.cache_stats['hit_rate']:.1f}%)")
 
         # Resumen
         print("\n[6/6] Compilando resultados...")
@@ -229,5 +604,24 @@ class MDVRPSolver:
             "distance_savings": total_distance_savings,
             "distance_savings_pct": total_distance_savings_pct
         }
+        if tw is not None:
+            late_routes = sum(r.late_hours > TW_EPS for r in results.routes)
+            results.summary["late_routes"] = late_routes
+            results.summary["total_late_hours"] = sum(r.late_hours for r in results.routes)
+            results.summary["max_route_hours"] = max((r.route_hours for r in results.routes), default=0.0)
+            if late_routes:
+                print(f"  ⚠️ {late_routes} rutas no cumplen ventanas/jornada "
+                      f"({results.summary['total_late_hours']:.2f} h de retraso)")
+            else:
+                print("  ✓ Todas las rutas cumplen ventanas de tiempo y jornada")
+        if fleet_usage is not None:
+            results.summary["fleet"] = fleet_usage
+            results.summary["vehicles_used"] = sum(u["vehicles"] for u in fleet_usage)
+            results.summary["vehicles_short"] = sum(max(0, u["vehicles"] - u["available"])
+                                                    for u in fleet_usage if u["available"] is not None)
+            print(f"  ✓ Vehículos usados: {results.summary['vehicles_used']}")
+            if results.summary["vehicles_short"]:
+                print(f"  ⚠️ Faltan {results.summary['vehicles_short']} vehículos respecto a la flota")
+        lap("summary")
 
         return results
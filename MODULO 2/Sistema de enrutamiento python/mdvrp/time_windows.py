@@ -0,0 +1,287 @@
+# mdvrp/time_windows.py
+"""
+Ventanas de tiempo por tienda y duración máxima de jornada.
+- Horario: el vehículo sale del CD a cfg.shift_start_hour; viaja a
+  cfg.average_speed_kmh sobre D y atiende cada tienda cfg.service_time_minutes.
+  Si llega antes del inicio de la ventana espera; llegar después del fin es
+  infactible, igual que regresar al CD después de shift_start + max_shift_hours.
+- RouteSchedule precalcula por ruta los tiempos acumulados hacia adelante y
+  hacia atrás y tablas de mínimo/máximo por rango (sparse table). Con eso,
+  cualquier tramo de la ruta, recorrido en su sentido o invertido, se resume
+  en O(1) como (duración, inicio más temprano al final, llegada más tardía):
+      inicio_final(llegada) = max(llegada + duración, temprano)
+      factible  <=>  llegada <= tardía
+- Un movimiento (2-opt, swap, relocate, Or-opt, CROSS entre rutas) produce una
+  concatenación de pocos tramos de rutas actuales (ver *_pieces), así que su
+  factibilidad se revisa en O(1); la tabla se reconstruye solo al aplicarlo.
+- Una ruta sin tiendas con ventana solo está limitada por la jornada: basta
+  comparar su distancia con distance_limit() (sin tabla ni reconstrucción).
+- Las rutas infactibles (p. ej. la ruta base) se miden con lateness(): suma
+  de horas de retraso, para primero reducirlo.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+EPS = 1e-9  # horas
+# Tiendas a partir de las cuales el SA usa RouteSchedule; en rutas más cortas
+# reconstruir la tabla en cada aceptación cuesta más que evaluar la ruta completa
+SCHEDULE_MIN_STORES = 64
+
+# Columnas normalizadas que deja DataLoader (horas del día; NaN = sin ventana)
+READY_COLUMN = "ventana_inicio"
+DUE_COLUMN = "ventana_fin"
+
+
+def parse_hours(values):
+    """Horas del día como float: 7.5, "07:30", datetime.time o Timestamp; vacío -> NaN."""
+    def one(v):
+        if v is None or (isinstance(v, float) and np.isnan(v)) or v is pd.NaT:
+            return np.nan
+        if isinstance(v, (datetime.time, datetime.datetime, pd.Timestamp)):
+            return v.hour + v.minute / 60.0 + v.second / 3600.0
+        if isinstance(v, str):
+            text = v.strip()
+            if not text:
+                return np.nan
+            if ":" in text:
+                parts = [float(x) for x in text.split(":")]
+                return parts[0] + parts[1] / 60.0 + (parts[2] / 3600.0 if len(parts) > 2 else 0.0)
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            raise ValueError(f"⚠️ Hora inválida en ventana de tiempo: {v!r} (usar 7.5 o '07:30')") from None
+    return np.array([one(v) for v in values], dtype=float)
+
+
+def has_windows(df):
+    """¿Trae el dataset alguna ventana de tiempo (columnas normalizadas por DataLoader)?"""
+    return any(col in df.columns and df[col].notna().any() for col in (READY_COLUMN, DUE_COLUMN))
+
+
+_CLASH_MASKS = {}  # n -> máscaras de orden con columna centinela (ver RouteSchedule)
+
+
+def _clash_masks(n):
+    """
+    after[m, k] = k > m; before[m, c] = la posición n-1-c está antes que m.
+    La última columna (índice n) siempre es True: argmax la da si no hay choque.
+    """
+    masks = _CLASH_MASKS.get(n)
+    if masks is None:
+        idx = np.arange(n + 1)
+        after = idx[None, :] > idx[:n, None]
+        before = (n - 1 - idx[None, :]) < idx[:n, None]
+        after[:, n] = before[:, n] = True
+        masks = _CLASH_MASKS[n] = (after, before)
+    return masks
+
+
+class RouteSchedule:
+    """
+    Resúmenes de tramos de una ruta (posiciones 0..n+1, con el CD en ambos
+    extremos). Adelante: P[k] = tiempo sin esperas de la posición 0 a la k.
+    Invertido: Q[k] = tiempo sin esperas de k a 0 recorriendo la ruta al revés.
+    Una sola sparse table de mínimos sobre 6 filas (los máximos van negados):
+      0 -(ready - P)   1 due - P   2 -(ready + Q)   3 due + Q
+      4 primer choque hacia adelante   5 -(último choque invertido)
+    levels[k][i] = mínimos de las 6 filas en las posiciones [i, i + 2^k).
+    """
+    __slots__ = ("nodes", "service", "P", "Q", "levels")
+
+    def __init__(self, tw, route, D):
+        r = np.asarray(route, dtype=np.intp)
+        n = len(r)
+        node = tw.node_table[r]  # (ready, due, service) por posición
+        node[0] = (tw.shift_start, tw.shift_start, 0.0)   # salida fija del CD
+        node[-1] = (-np.inf, tw.shift_end, 0.0)           # regreso dentro de la jornada
+        ready, due, service = node.T
+        # Tiempos acumulados: fila 0 adelante (P), fila 1 invertido (Q)
+        arcs = np.asarray(D[np.concatenate((r[:-1], r[1:])), np.concatenate((r[1:], r[:-1]))], dtype=float)
+        PQ = np.zeros((2, n))
+        PQ[:, 1:] = arcs.reshape(2, n - 1) / tw.speed
+        PQ[0, 1:] += service[:-1]
+        PQ[1, 1:] += service[1:]
+        PQ.cumsum(axis=1, out=PQ)
+        P, Q = PQ
+
+        rows = np.empty((n, 6))
+        rows[:, 0] = P - ready
+        rows[:, 1] = due - P
+        rows[:, 2] = -(ready + Q)
+        rows[:, 3] = due + Q
+        # Choques internos: esperar la ventana de m hace llegar tarde a k (m antes
+        # que k en el recorrido), sin importar la hora de llegada al tramo.
+        # Adelante: primer k > m en choque; invertido: último k < m en choque.
+        # Solo las tiendas con inicio de ventana pueden provocarlos (en el CD
+        # de salida equivale a llegar tarde desde shift_start).
+        rows[:, 4] = n
+        rows[:, 5] = 1.0
+        waits = np.isfinite(ready[1:-1]).nonzero()[0] + 1
+        if len(waits):
+            after, before = _clash_masks(n)
+            sentinel = np.full(n + 1, -np.inf)
+            sentinel[:n] = rows[:, 1]
+            rows[waits, 4] = ((sentinel < rows[waits, 0:1] * -1.0 - EPS) & after[waits]).argmax(axis=1)
+            sentinel[:n] = rows[::-1, 3]
+            rows[waits, 5] = ((sentinel < rows[waits, 2:3] * -1.0 - EPS) & before[waits]).argmax(axis=1) + 1 - n
+
+        levels = [rows]
+        span = 1
+        while 2 * span <= n:
+            prev = levels[-1]
+            levels.append(np.minimum(prev[:-span], prev[span:]))
+            span *= 2
+        self.levels = [level.tolist() for level in levels]
+        self.nodes = r.tolist()
+        self.service = service.tolist()
+        self.P, self.Q = P.tolist(), Q.tolist()
+
+    def summary(self, i, j):
+        """
+        Tramo que empieza en la posición i y termina en la j (i > j = invertido).
+        Regresa (duración, inicio más temprano en j, llegada más tardía a i);
+        la llegada más tardía es -inf si el tramo choca internamente. O(1).
+        """
+        lo, hi = (i, j) if i <= j else (j, i)
+        k = (hi - lo + 1).bit_length() - 1
+        level = self.levels[k]
+        a, b = level[lo], level[hi - (1 << k) + 1]
+        if i <= j:
+            P = self.P
+            ready = -min(a[0], b[0])
+            latest = min(a[1], b[1]) + P[i] if min(a[4], b[4]) > j else -np.inf
+            return (P[j] - P[i], ready + P[j], latest)
+        Q = self.Q
+        ready = -min(a[2], b[2])
+        latest = min(a[3], b[3]) - Q[i] if -min(a[5], b[5]) < j else -np.inf
+        return (Q[i] - Q[j], ready - Q[j], latest)
+
+
+class TimeWindows:
+    """Ventanas [ready, due] por nodo (horas), servicio por nodo y fin de jornada."""
+
+    def __init__(self, ready, due, service, speed_kmh, shift_start, shift_end):
+        self.ready = np.asarray(ready, dtype=float)
+        self.due = np.asarray(due, dtype=float)
+        self.service = np.asarray(service, dtype=float)
+        self.speed = float(speed_kmh)
+        self.shift_start = float(shift_start)
+        self.shift_end = float(shift_end)
+        self.windowed = np.isfinite(self.ready) | np.isfinite(self.due)
+        self.node_table = np.column_stack((self.ready, self.due, self.service))
+
+    @staticmethod
+    def from_frame(df, config):
+        """TimeWindows del dataset, o None si no hay ventanas ni límite de jornada."""
+        if not has_windows(df) and config.max_shift_hours is None:
+            return None
+        if config.average_speed_kmh <= 0:
+            raise ValueError(f"⚠️ average_speed_kmh debe ser positivo: {config.average_speed_kmh}")
+        n = len(df)
+        ready = df[READY_COLUMN].to_numpy(dtype=float) if READY_COLUMN in df.columns else np.full(n, np.nan)
+        due = df[DUE_COLUMN].to_numpy(dtype=float) if DUE_COLUMN in df.columns else np.full(n, np.nan)
+        ready = np.where(np.isnan(ready), -np.inf, ready)
+        due = np.where(np.isnan(due), np.inf, due)
+        bad = np.flatnonzero(ready > due)
+        if len(bad):
+            raise ValueError(f"⚠️ Ventana de tiempo con inicio > fin en {len(bad)} filas "
+                             f"(p. ej. {df['Nombre'].iloc[bad[0]]})")
+        is_store = df["demanda"].to_numpy(dtype=float) > 0
+        service = np.where(is_store, config.service_time_minutes / 60.0, 0.0)
+        shift_end = (config.shift_start_hour + config.max_shift_hours
+                     if config.max_shift_hours is not None else np.inf)
+        return TimeWindows(ready, due, service, config.average_speed_kmh, config.shift_start_hour, shift_end)
+
+    def schedule(self, route, D):
+        return RouteSchedule(self, route, D)
+
+    def distance_limit(self, route):
+        """
+        Distancia máxima (km) si ninguna tienda de la ruta tiene ventana: solo
+        cuenta la jornada, así que el retraso es max(0, dist - límite) / speed.
+        None si hay ventanas (usar schedule); inf si tampoco hay jornada máxima.
+        """
+        stores = np.asarray(route[1:-1], dtype=np.intp)
+        if self.windowed[stores].any():
+            return None
+        return (self.shift_end - self.shift_start - float(self.service[stores].sum())) * self.speed
+
+    def timeline(self, route, D):
+        """(inicio de servicio por posición, horas de retraso total) con esperas; O(n)."""
+        starts = [self.shift_start]
+        late = 0.0
+        t = self.shift_start
+        for k in range(1, len(route)):
+            a, b = route[k - 1], route[k]
+            t += (self.service[a] if k > 1 else 0.0) + float(D[a, b]) / self.speed
+            due = self.shift_end if k == len(route) - 1 else self.due[b]
+            if k < len(route) - 1:
+                t = max(t, self.ready[b])
+            late += max(0.0, t - due)
+            starts.append(t)
+        return starts, late
+
+    def lateness(self, route, D):
+        return self.timeline(route, D)[1]
+
+    def route_hours(self, route, D):
+        """Duración de la jornada (salida a regreso al CD), con esperas."""
+        return self.timeline(route, D)[0][-1] - self.shift_start
+
+    def feasible(self, pieces, D):
+        """
+        ¿Es factible la ruta formada por los tramos (schedule, i, j) en orden?
+        O(número de tramos): cada tramo se resume con RouteSchedule.summary.
+        """
+        t = None
+        prev_node = prev_service = None
+        for sched, i, j in pieces:
+            first = sched.nodes[i]
+            if t is None:
+                t = self.shift_start
+            else:
+                t += prev_service + float(D[prev_node, first]) / self.speed
+            dur, earliest, latest = sched.summary(i, j)
+            if t > latest + EPS:
+                return False
+            t = max(t + dur, earliest)
+            prev_node, prev_service = sched.nodes[j], sched.service[j]
+        return True
+
+    @staticmethod
+    def join(pieces):
+        """Nodos de la ruta formada por los tramos (para la evaluación completa)."""
+        route = []
+        for sched, i, j in pieces:
+            route.extend(sched.nodes[i:j + 1] if i <= j else sched.nodes[j:i + 1][::-1])
+        return route
+
+
+def move_pieces(sched, move):
+    """Tramos de la ruta tras un movimiento de LocalSearchOperators (2opt / swap / relocate)."""
+    kind, p, q = move
+    last = len(sched.nodes) - 1
+    if kind == "2opt":
+        pieces = [(0, p - 1), (q, p), (q + 1, last)]
+    elif kind == "swap":
+        p, q = min(p, q), max(p, q)
+        pieces = [(0, p - 1), (q, q), (p + 1, q - 1), (p, p), (q + 1, last)]
+    elif q > p:
+        pieces = [(0, p - 1), (p + 1, q), (p, p), (q + 1, last)]
+    else:
+        pieces = [(0, q - 1), (p, p), (q, p - 1), (p + 1, last)]
+    # (p + 1, q - 1) queda vacío en un swap adyacente
+    return [(sched, i, j) for i, j in pieces if not (kind == "swap" and i > j)]
+
+
+def or_opt_pieces(sched, i, j, k):
+    """Tramos tras mover el segmento [i..j] entre las posiciones k y k+1."""
+    last = len(sched.nodes) - 1
+    if k < i:
+        pieces = [(0, k), (i, j), (k + 1, i - 1), (j + 1, last)]
+    else:
+        pieces = [(0, i - 1), (j + 1, k), (i, j), (k + 1, last)]
+    return [(sched, a, b) for a, b in pieces]
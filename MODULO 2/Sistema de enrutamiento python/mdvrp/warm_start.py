@@ -0,0 +1,187 @@
+# mdvrp/warm_start.py
+"""
+Re-optimización incremental (arranque en caliente):
+- RunSnapshot: guarda/carga las secuencias elegidas de una corrida (por nombre
+  de nodo, no por índice: los índices cambian al agregar o quitar filas)
+- WarmStartPlanner: compara las tiendas actuales contra la corrida previa,
+  quita bajas y tiendas modificadas, repara capacidad y reinserta por
+  inserción más barata. Las rutas no tocadas se reutilizan tal cual; solo las
+  afectadas pasan por un SA corto (ver MDVRPSolver.solve).
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .time_windows import DUE_COLUMN, READY_COLUMN
+
+SNAPSHOT_VERSION = 1
+
+
+def _store_mask(df):
+    # Mismo criterio que DataLoader: todo lo que no sea CD es tienda
+    return ~df["Tipo"].astype(str).str.contains("distribuci")
+
+
+class RunSnapshot:
+
+    @staticmethod
+    def _node_signature(row):
+        signature = [float(row["lat"]), float(row["lon"]), float(row["demanda"])]
+        # Ventanas de tiempo (si el dataset las trae; -1 = sin ventana, JSON no admite NaN)
+        return signature + [float(np.nan_to_num(row[col], nan=-1.0))
+                            for col in (READY_COLUMN, DUE_COLUMN) if col in row.index]
+
+    @staticmethod
+    def build(results, df):
+        """Snapshot como dict (lo que save escribe en JSON)."""
+        names = df["Nombre"].astype(str)
+        is_store = _store_mask(df)
+        return {
+            "version": SNAPSHOT_VERSION,
+            "depots": names[~is_store].tolist(),
+            "stores": {str(row["Nombre"]): RunSnapshot._node_signature(row)
+                       for _, row in df[is_store].iterrows()},
+            "routes": [{"route_id": r.route_id, "depot_name": str(r.depot_name),
+                        "sequence": [str(names.iloc[i]) for i in r.chosen_sequence_idx]}
+                       for r in results.routes],
+        }
+
+    @staticmethod
+    def save(results, df, path):
+        data = RunSnapshot.build(results, df)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        print(f"  ✓ Corrida guardada para arranque en caliente: {path}")
+
+    @staticmethod
+    def load(path):
+        """Regresa el snapshot o None si no existe / es de otra versión."""
+        if not path or not os.path.exists(path):
+            print("  ⚠️ Sin corrida previa: se hace optimización completa")
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SNAPSHOT_VERSION:
+            print(f"  ⚠️ Corrida previa con versión {data.get('version')!r}: se ignora")
+            return None
+        return data
+
+
+@dataclass
+class WarmStartPlan:
+    """Rutas reparadas: route_id -> secuencia (índices actuales, con depósito)."""
+    routes: Dict[str, List[int]]
+    depots: Dict[str, int]           # route_id -> índice del depósito
+    affected: List[str]              # route_id a re-optimizar
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+
+
+class WarmStartPlanner:
+    def __init__(self, df, D, C, vehicle_capacity):
+        """vehicle_capacity: número, o función depot_idx -> capacidad (flota heterogénea)."""
+        self.df = df
+        self.D = D
+        self.C = C
+        self.capacity = vehicle_capacity if callable(vehicle_capacity) else (lambda depot: vehicle_capacity)
+        self.demand = df["demanda"].to_numpy(dtype=float)
+
+    def _insertion_cost(self, route, s):
+        r = np.asarray(route)
+        a, b = r[:-1], r[1:]
+        delta = self.C[a, s] + self.C[s, b] - self.C[a, b]
+        k = int(np.argmin(delta))
+        return float(delta[k]), k + 1
+
+    def _removal_saving(self, route, pos):
+        a, x, b = route[pos - 1], route[pos], route[pos + 1]
+        return float(self.C[a, x] + self.C[x, b] - self.C[a, b])
+
+    def plan(self, snapshot) -> Optional[WarmStartPlan]:
+        """None si la corrida previa no es compatible (CDs distintos o nombres duplicados)."""
+        names = self.df["Nombre"].astype(str)
+        if names.duplicated().any():
+            print("  ⚠️ Nombres de nodo duplicados: no se puede comparar con la corrida previa")
+            return None
+        index = dict(zip(names.tolist(), self.df["idx"].astype(int).tolist()))
+        is_store = _store_mask(self.df)
+        depots = set(names[~is_store].tolist())
+        if depots != set(snapshot["depots"]):
+            print("  ⚠️ Los CDs cambiaron respecto a la corrida previa: se hace optimización completa")
+            return None
+
+        current = {str(row["Nombre"]): RunSnapshot._node_signature(row)
+                   for _, row in self.df[is_store].iterrows()}
+        previous = snapshot["stores"]
+        added = [s for s in current if s not in previous]
+        removed = [s for s in previous if s not in current]
+        changed = [s for s in current if s in previous
+                   and (len(current[s]) != len(previous[s])
+                        or not np.allclose(current[s], previous[s], rtol=0.0, atol=1e-9))]
+        drop = set(removed) | set(changed)
+
+        routes, route_depot, affected = {}, {}, set()
+        for entry in snapshot["routes"]:
+            rid = entry["route_id"]
+            depot, seq = entry["sequence"][0], entry["sequence"][1:-1]
+            kept = [index[s] for s in seq if s not in drop]
+            if len(kept) != len(seq):
+                affected.add(rid)
+            routes[rid] = [index[depot]] + kept + [index[depot]]
+            route_depot[rid] = index[depot]
+
+        # Reparar capacidad (la capacidad del vehículo depende de la demanda del día)
+        pending = [index[s] for s in added + changed]
+        for rid, route in routes.items():
+            capacity = self.capacity(route_depot[rid])
+            while len(route) > 2 and self.demand[route[1:-1]].sum() > capacity + 1e-9:
+                pos = max(range(1, len(route) - 1), key=lambda p: self._removal_saving(route, p))
+                pending.append(route.pop(pos))
+                affected.add(rid)
+
+        # Reinsertar por inserción más barata en rutas del CD más cercano (en combustible)
+        depot_idx = sorted(set(route_depot.values()))
+        depot_names = self.df.set_index("idx")["Nombre"]
+        for s in sorted(pending, key=lambda x: -self.demand[x]):
+            depot = depot_idx[int(np.argmin(self.C[depot_idx, s]))]
+            capacity = self.capacity(depot)
+            best = None  # (delta, rid, pos)
+            for rid, route in routes.items():
+                if route_depot[rid] != depot:
+                    continue
+                if self.demand[route[1:-1]].sum() + self.demand[s] > capacity + 1e-9:
+                    continue
+                delta, pos = self._insertion_cost(route, s)
+                if best is None or delta < best[0]:
+                    best = (delta, rid, pos)
+            if best is None:
+                # Ninguna ruta del CD tiene capacidad: abrir una nueva
+                prefix = f"{depot_names[depot]}-R"
+                numbers = [int(r[len(prefix):]) for r in routes
+                           if r.startswith(prefix) and r[len(prefix):].isdigit()]
+                rid = f"{prefix}{max(numbers, default=0) + 1}"
+                routes[rid] = [depot, s, depot]
+                route_depot[rid] = depot
+            else:
+                _, rid, pos = best
+                routes[rid].insert(pos, s)
+            affected.add(rid)
+
+        # Rutas que quedaron vacías se eliminan
+        for rid in [r for r, route in routes.items() if len(route) <= 2]:
+            del routes[rid]
+            del route_depot[rid]
+            affected.discard(rid)
+
+        print(f"  ✓ Altas: {len(added)} | Bajas: {len(removed)} | Cambios: {len(changed)}")
+        print(f"  ✓ Rutas afectadas: {len(affected)} de {len(routes)}")
+        return WarmStartPlan(routes=routes, depots=route_depot,
+                             affected=[r for r in routes if r in affected],
+                             added=added, removed=removed, changed=changed)
@@ -0,0 +1,19 @@
+# serve.py
+"""
+Servicio MDVRP residente (API HTTP local, ver mdvrp/service.py):
+  python serve.py                              # 127.0.0.1:8765, sin datasets
+  python serve.py --dataset culiacan           # precarga el dataset de la config base
+  python serve.py --port 9000 --workers 4 --set matrix_backend=dense
+Ejemplos:
+  curl -X POST localhost:8765/datasets -d '{"dataset_id": "culiacan"}'
+  curl -X POST localhost:8765/datasets/culiacan/plan -d '{}'
+  curl -X POST localhost:8765/datasets/culiacan/route -d '{"stores": ["Tienda 1", "Tienda 7"]}'
+Equivale a `python -m mdvrp serve ...`.
+"""
+
+import sys
+
+from mdvrp.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["serve", *sys.argv[1:]]))
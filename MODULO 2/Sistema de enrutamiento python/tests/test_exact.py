@@ -0,0 +1,47 @@
+# tests/test_exact.py
+"""Held–Karp por capas contra la enumeración de todas las permutaciones."""
+
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from mdvrp.config import OptimizationConfig
+from mdvrp.exact import ExactRouteSolver
+from mdvrp.optimizer import SimulatedAnnealingOptimizer
+
+
+def _cost(route, M):
+    return float(sum(M[a, b] for a, b in zip(route[:-1], route[1:])))
+
+
+@pytest.mark.parametrize("n", range(2, 8))
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_exact_equals_permutations(n, symmetric):
+    rng = np.random.default_rng(100 * n + symmetric)
+    for _ in range(5):
+        D = rng.random((n + 2, n + 2)) * 10
+        if symmetric:
+            D = (D + D.T) / 2
+        C = D * (1 + 0.3 * rng.random(D.shape))
+        route = [0] + (rng.permutation(n) + 2).tolist() + [1]  # fin distinto del inicio
+        best = min(_cost([0, *p, 1], C) for p in permutations(route[1:-1]))
+
+        solved = ExactRouteSolver(D, C).solve(route)
+        assert solved[0] == 0 and solved[-1] == 1
+        assert sorted(solved) == sorted(route)
+        assert _cost(solved, C) == pytest.approx(best, abs=1e-9)
+
+
+def test_optimize_falls_back_to_sa_when_dp_gives_up(monkeypatch):
+    rng = np.random.default_rng(1)
+    D = rng.random((8, 8)) * 10
+    cfg = OptimizationConfig(exact_max_stores=12, iterations_base=200, multistart_perturbations=0)
+    sa = SimulatedAnnealingOptimizer(D, D * 0.15, cfg)
+    monkeypatch.setattr(sa.exact, "solve", lambda route, state_limit=None: None)
+    route = [0, 1, 2, 3, 4, 5, 6, 7, 0]
+
+    best, dist, fuel = sa.optimize(route)
+    assert sorted(best) == sorted(route)
+    assert (dist, fuel) == pytest.approx(sa.route_cost(best))
+    assert "exact" not in sa.last_stats
@@ -0,0 +1,97 @@
+# tests/test_fleet.py
+"""Flota heterogénea: unidades por CD, tipo por ruta y empaque de viajes."""
+
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from mdvrp.fleet import Fleet
+
+DEPOTS = pd.DataFrame({"Nombre": ["CD1", "CD2"], "idx": [0, 1]})
+
+
+def _fleet(specs, max_trips=1, reload_minutes=0.0, max_shift_hours=None):
+    cfg = SimpleNamespace(fleet=specs, max_trips_per_vehicle=max_trips,
+                          reload_minutes=reload_minutes, max_shift_hours=max_shift_hours)
+    return Fleet.from_config(cfg, DEPOTS)
+
+
+VAN = {"name": "Van", "capacity": 10, "fuel_factor": 0.8}
+TRUCK = {"name": "Torton", "capacity": 30, "fuel_factor": 1.3}
+
+
+def test_per_depot_counts_and_capacity():
+    fleet = _fleet([dict(VAN, count={"CD1": 2}), dict(TRUCK, count={"CD2": 1})])
+    assert fleet.available(0, 0) == 2 and fleet.available(1, 0) == 0
+    assert fleet.available(0, 1) == 0 and fleet.available(1, 1) == 1
+    assert fleet.depot_capacity(0) == 10
+    assert fleet.depot_capacity(1) == 30
+
+
+def test_unlimited_type_without_count():
+    fleet = _fleet([VAN])
+    assert fleet.available(0, 0) is None
+    kinds, over = fleet.assign_types(0, [5] * 50, 1)
+    assert over == 0 and set(kinds) == {0}
+
+
+def test_assign_types_prefers_cheapest_type_that_fits():
+    fleet = _fleet([dict(VAN, count=5), dict(TRUCK, count=5)])
+    kinds, over = fleet.assign_types(0, [25, 8, 12, 4], 1)
+    assert kinds.tolist() == [1, 0, 1, 0] and over == 0
+
+
+def test_count_limit_moves_routes_to_the_next_type():
+    # Dos vans: las dos rutas más cargadas que caben en van la usan, la tercera sube a camión
+    fleet = _fleet([dict(VAN, count=2), dict(TRUCK, count=5)])
+    kinds, over = fleet.assign_types(0, [4, 9, 7], 1)
+    assert kinds.tolist() == [1, 0, 0] and over == 0
+
+
+def test_multi_trip_multiplies_the_slots():
+    fleet = _fleet([dict(VAN, count=1), dict(TRUCK, count=1)], max_trips=3)
+    kinds, over = fleet.assign_types(0, [5, 5, 5, 5], 3)
+    assert sorted(kinds.tolist()) == [0, 0, 0, 1] and over == 0
+
+
+def test_over_counts_trips_without_a_free_vehicle():
+    fleet = _fleet([dict(VAN, count=1), dict(TRUCK, count={"CD1": 1})])
+    kinds, over = fleet.assign_types(1, [5, 5, 20], 1)  # CD2: una van, sin camión
+    assert over == 2
+    assert kinds.tolist()[2] == 1  # la de 20 no cabe en van: al tipo donde cabe aunque falte
+    # Una ruta más grande que todo tipo cuenta como faltante y va al de mayor capacidad
+    kinds, over = fleet.assign_types(0, [40], 1)
+    assert kinds.tolist() == [1] and over == 1
+
+
+def test_pack_trips_respects_max_trips():
+    fleet = _fleet([VAN])
+    vehicle, trip = fleet.pack_trips([1.0, 2.0, 3.0, 4.0, 5.0], 2)
+    assert max(vehicle) + 1 == 3
+    for v in set(vehicle.tolist()):
+        assert sorted(trip[vehicle == v].tolist()) == list(range(1, (vehicle == v).sum() + 1))
+        assert (vehicle == v).sum() <= 2
+
+
+def test_pack_trips_respects_shift_hours_with_reload():
+    fleet = _fleet([VAN], reload_minutes=30, max_shift_hours=8)
+    hours = [5.0, 3.0, 2.5, 2.0]
+    vehicle, trip = fleet.pack_trips(hours, 4)
+    for v in set(vehicle.tolist()):
+        mine = [h for h, u in zip(hours, vehicle) if u == v]
+        assert sum(mine) + 0.5 * (len(mine) - 1) <= 8 + 1e-9
+    # 5 h + 0.5 + 3 h rebasa 8: el de 3 h abre otro vehículo; el de 2.5 h completa el primero
+    assert vehicle[0] != vehicle[1] and vehicle[0] == vehicle[2]
+    assert max(vehicle) + 1 == 2
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"name": "X"}, "sin capacidad"),
+    ({"name": "X", "capacity": 10, "color": "rojo"}, "Campos desconocidos"),
+    ({"name": "X", "capacity": 10, "count": {"CD9": 1}}, "CDs desconocidos"),
+    ({"name": "X", "capacity": 10, "count": -1}, "negativas"),
+])
+def test_invalid_specs(spec, message):
+    with pytest.raises(ValueError, match=message):
+        _fleet([spec])
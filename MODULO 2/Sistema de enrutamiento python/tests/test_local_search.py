@@ -0,0 +1,38 @@
+# tests/test_local_search.py
+"""Deltas de los movimientos contra el costo recalculado de la ruta completa."""
+
+import numpy as np
+import pytest
+
+from mdvrp.local_search import LocalSearchOperators
+
+
+def _route_cost(route, M):
+    return float(sum(M[a, b] for a, b in zip(route[:-1], route[1:])))
+
+
+def _all_moves(route):
+    last = len(route) - 1
+    for p in range(1, last):
+        for q in range(1, last):
+            if q > p:
+                yield ("2opt", p, q)
+                yield ("swap", p, q)
+            if q != p:
+                yield ("relocate", p, q)
+
+
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_move_delta_equals_full_recompute(symmetric):
+    rng = np.random.default_rng(7)
+    M = rng.random((12, 12)) * 10
+    if symmetric:
+        M = (M + M.T) / 2
+    route = [0] + (rng.permutation(11) + 1).tolist() + [0]
+    base = _route_cost(route, M)
+    for move in _all_moves(route):
+        new = route[:]
+        LocalSearchOperators.apply_move(new, move)
+        assert sorted(new) == sorted(route)
+        delta = LocalSearchOperators.move_delta(route, move, M, symmetric)
+        assert delta == pytest.approx(_route_cost(new, M) - base, abs=1e-9), move
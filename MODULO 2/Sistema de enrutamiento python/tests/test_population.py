@@ -0,0 +1,29 @@
+# tests/test_population.py
+"""Costos acumulados por deltas en el motor de población contra el recálculo."""
+
+import numpy as np
+import pytest
+
+from mdvrp.config import OptimizationConfig
+from mdvrp.optimizer import SimulatedAnnealingOptimizer
+
+
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_population_costs_equal_recomputed(symmetric):
+    rng = np.random.default_rng(11)
+    D = rng.random((20, 20)) * 10
+    if symmetric:
+        D = (D + D.T) / 2
+    C = D * 0.15
+    cfg = OptimizationConfig(sa_engine="population", population_size=16, exact_max_stores=0,
+                             exact_bnb_max_stores=0, multistart_perturbations=3)
+    sa = SimulatedAnnealingOptimizer(D, C, cfg)
+    sa.reseed(0)
+    route = [0] + (rng.permutation(19) + 1).tolist() + [0]
+    chain = sa._anneal_population([route], 2000)
+
+    for r, dist, fuel in ((chain.route, chain.dist, chain.fuel),
+                          (chain.best_route, chain.best_dist, chain.best_fuel)):
+        assert sorted(r) == sorted(route)
+        assert (dist, fuel) == pytest.approx(sa.route_cost(r), abs=1e-9)
+    assert chain.best_fuel <= sa.route_cost(route)[1] + 1e-12
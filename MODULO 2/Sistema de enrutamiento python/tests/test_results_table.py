@@ -0,0 +1,67 @@
+# tests/test_results_table.py
+"""Reporte incremental: ida y vuelta por formato y reporte previo intacto al abortar."""
+
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from mdvrp.results_table import ROUTE_COLUMNS, SUMMARY_SHEET, RouteRowWriter
+
+
+def _route(k):
+    route = SimpleNamespace(**{attr: 0 for _, attr in ROUTE_COLUMNS})
+    route.depot_name, route.route_id = "CD1", f"CD1-R{k}"
+    route.base_kind, route.chosen_kind, route.vehicle_type = "Prediseñada", "SA", ""
+    route.base_fuel_cost, route.chosen_fuel_cost = 10.0 + k, 9.0 + k
+    route.base_distance, route.chosen_distance = 60.0 + k, 55.0 + k
+    return route
+
+
+@pytest.mark.parametrize("fmt", ["xlsx", "csv"])
+def test_abort_keeps_previous_report(tmp_path, fmt):
+    path = str(tmp_path / f"resumen.{fmt}")
+    with open(path, "w") as f:
+        f.write("reporte anterior")
+
+    with pytest.raises(RuntimeError):
+        with RouteRowWriter(path) as writer:
+            writer.write(_route(1))
+            raise RuntimeError("corrida interrumpida")
+
+    with open(path) as f:
+        assert f.read() == "reporte anterior"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"resumen.{fmt}"]
+
+
+def _read(path, fmt, **kwargs):
+    if fmt == "xlsx":
+        return pd.read_excel(path, **kwargs)
+    if fmt == "csv":
+        return pd.read_csv(path, encoding="utf-8-sig")
+    return pd.read_parquet(path)
+
+
+@pytest.mark.parametrize("fmt", ["xlsx", "csv", "parquet"])
+def test_round_trip_rows_and_summary(tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    routes = [_route(k) for k in range(1, 6)]
+    path = str(tmp_path / f"resumen.{fmt}")
+    with RouteRowWriter(path, chunk_rows=2) as writer:  # varios bloques en csv/parquet
+        for route in routes:
+            writer.write(route)
+
+    rows = _read(path, fmt, sheet_name="Rutas Detalle")
+    assert list(rows.columns) == [h for h, _ in ROUTE_COLUMNS]
+    assert rows["Ruta"].tolist() == [r.route_id for r in routes]
+    assert rows["Elegida Combustible"].tolist() == pytest.approx([r.chosen_fuel_cost for r in routes])
+
+    summary = _read(writer.summary_path, fmt, sheet_name=SUMMARY_SHEET).iloc[0]
+    base = sum(r.base_fuel_cost for r in routes)
+    opt = sum(r.chosen_fuel_cost for r in routes)
+    assert summary["Costo Base Total"] == pytest.approx(base)
+    assert summary["Costo Optimizado Total"] == pytest.approx(opt)
+    assert summary["Ahorro $"] == pytest.approx(base - opt)
+    assert summary["Distancia Optimizada Total"] == pytest.approx(sum(r.chosen_distance for r in routes))
+    assert not any(p.name.endswith(".tmp") for p in tmp_path.iterdir())
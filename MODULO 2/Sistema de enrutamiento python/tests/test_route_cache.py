@@ -0,0 +1,49 @@
+# tests/test_route_cache.py
+"""Caché de rutas: aciertos, colisiones del hash y desalojo LRU."""
+
+import numpy as np
+import pytest
+
+from mdvrp.route_cache import RouteCostCache
+
+
+def _cost(route, M):
+    return float(sum(M[a, b] for a, b in zip(route[:-1], route[1:])))
+
+
+@pytest.fixture
+def cache():
+    rng = np.random.default_rng(2)
+    D = rng.random((10, 10)) * 10
+    return RouteCostCache(D, D * 0.15, max_entries=2)
+
+
+def test_hit_returns_the_stored_cost(cache):
+    route = [0, 3, 4, 5, 0]
+    first = cache.cost(route)
+    assert cache.cost(list(route)) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first == pytest.approx((_cost(route, cache.D), _cost(route, cache.C)))
+
+
+def test_hash_collision_is_a_miss(cache, monkeypatch):
+    # Todas las rutas de la misma longitud caen en la misma llave
+    monkeypatch.setattr(cache, "key", lambda route: (1, len(route)))
+    a, b = [0, 3, 4, 5, 0], [0, 5, 4, 3, 1]
+    cache.cost(a)
+    dist, fuel = cache.cost(b)
+    assert (dist, fuel) == pytest.approx((_cost(b, cache.D), _cost(b, cache.C)))
+    assert (cache.hits, cache.misses) == (0, 2)
+    # La ruta nueva reemplazó a la anterior en esa llave
+    assert cache.cost(b) == (dist, fuel) and cache.hits == 1
+    assert cache.cost(a) == pytest.approx((_cost(a, cache.D), _cost(a, cache.C)))
+    assert cache.misses == 3
+
+
+def test_lru_eviction(cache):
+    routes = [[0, 1, 2, 0], [0, 3, 4, 0], [0, 5, 6, 0]]
+    for route in routes:
+        cache.cost(route)
+    assert cache.evictions == 1 and cache.stats()["size"] == 2
+    cache.cost(routes[0])  # la más antigua ya no está
+    assert cache.misses == 4
@@ -0,0 +1,24 @@
+# tests/test_solver.py
+"""El resultado del solver no depende del número de workers."""
+
+import contextlib
+import io
+
+from mdvrp.config import OptimizationConfig
+from mdvrp.instances import InstanceGenerator
+from mdvrp.solver import MDVRPSolver
+
+
+def _routes(workers):
+    instance = InstanceGenerator.generate(60, n_depots=3, seed=5)
+    cfg = OptimizationConfig(workers=workers, exact_max_stores=0, exact_bnb_max_stores=0,
+                             iterations_base=400, iterations_per_store=20, multistart_perturbations=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = MDVRPSolver(cfg, *instance).solve()
+    return [(r.route_id, list(r.sa_sequence_idx), r.sa_fuel_cost) for r in results.routes]
+
+
+def test_workers_give_same_routes():
+    serial = _routes(1)
+    assert len(serial) > 1
+    assert _routes(3) == serial
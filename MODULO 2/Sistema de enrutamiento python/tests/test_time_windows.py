@@ -0,0 +1,43 @@
+# tests/test_time_windows.py
+"""Factibilidad O(1) por tramos (RouteSchedule) contra la simulación completa."""
+
+import numpy as np
+
+from mdvrp.time_windows import TimeWindows, move_pieces, or_opt_pieces
+
+
+def _instance(rng, n=14):
+    xy = rng.random((n, 2)) * 15
+    D = np.linalg.norm(xy[:, None] - xy[None], axis=2) * (1 + 0.2 * rng.random((n, n)))
+    ready = np.where(rng.random(n) < 0.4, 6 + rng.random(n) * 3, -np.inf)
+    due = np.where(rng.random(n) < 0.4, np.maximum(ready, 6.0) + 1.5 + rng.random(n) * 3, np.inf)
+    service = np.full(n, 10 / 60)
+    service[0] = 0.0
+    tw = TimeWindows(ready, due, service, 35.0, 6.0, 12.0 + rng.random() * 4)
+    stores = rng.permutation(np.arange(1, n))[:rng.integers(3, n - 1)]
+    return tw, D, [0] + stores.tolist() + [0]
+
+
+def _check(tw, D, route, pieces):
+    new = tw.join(pieces)
+    assert sorted(new) == sorted(route) and new[0] == new[-1] == 0
+    assert tw.feasible(pieces, D) == (tw.lateness(new, D) <= 1e-7), new
+
+
+def test_feasible_equals_full_simulation():
+    rng = np.random.default_rng(3)
+    for _ in range(60):
+        tw, D, route = _instance(rng)
+        sched = tw.schedule(route, D)
+        last = len(route) - 1
+        for p in range(1, last):
+            for q in range(1, last):
+                if q > p:
+                    _check(tw, D, route, move_pieces(sched, ("2opt", p, q)))
+                    _check(tw, D, route, move_pieces(sched, ("swap", p, q)))
+                if q != p:
+                    _check(tw, D, route, move_pieces(sched, ("relocate", p, q)))
+        for i in range(1, last):
+            for j in range(i, min(i + 3, last)):
+                for k in list(range(0, i - 1)) + list(range(j + 1, last)):
+                    _check(tw, D, route, or_opt_pieces(sched, i, j, k))
@@ -0,0 +1,127 @@
+# tests/test_warm_start.py
+"""Plan de arranque en caliente: altas, bajas, cambios y reparación de capacidad."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from mdvrp.warm_start import RunSnapshot, WarmStartPlanner
+
+# Dos CDs en x=0 y x=100; tiendas A..D cerca del primero y E, F cerca del segundo
+NODES = [("CD1", 0, 0, 0), ("CD2", 100, 0, 0),
+         ("A", 5, 1, 100), ("B", 8, 2, 100), ("C", 6, -3, 100), ("D", 3, 4, 100),
+         ("E", 95, 1, 100), ("F", 97, -2, 100)]
+ROUTES = {"CD1-R1": ["CD1", "A", "B", "CD1"], "CD1-R2": ["CD1", "C", "D", "CD1"],
+          "CD2-R1": ["CD2", "E", "F", "CD2"]}
+
+
+def _frame(nodes):
+    df = pd.DataFrame(nodes, columns=["Nombre", "lon", "lat", "demanda"])
+    df["Tipo"] = np.where(df["Nombre"].str.startswith("CD"), "Centro de distribución", "Tienda")
+    df["idx"] = np.arange(len(df))
+    return df
+
+
+def _matrices(df):
+    xy = df[["lon", "lat"]].to_numpy(dtype=float)
+    D = np.linalg.norm(xy[:, None] - xy[None], axis=2)
+    return D, D * 0.15
+
+
+def _snapshot(nodes=NODES, routes=ROUTES):
+    df = _frame(nodes)
+    index = dict(zip(df["Nombre"], df["idx"]))
+    results = SimpleNamespace(routes=[
+        SimpleNamespace(route_id=rid, depot_name=seq[0], chosen_sequence_idx=[index[s] for s in seq])
+        for rid, seq in routes.items()])
+    return RunSnapshot.build(results, df)
+
+
+def _plan(nodes, capacity=1000.0, snapshot=None):
+    df = _frame(nodes)
+    D, C = _matrices(df)
+    plan = WarmStartPlanner(df, D, C, capacity).plan(snapshot or _snapshot())
+    names = df["Nombre"].tolist()
+    return plan, {rid: [names[i] for i in route] for rid, route in plan.routes.items()}
+
+
+def test_unchanged_stores_reuse_every_route():
+    plan, routes = _plan(NODES)
+    assert routes == ROUTES
+    assert plan.affected == [] and plan.added == plan.removed == plan.changed == []
+
+
+def test_added_store_goes_to_nearest_depot():
+    plan, routes = _plan(NODES + [("G", 98, 3, 100)])
+    assert plan.added == ["G"]
+    assert "G" in routes["CD2-R1"]
+    assert plan.affected == ["CD2-R1"]
+    assert routes["CD1-R1"] == ROUTES["CD1-R1"] and routes["CD1-R2"] == ROUTES["CD1-R2"]
+
+
+def test_removed_store_leaves_its_route():
+    plan, routes = _plan([n for n in NODES if n[0] != "B"])
+    assert plan.removed == ["B"]
+    assert routes["CD1-R1"] == ["CD1", "A", "CD1"]
+    assert plan.affected == ["CD1-R1"]
+
+
+def test_emptied_route_is_dropped():
+    plan, routes = _plan([n for n in NODES if n[0] not in ("E", "F")])
+    assert "CD2-R1" not in routes and "CD2-R1" not in plan.affected
+
+
+def test_moved_store_is_reinserted_at_its_new_depot():
+    moved = [("C", 96, 4, 100) if n[0] == "C" else n for n in NODES]
+    plan, routes = _plan(moved)
+    assert plan.changed == ["C"]
+    assert routes["CD1-R2"] == ["CD1", "D", "CD1"]
+    assert "C" in routes["CD2-R1"]
+    assert set(plan.affected) == {"CD1-R2", "CD2-R1"}
+
+
+def test_demand_overflow_is_repaired_within_capacity():
+    # B pasa de 100 a 250: CD1-R1 (A + B = 350) rebasa la capacidad de 300
+    grown = [("B", 8, 2, 250) if n[0] == "B" else n for n in NODES]
+    plan, routes = _plan(grown, capacity=300.0)
+    demand = {n[0]: n[3] for n in grown}
+    assert plan.changed == ["B"]
+    for rid, route in routes.items():
+        assert sum(demand[s] for s in route[1:-1]) <= 300.0, rid
+    assert sorted(s for r in routes.values() for s in r[1:-1]) == ["A", "B", "C", "D", "E", "F"]
+    # B ya no cabe en ninguna ruta de CD1: abre una nueva
+    assert routes["CD1-R3"] == ["CD1", "B", "CD1"]
+    assert set(plan.affected) == {"CD1-R1", "CD1-R3"}
+
+
+def test_smaller_capacity_repairs_untouched_routes():
+    # Mismas tiendas, pero la capacidad del día baja a 100: una tienda por ruta
+    plan, routes = _plan(NODES, capacity=100.0)
+    assert plan.changed == []
+    assert all(len(route) == 3 for route in routes.values())
+    assert sorted(s for r in routes.values() for s in r[1:-1]) == ["A", "B", "C", "D", "E", "F"]
+    assert set(plan.affected) == set(routes)
+
+
+def test_overflow_opens_a_new_route_with_per_depot_capacity():
+    # Capacidad de 200 en CD1 (dos tiendas por ruta) y 1000 en CD2
+    grown = [("A", 5, 1, 150) if n[0] == "A" else n for n in NODES]
+    df = _frame(grown)
+    D, C = _matrices(df)
+    capacity = {0: 200.0, 1: 1000.0}
+    plan = WarmStartPlanner(df, D, C, lambda depot: capacity[depot]).plan(_snapshot())
+    names = df["Nombre"].tolist()
+    routes = {rid: [names[i] for i in route] for rid, route in plan.routes.items()}
+    demand = df.set_index("Nombre")["demanda"]
+    for rid, route in routes.items():
+        assert demand[route[1:-1]].sum() <= capacity[plan.depots[rid]], rid
+    assert "CD1-R3" in routes and "CD1-R3" in plan.affected
+    assert routes["CD2-R1"] == ROUTES["CD2-R1"]
+
+
+def test_changed_depots_reject_the_snapshot():
+    renamed = [("CD9", 0, 0, 0) if n[0] == "CD1" else n for n in NODES]
+    df = _frame(renamed)
+    D, C = _matrices(df)
+    assert WarmStartPlanner(df, D, C, 1000.0).plan(_snapshot()) is None